@@ -1,6 +1,6 @@
 """
 ncaashark.py — BigSnapshot NCAA Cushion Scanner
-Only shows games with 7+ point lead. Court + plays in expander.
+Only shows games with 7+ point lead. Court grid up top, plays in expander.
 Run: streamlit run ncaashark.py
 """
 
@@ -8,9 +8,19 @@ import streamlit as st
 st.set_page_config(page_title="BigSnapshot NCAA SHARK", page_icon="🦈", layout="wide")
 import streamlit.components.v1 as components
 
-import requests, time, hashlib
-from datetime import datetime, timezone
+import time, hashlib, os
+from datetime import datetime, timedelta
 from streamlit_autorefresh import st_autorefresh
+from sharkstate import WarmStart, SharedSnapshot
+from sharkfetch import ESPN, FetchError
+from sharkcore import ET, NCAA, build_tick, fetch_games, get_slate, line_move_text, situation_possession
+from sharkpoller import Poller, STALE_AFTER
+from sharklines import LineHistory
+import sharkprof
+from sharkreplay import SPEEDS, ReplaySource, open_recording, recorded_days
+from sharkwatch import WatchStore, alert_text, new_rule, rule_text
+from sharksched import PlayScheduler
+from sharkparse import parse_summary_full
 
 # ══════════════════════════════════════════════════════════════════════
 # OWNER MODE
@@ -38,18 +48,16 @@ def check_auth():
 
 check_auth()
 
-st_autorefresh(interval=30_000, limit=10000, key="ncaa_shark_refresh")
+st_autorefresh(interval=2_000 if getattr(st.session_state.get("replay"), "playing", False) else 30_000,
+               limit=10000, key="ncaa_shark_refresh")
+sharkprof.rerun_begin()
 
 # ══════════════════════════════════════════════════════════════════════
 # CONFIG
 # ══════════════════════════════════════════════════════════════════════
 
 VERSION = "1.0"
-GAME_MINUTES = 40
-HALF_MINUTES = 20
-LEAGUE_AVG_TOTAL = 135
-THRESHOLDS = [120.5, 125.5, 130.5, 135.5, 140.5, 145.5, 150.5, 155.5, 160.5]
-SHARK_MINUTES = 5.0
+LEAGUE = NCAA    # clock, projection, thresholds and SHARK window live in sharkcore
 MIN_LEAD = 7
 
 if "session_id" not in st.session_state:
@@ -57,54 +65,9 @@ if "session_id" not in st.session_state:
 
 
 # ══════════════════════════════════════════════════════════════════════
-# TIME / PACE CALCULATIONS
+# PACE LABELS
 # ══════════════════════════════════════════════════════════════════════
 
-def calc_minutes_elapsed(period, clock_str):
-    try:
-        if not clock_str or clock_str == "0:00":
-            return min(period * HALF_MINUTES, GAME_MINUTES) if period else 0
-        parts = clock_str.replace(" ", "").split(":")
-        if len(parts) == 2:
-            mins_left = int(parts[0])
-            secs_left = int(parts[1])
-        elif len(parts) == 1:
-            mins_left = 0
-            secs_left = int(parts[0])
-        else:
-            mins_left, secs_left = 0, 0
-        time_left = mins_left + secs_left / 60.0
-        if period <= 2:
-            elapsed_before = (period - 1) * HALF_MINUTES
-            elapsed_in = HALF_MINUTES - time_left
-        else:
-            elapsed_before = GAME_MINUTES + (period - 3) * 5
-            elapsed_in = 5 - time_left
-        return max(0, elapsed_before + elapsed_in)
-    except Exception:
-        return 0.0
-
-def calc_total_game_minutes(period):
-    if period <= 2:
-        return GAME_MINUTES
-    return GAME_MINUTES + (period - 2) * 5
-
-def calc_projection(home_score, away_score, minutes_elapsed, total_game_mins):
-    total = home_score + away_score
-    if minutes_elapsed <= 0:
-        return LEAGUE_AVG_TOTAL
-    cur_pace = total / minutes_elapsed
-    lg_pace = LEAGUE_AVG_TOTAL / GAME_MINUTES
-    pct = minutes_elapsed / total_game_mins
-    if pct < 0.15:
-        blend = 0.3
-    elif pct < 0.5:
-        blend = 0.5 + (pct - 0.15) * 1.0
-    else:
-        blend = 0.85 + (pct - 0.5) * 0.3
-    blend = min(blend, 0.98)
-    return round(((cur_pace * blend) + (lg_pace * (1 - blend))) * total_game_mins, 1)
-
 def get_pace_label(ppm):
     if ppm >= 4.0: return "VERY HIGH"
     if ppm >= 3.6: return "HIGH"
@@ -116,7 +79,7 @@ def get_pace_label(ppm):
 # ── Kalshi NCAA deep link ────────────────────────────────────────────
 
 def get_kalshi_ncaa_link(away_abbr, home_abbr):
-    now = datetime.now(timezone.utc)
+    now = datetime.now(ET)
     date_str = now.strftime("%y") + now.strftime("%b").lower() + now.strftime("%d")
     away_k = away_abbr.lower().replace(" ", "").replace(".", "").replace("-", "")
     home_k = home_abbr.lower().replace(" ", "").replace(".", "").replace("-", "")
@@ -128,114 +91,239 @@ def get_kalshi_ncaa_link(away_abbr, home_abbr):
 # ESPN FETCHERS
 # ══════════════════════════════════════════════════════════════════════
 
-def fetch_ncaa_games():
-    games = []
-    today = datetime.now(timezone.utc).strftime("%Y%m%d")
-    url = ("https://site.api.espn.com/apis/site/v2/sports/basketball/mens-college-basketball/scoreboard"
-           "?dates=" + today + "&limit=200&groups=50")
+def fetch_ncaa_games(deadline=None):
+    return fetch_games(NCAA, deadline)
+
+
+def plays_url(game_id):
+    return NCAA.summary_url(game_id)
+
+
+def data_source():
+    # The session's replay when one is running, live ESPN otherwise.
+    return st.session_state.get("replay") or ESPN
+
+
+def fetch_plays(game_id, deadline=None):
+    # Same parse as the poller's summaries, so a replay answers it too.
+    summary, age = data_source().fetch(plays_url(game_id), parse_summary_full, deadline, route="summary", raw=True)
+    return summary["plays"], age
+
+
+def cached_plays(game_id):
+    summary, age = data_source().last_good(plays_url(game_id))
+    return (summary["plays"] if summary is not None else None), age
+
+
+@st.cache_resource
+def get_play_scheduler():
+    sched = PlayScheduler(NCAA.thresholds, NCAA.shark_minutes)
+    get_slate(NCAA).on_evict(sched.forget)
+    return sched
+
+
+# ══════════════════════════════════════════════════════════════════════
+# WARM START + SHARED SNAPSHOT — restart snapshot, one poller per box
+# ══════════════════════════════════════════════════════════════════════
+
+@st.cache_resource
+def get_warm_start():
+    return WarmStart("ncaa")
+
+
+def load_games(warm, deadline):
+    # Returns (games, stale_age, refresh). stale_age is seconds since the data
+    # shown was fresh (None when live); refresh is the warm-start thread, if any.
+    if not warm.live and (warm.load() or {}).get("games"):
+        refresh = warm.refresh_async(lambda: fetch_ncaa_games(ESPN.deadline(15))[0])
+        return warm.load()["games"], warm.age(), refresh
     try:
-        r = requests.get(url, timeout=10)
-        if r.status_code != 200:
-            return games
-        data = r.json()
-        for event in data.get("events", []):
-            comp = event.get("competitions", [{}])[0]
-            competitors = comp.get("competitors", [])
-            if len(competitors) < 2:
-                continue
-            home = away = None
-            for c in competitors:
-                if c.get("homeAway") == "home":
-                    home = c
-                elif c.get("homeAway") == "away":
-                    away = c
-            if not home or not away:
-                continue
-            ht = home.get("team", {})
-            at = away.get("team", {})
-            status = event.get("status", {})
-            state = status.get("type", {}).get("state", "pre")
-            period = status.get("period", 0)
-            clock = status.get("displayClock", "")
-            odds_list = comp.get("odds", [])
-            over_under = None
-            spread = ""
-            if odds_list:
-                o = odds_list[0]
-                ou_raw = o.get("overUnder")
-                if ou_raw:
-                    try:
-                        over_under = float(ou_raw)
-                    except (ValueError, TypeError):
-                        pass
-                spread = o.get("spread", "")
-            home_record = home.get("records", [{}])[0].get("summary", "") if home.get("records") else ""
-            away_record = away.get("records", [{}])[0].get("summary", "") if away.get("records") else ""
-            home_rank = home.get("curatedRank", {}).get("current", 99)
-            away_rank = away.get("curatedRank", {}).get("current", 99)
-            bcasts = comp.get("broadcasts", [])
-            broadcast = ""
-            if bcasts:
-                names = []
-                for b in bcasts:
-                    for n in b.get("names", []):
-                        names.append(n)
-                broadcast = ", ".join(names)
-            game = {
-                "id": str(event.get("id", "")),
-                "name": event.get("name", ""),
-                "shortName": event.get("shortName", ""),
-                "state": state, "period": period, "clock": clock,
-                "home_team": ht.get("displayName", ""),
-                "home_abbr": ht.get("abbreviation", ""),
-                "home_score": int(home.get("score", 0) or 0),
-                "home_color": "#" + str(ht.get("color", "555555")),
-                "home_record": home_record, "home_rank": home_rank,
-                "home_id": str(ht.get("id", "")),
-                "away_team": at.get("displayName", ""),
-                "away_abbr": at.get("abbreviation", ""),
-                "away_score": int(away.get("score", 0) or 0),
-                "away_color": "#" + str(at.get("color", "555555")),
-                "away_record": away_record, "away_rank": away_rank,
-                "away_id": str(at.get("id", "")),
-                "over_under": over_under, "spread": spread,
-                "broadcast": broadcast,
-                "venue": comp.get("venue", {}).get("fullName", ""),
-                "minutes_elapsed": 0.0,
-            }
-            if state == "in":
-                game["minutes_elapsed"] = calc_minutes_elapsed(period, clock)
-            games.append(game)
-    except Exception as e:
+        games, stale_age = fetch_ncaa_games(deadline)
+    except FetchError as e:
+        snap = warm.load()
+        if snap and snap.get("games"):
+            return snap["games"], warm.age(), None
         st.error("ESPN fetch error: " + str(e))
-    return games
+        return [], None, None
+    return games, stale_age, None
 
 
-def fetch_plays(game_id):
-    plays = []
-    try:
-        url = "https://site.api.espn.com/apis/site/v2/sports/basketball/mens-college-basketball/summary?event=" + str(game_id)
-        r = requests.get(url, timeout=10)
-        if r.status_code == 200:
-            data = r.json()
-            for item in data.get("plays", []):
-                plays.append({
-                    "text": item.get("text", ""),
-                    "period": item.get("period", {}).get("number", 0),
-                    "clock": item.get("clock", {}).get("displayValue", ""),
-                    "score": item.get("scoreValue", 0),
-                    "team_id": str(item.get("team", {}).get("id", "")),
-                    "type": item.get("type", {}).get("text", ""),
-                })
-    except Exception:
-        pass
-    return plays
+@st.cache_resource
+def get_poller():
+    return Poller(NCAA).ensure()
+
+
+@st.cache_resource
+def get_shared_snapshot():
+    return SharedSnapshot("ncaa")
+
+@st.cache_resource
+def get_line_reader():
+    return LineHistory("ncaa", readonly=True)
+
+
+def load_tick(warm, deadline):
+    # Returns (tick, refresh). Uses the poller's published tick when it is
+    # current; otherwise fetches in-process and derives the same tick shape.
+    tick = get_shared_snapshot().read()
+    if tick and time.time() - tick.get("ts", 0) <= STALE_AFTER:
+        return tick, None
+    games, stale_age, refresh = load_games(warm, deadline)
+    # Lines come from the poller's log read-only: only the process holding
+    # the poller lock records them.
+    return build_tick(NCAA, games, stale_age, get_line_reader()), refresh
+
+
+# ══════════════════════════════════════════════════════════════════════
+# REPLAY — scrub back through a recorded game day
+# ══════════════════════════════════════════════════════════════════════
+
+def replay_session():
+    return st.session_state.get("replay")
+
+
+def et_naive(ts):
+    return datetime.fromtimestamp(ts, ET).replace(tzinfo=None)
+
+
+def start_replay():
+    st.session_state["replay"] = ReplaySource(open_recording(LEAGUE.key, st.session_state["replay_day"]),
+                                              st.session_state["replay_speed"])
+
+
+def stop_replay():
+    st.session_state.pop("replay", None)
+
+
+def toggle_replay():
+    replay = replay_session()
+    if replay.playing:
+        replay.pause()
+    else:
+        replay.play()
+
+
+def replay_speed_changed():
+    replay = replay_session()
+    if replay is not None:
+        replay.set_speed(st.session_state["replay_speed"])
+
+
+def replay_seek_changed():
+    replay_session().seek(st.session_state["replay_seek"].replace(tzinfo=ET).timestamp())
+
+
+def render_replay_controls():
+    replay = replay_session()
+    with st.expander("Replay", expanded=replay is not None):
+        days = recorded_days(LEAGUE.key)
+        if not days:
+            st.caption("Nothing recorded yet — the poller records every tick it publishes.")
+            return
+        rc1, rc2, rc3, rc4 = st.columns(4)
+        rc1.selectbox("Day", days, key="replay_day")
+        rc2.select_slider("Speed", options=list(SPEEDS), value=10, key="replay_speed",
+                          format_func=lambda s: str(s) + "x", on_change=replay_speed_changed)
+        if replay is not None:
+            rc4.button("Back to live", key="replay_stop", on_click=stop_replay)
+        if replay is None or str(replay.recording.day) != st.session_state["replay_day"]:
+            rc3.button("Replay this day", key="replay_start", on_click=start_replay)
+            return
+        rc3.button("Pause" if replay.playing else "Play", key="replay_toggle", on_click=toggle_replay)
+        rec = replay.recording
+        if rec.ts and rec.end() > rec.start():
+            st.session_state["replay_seek"] = et_naive(replay.position())
+            st.slider("Time (ET)", min_value=et_naive(rec.start()), max_value=et_naive(rec.end()),
+                      step=timedelta(seconds=15), format="h:mm:ss a", key="replay_seek",
+                      on_change=replay_seek_changed)
+
+
+# ══════════════════════════════════════════════════════════════════════
+# WATCHLIST & ALERTS — saved per user, matched by the poller every tick
+# ══════════════════════════════════════════════════════════════════════
+
+ALERT_SHOW_SECONDS = 600
+
+@st.cache_resource
+def get_watch_store():
+    return WatchStore()
+
+
+def render_watch_panel(store, games, tick):
+    user = st.session_state.get("watch_user") or st.query_params.get("user", "owner")
+    alerts = tick.get("alerts", {}).get(user, [])
+    fresh = [a for a in reversed(alerts) if tick["ts"] - a["ts"] <= ALERT_SHOW_SECONDS]
+    for a in fresh[:3]:
+        st.error("🔔 " + alert_text(a))
+    if len(fresh) > 3:
+        st.caption("+" + str(len(fresh) - 3) + " more in Watchlist & Alerts")
+    with st.expander("Watchlist & Alerts", expanded=False):
+        user = st.text_input("User", value=user, key="watch_user")
+        prefs = store.user(user)
+        labels = {g["id"]: str(g["away_abbr"]) + " @ " + str(g["home_abbr"]) for g in games if g["state"] != "post"}
+        saved = prefs["watchlist"].get(LEAGUE.key, [])
+        on_board = [gid for gid in saved if gid in labels]
+        picked = st.multiselect("Watchlist", list(labels), default=on_board, format_func=labels.get,
+                                key="watch_games_" + user)
+        if sorted(picked) != sorted(on_board):
+            store.set_watchlist(user, LEAGUE.key, [gid for gid in saved if gid not in labels] + picked)
+        with st.form("watch_rule_form"):
+            wc1, wc2, wc3 = st.columns(3)
+            scope = wc1.selectbox("Games", ["watchlist", "any"] + list(labels),
+                                  format_func=lambda s: {"watchlist": "My watchlist", "any": "Any game"}.get(s, labels.get(s, s)))
+            side = wc2.selectbox("Side", ["BOTH", "OVER", "UNDER"])
+            tier = wc3.selectbox("At least", ["TIGHT", "SAFE", "FORTRESS"], index=2)
+            lo, hi = LEAGUE.thresholds[0] - 20, LEAGUE.thresholds[-1] + 20
+            band = st.slider("Threshold band", lo, hi, (lo, hi), step=0.5)
+            wc4, wc5 = st.columns(2)
+            max_left = wc4.number_input("Max minutes remaining (0 = any)", 0.0, float(LEAGUE.game_minutes),
+                                        float(LEAGUE.shark_minutes), step=1.0)
+            shark_only = wc5.checkbox("SHARK window only")
+            if st.form_submit_button("Add alert rule"):
+                store.add_rule(user, new_rule(LEAGUE.key, scope, side, band[0], band[1], tier,
+                                              max_left or None, shark_only, labels.get(scope, "")))
+                st.rerun()
+        for rule in [r for r in prefs["rules"] if r.get("league") == LEAGUE.key]:
+            rc1, rc2 = st.columns([5, 1])
+            rc1.caption(rule_text(rule))
+            if rc2.button("Delete", key="watch_del_" + rule["id"]):
+                store.remove_rule(user, rule["id"])
+                st.rerun()
+        if alerts:
+            st.markdown("**Recent alerts**")
+            for a in reversed(alerts):
+                st.caption(datetime.fromtimestamp(a["ts"], ET).strftime("%I:%M %p") + " — " + alert_text(a))
+
+
+def play_cursor(plays, poss_name, poss_side):
+    return {
+        "last_id": plays[-1].get("id", "") if plays else "",
+        "count": len(plays),
+        "plays": plays[-8:],
+        "poss": [poss_name, poss_side],
+    }
 
 
 # ══════════════════════════════════════════════════════════════════════
 # POSSESSION INFERENCE + COURT + PLAY ICONS
 # ══════════════════════════════════════════════════════════════════════
 
+FRONTEND_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "frontend")
+
+def situation_plays(g):
+    if not g.get("last_play"):
+        return []
+    return [dict(g["last_play"], period=g["period"], clock=g["clock"])]
+
+
+def needs_summary(g, d):
+    # Full summary only when the scoreboard has no situation or the play list
+    # is open. SHARK-window summaries come from the poller with the tick.
+    if st.session_state.get("full_plays_" + str(g["id"])):
+        return True
+    return not (g.get("poss_id") or g.get("last_play"))
+
+
 def infer_possession(plays, home_abbr, away_abbr, home_name, away_name, home_id="", away_id=""):
     if not plays:
         return None, None
@@ -273,26 +361,17 @@ def infer_possession(plays, home_abbr, away_abbr, home_name, away_name, home_id=
     return None, None
 
 
-def render_court(home_abbr, away_abbr, score_home=0, score_away=0, poss_name=None, poss_side=None):
-    ball_x = 375 if poss_side == "home" else 125 if poss_side == "away" else -100
-    ball_vis = "visible" if poss_side in ("home", "away") else "hidden"
-    svg = (
-        "<svg viewBox='0 0 500 280' style='width:100%;max-width:500px;background:#1a1a2e;border-radius:8px'>"
-        "<rect x='25' y='15' width='450' height='230' fill='none' stroke='#444' stroke-width='2' rx='5'/>"
-        "<line x1='250' y1='15' x2='250' y2='245' stroke='#444' stroke-width='1.5'/>"
-        "<circle cx='250' cy='130' r='35' fill='none' stroke='#444' stroke-width='1.5'/>"
-        "<rect x='25' y='70' width='80' height='120' fill='none' stroke='#444' stroke-width='1'/>"
-        "<rect x='395' y='70' width='80' height='120' fill='none' stroke='#444' stroke-width='1'/>"
-        "<text x='125' y='135' text-anchor='middle' fill='#aaa' font-size='16' font-weight='700'>" + str(away_abbr) + "</text>"
-        "<text x='375' y='135' text-anchor='middle' fill='#aaa' font-size='16' font-weight='700'>" + str(home_abbr) + "</text>"
-        "<text x='125' y='155' text-anchor='middle' fill='white' font-size='20' font-weight='700'>" + str(score_away) + "</text>"
-        "<text x='375' y='155' text-anchor='middle' fill='white' font-size='20' font-weight='700'>" + str(score_home) + "</text>"
-        "<text x='" + str(ball_x) + "' y='270' text-anchor='middle' fill='#f1c40f' font-size='13' font-weight='700' visibility='" + ball_vis + "'>BALL</text>"
-        "</svg>"
-    )
-    st.markdown(svg, unsafe_allow_html=True)
-    if poss_name:
-        st.markdown("<div style='text-align:center;padding:2px;color:#f1c40f;font-size:13px;font-weight:700'>" + str(poss_name) + " BALL</div>", unsafe_allow_html=True)
+_court_grid = components.declare_component("shark_court_grid", path=os.path.join(FRONTEND_DIR, "courtgrid"))
+
+
+def court_row(g, poss_side=None, plays=None):
+    last_play = plays[-1].get("text", "") if plays else ""
+    return [g["id"], g["away_abbr"], g["home_abbr"], g["away_score"], g["home_score"],
+            poss_side or "", last_play[:80]]
+
+
+def render_court_grid(rows):
+    _court_grid(games=rows, key="shark_court_grid", default=None)
 
 
 def get_play_icon(text):
@@ -308,10 +387,32 @@ def get_play_icon(text):
     return ">"
 
 
-def speak_play(text):
-    clean_text = text.replace("'", "").replace('"', '').replace('\n', ' ')[:100]
-    js = '<script>if(!window.lastSpoken||window.lastSpoken!=="' + clean_text + '"){window.lastSpoken="' + clean_text + '";var u=new SpeechSynthesisUtterance("' + clean_text + '");u.rate=1.1;window.speechSynthesis.speak(u);}</script>'
-    components.html(js, height=0)
+# ── Play announcer (one persistent component per page) ──────────────
+
+_announcer = components.declare_component("shark_announcer", path=os.path.join(FRONTEND_DIR, "announcer"))
+ANNOUNCE_MODES = {"Speak": "speak", "Flash": "flash", "Speak + Flash": "speak+flash"}
+ANNOUNCE_MEMORY = 300
+
+
+def play_event_id(game_id, p):
+    if p.get("id"):
+        return str(game_id) + ":" + str(p["id"])
+    raw = str(p.get("period", 0)) + "|" + str(p.get("clock", "")) + "|" + str(p.get("text", ""))
+    return str(game_id) + ":" + hashlib.md5(raw.encode()).hexdigest()[:10]
+
+
+def queue_announcement(queue, event_id, text):
+    sent = st.session_state.setdefault("announced_ids", [])
+    if event_id in sent:
+        return
+    sent.append(event_id)
+    del sent[:-ANNOUNCE_MEMORY]
+    clean_text = text.replace("\n", " ")[:100]
+    queue.append({"id": event_id, "text": clean_text})
+
+
+def render_announcer(queue, mode):
+    _announcer(events=queue, mode=mode, key="shark_announcer", default=None)
 
 
 # ══════════════════════════════════════════════════════════════════════
@@ -353,9 +454,37 @@ def render_scoreboard(g):
 # ══════════════════════════════════════════════════════════════════════
 
 st.markdown("## 🦈 NCAA SHARK SCANNER")
-st.caption("v" + VERSION + " | " + datetime.now(timezone.utc).strftime("%A %b %d, %Y | %H:%M UTC") + " | NCAA Men's Basketball | Lead 7+ filter")
-
-all_games = fetch_ncaa_games()
+st.caption("v" + VERSION + " | " + datetime.now(ET).strftime("%A %b %d, %Y | %I:%M %p ET") + " | NCAA Men's Basketball | Lead 7+ filter")
+render_replay_controls()
+announce_slot = st.empty()
+announce_queue = []
+
+get_poller()
+warm = get_warm_start()
+fetch_deadline = ESPN.deadline()
+replay = replay_session()
+if replay is not None:
+    try:
+        tick, warm_refresh = replay.tick(), None
+    except FetchError as e:
+        st.warning("Replay: " + str(e) + " — back to live")
+        stop_replay()
+        replay = None
+if replay is None:
+    tick, warm_refresh = load_tick(warm, fetch_deadline)
+all_games, stale_age = tick["games"], tick["stale_age"]
+derived = tick["derived"]
+line_moves = tick.get("lines", {})
+scanner_rows = {}
+for row in tick["scanner"]:
+    scanner_rows.setdefault(row["game_id"], []).append(row)
+play_cursors = {}
+if replay is not None:
+    st.info("⏪ " + replay.describe() + " — " + et_naive(replay.position()).strftime("%I:%M:%S %p ET"))
+elif warm_refresh is not None:
+    st.warning("Warm start: showing snapshot from " + "{:.0f}".format(stale_age / 60) + " min ago — refreshing from ESPN...")
+elif stale_age is not None:
+    st.warning(ESPN.describe() + " — showing last good scoreboard from " + "{:.0f}".format(stale_age) + "s ago")
 live_games = [g for g in all_games if g["state"] == "in"]
 
 shark_games = []
@@ -374,6 +503,13 @@ if not shark_games:
     st.info("No live games with 7+ point lead right now. Waiting for games to separate...")
 
 
+# ══════════════════════════════════════════════════════════════════════
+# WATCHLIST & ALERTS
+# ══════════════════════════════════════════════════════════════════════
+
+render_watch_panel(get_watch_store(), all_games, tick)
+
+
 # ══════════════════════════════════════════════════════════════════════
 # CUSHION SCANNER — TOTALS
 # ══════════════════════════════════════════════════════════════════════
@@ -393,62 +529,29 @@ if shark_games:
         label = str(g["away_abbr"]) + " @ " + str(g["home_abbr"])
         if cs_sel != "ALL GAMES" and cs_sel != label:
             continue
-        mins = g.get("minutes_elapsed", 0)
-        if mins < cs_min:
+        d = derived[g["id"]]
+        if d["mins"] < cs_min:
             continue
-        total = g["home_score"] + g["away_score"]
-        total_game_mins = calc_total_game_minutes(g["period"])
-        remaining = total_game_mins - mins
-        pace = total / max(mins, 0.5)
-        is_shark = remaining <= SHARK_MINUTES
-        lead = abs(g["home_score"] - g["away_score"])
-        leader = g["home_abbr"] if g["home_score"] > g["away_score"] else g["away_abbr"]
-
-        for thresh in THRESHOLDS:
-            needed_over = thresh - total
-            if cs_side in ["Both", "Over"] and needed_over > 0 and remaining > 0:
-                rate_needed = needed_over / remaining
-                cushion = pace - rate_needed
-                if cushion > 1.0:
-                    safety = "FORTRESS"
-                elif cushion > 0.4:
-                    safety = "SAFE"
-                elif cushion > 0.0:
-                    safety = "TIGHT"
-                else:
-                    safety = "RISKY"
-                if is_shark:
-                    safety += " SHARK"
+        lead_txt = " | Lead: " + d["leader"] + " +" + str(d["lead"])
+
+        for row in scanner_rows.get(g["id"], []):
+            safety = row["tier"] + (" SHARK" if row["shark"] else "")
+            if row["side"] == "OVER" and cs_side in ["Both", "Over"]:
                 found_any = True
                 st.markdown(
-                    "**" + label + "** OVER " + str(thresh) +
-                    " — Need " + "{:.0f}".format(needed_over) +
-                    " in " + "{:.0f}".format(remaining) + "min (" +
-                    "{:.2f}".format(rate_needed) + "/min) | Pace " +
-                    "{:.2f}".format(pace) + "/min | Lead: " +
-                    leader + " +" + str(lead) + " | **" + safety + "**")
-
-            if cs_side in ["Both", "Under"] and remaining > 0:
-                projected_final = total + (remaining * pace)
-                under_cushion = thresh - projected_final
-                if projected_final < thresh:
-                    if under_cushion > 10:
-                        u_safety = "FORTRESS"
-                    elif under_cushion > 4:
-                        u_safety = "SAFE"
-                    elif under_cushion > 0:
-                        u_safety = "TIGHT"
-                    else:
-                        u_safety = "RISKY"
-                    if is_shark:
-                        u_safety += " SHARK"
-                    found_any = True
-                    st.markdown(
-                        "**" + label + "** UNDER " + str(thresh) +
-                        " — Proj " + "{:.0f}".format(projected_final) +
-                        " vs Line " + str(thresh) + " | Cushion " +
-                        "{:.1f}".format(under_cushion) + " pts | Lead: " +
-                        leader + " +" + str(lead) + " | **" + u_safety + "**")
+                    "**" + label + "** OVER " + str(row["thresh"]) +
+                    " — Need " + "{:.0f}".format(row["needed"]) +
+                    " in " + "{:.0f}".format(d["remaining"]) + "min (" +
+                    "{:.2f}".format(row["rate_needed"]) + "/min) | Pace " +
+                    "{:.2f}".format(d["pace"]) + "/min" + lead_txt + " | **" + safety + "**")
+
+            elif row["side"] == "UNDER" and cs_side in ["Both", "Under"]:
+                found_any = True
+                st.markdown(
+                    "**" + label + "** UNDER " + str(row["thresh"]) +
+                    " — Proj " + "{:.0f}".format(row["projected"]) +
+                    " vs Line " + str(row["thresh"]) + " | Cushion " +
+                    "{:.1f}".format(row["cushion"]) + " pts" + lead_txt + " | **" + safety + "**")
 
     if not found_any:
         st.info("No games match the current filter. Try lowering the minutes elapsed slider.")
@@ -461,24 +564,32 @@ if shark_games:
 
 if shark_games:
     st.markdown("### PACE SCANNER")
-    st.caption("Only games with 7+ point lead | Click game to see court + plays")
+    st.caption("Only games with 7+ point lead | All courts in one grid | Click game to see plays")
+    st.selectbox("Announce mode", list(ANNOUNCE_MODES), key="announce_mode")
+    court_slot = st.empty()
+    court_rows = []
 
+    poll_candidates = []
     for g in shark_games:
-        mins = g.get("minutes_elapsed", 0)
-        if mins < 2:
+        d = derived[g["id"]]
+        if d["mins"] >= 2 and needs_summary(g, d):
+            poll_candidates.append((g["id"], d["remaining"], d["total"], d["pace"]))
+    if replay_session() is not None:
+        # Recorded plays are a local read: no budget, and the live
+        # scheduler's intervals stay untouched.
+        poll_ids = set(c[0] for c in poll_candidates)
+    else:
+        poll_ids = set(get_play_scheduler().plan(poll_candidates))
+
+    for g in shark_games:
+        d = derived[g["id"]]
+        if d["mins"] < 2:
             continue
-        total = g["home_score"] + g["away_score"]
-        total_game_mins = calc_total_game_minutes(g["period"])
-        remaining = total_game_mins - mins
-        pace = total / max(mins, 0.5)
-        proj = calc_projection(g["home_score"], g["away_score"], mins, total_game_mins)
+        pace, proj, remaining, pct = d["pace"], d["proj"], d["remaining"], d["pct"]
         plabel = get_pace_label(pace)
-        period = g.get("period", 0)
-        hl = "H" + str(period) if period <= 2 else "OT" + str(period - 2)
-        pct = mins / total_game_mins * 100
-        shark = " SHARK" if remaining <= SHARK_MINUTES else ""
-        lead = abs(g["home_score"] - g["away_score"])
-        leader = g["home_abbr"] if g["home_score"] > g["away_score"] else g["away_abbr"]
+        hl = NCAA.period_label(g.get("period", 0))
+        shark = " SHARK" if d["is_shark"] else ""
+        lead, leader = d["lead"], d["leader"]
 
         # ── Header line + progress bar ────────────────────────────
         col1, col2, col3 = st.columns([2, 1, 1])
@@ -500,32 +611,62 @@ if shark_games:
                     st.markdown(
                         "→ Proj " + str(proj) + " vs Line " +
                         str(g["over_under"]) + ": **" + arrow +
-                        " (" + "{:+.1f}".format(diff) + ")**")
+                        " (" + "{:+.1f}".format(diff) + ")**" + line_move_text(line_moves, g["id"]))
             except (ValueError, TypeError):
                 pass
 
         kalshi_link = get_kalshi_ncaa_link(g["away_abbr"], g["home_abbr"])
         st.markdown("[Trade on Kalshi](" + kalshi_link + ")")
 
-        # ── EXPANDER: Court + Plays ───────────────────────────────
-        exp_label = "🏀 " + g["away_abbr"] + " @ " + g["home_abbr"] + " — Court + Plays"
+        # ── EXPANDER: Plays ──────────────────────────────────────
+        exp_label = "🏀 " + g["away_abbr"] + " @ " + g["home_abbr"] + " — Plays"
         with st.expander(exp_label, expanded=False):
             render_scoreboard(g)
 
-            plays = fetch_plays(g["id"])
-            poss_name, poss_side = infer_possession(
-                plays, g["home_abbr"], g["away_abbr"],
-                g["home_team"], g["away_team"],
-                g.get("home_id", ""), g.get("away_id", ""))
+            st.checkbox("Full play-by-play", key="full_plays_" + str(g["id"]))
+            cached = warm.cursor(g["id"]) if warm_refresh is not None else None
+            if cached:
+                plays = cached.get("plays", [])
+                poss_name, poss_side = cached.get("poss", [None, None])
+            elif not needs_summary(g, d):
+                plays = situation_plays(g)
+                poss_name, poss_side = situation_possession(g)
+                play_cursors[g["id"]] = play_cursor(plays, poss_name, poss_side)
+            else:
+                if g["id"] in poll_ids:
+                    try:
+                        plays, plays_age = fetch_plays(g["id"], fetch_deadline)
+                        if plays_age is not None:
+                            st.caption("Plays from " + "{:.0f}".format(plays_age) + "s ago — " + data_source().describe())
+                    except FetchError as e:
+                        plays = []
+                        st.caption("Play-by-play unavailable: " + str(e))
+                else:
+                    plays, plays_age = cached_plays(g["id"])
+                    if plays is None:
+                        plays = []
+                        st.caption("Play-by-play queued — more urgent games poll first")
+                    else:
+                        st.caption("Plays as of " + "{:.0f}".format(plays_age) + "s ago")
+                if not plays:
+                    plays = situation_plays(g)
+                poss_name, poss_side = situation_possession(g)
+                if poss_side is None:
+                    poss_name, poss_side = infer_possession(
+                        plays, g["home_abbr"], g["away_abbr"],
+                        g["home_team"], g["away_team"],
+                        g.get("home_id", ""), g.get("away_id", ""))
+                play_cursors[g["id"]] = play_cursor(plays, poss_name, poss_side)
 
             lc, rc = st.columns(2)
             with lc:
-                render_court(g["home_abbr"], g["away_abbr"],
-                    score_home=g["home_score"], score_away=g["away_score"],
-                    poss_name=poss_name, poss_side=poss_side)
-            with rc:
                 st.markdown("**Pace:** " + "{:.2f}".format(pace) + " pts/min " + plabel)
                 st.markdown("**Projected Total:** " + str(proj))
+                if d.get("late_ppm"):
+                    st.markdown("**Late fouling:** +" + "{:.1f}".format(d["late_ppm"]) + " pts/min in projection")
+                if poss_name:
+                    st.markdown("**Possession:** <span style='color:#f1c40f;font-weight:700'>" + str(poss_name) + " BALL</span>", unsafe_allow_html=True)
+            with rc:
                 st.markdown("**Remaining:** " + "{:.1f}".format(remaining) + " min" + (" **SHARK MODE**" if shark else ""))
                 st.markdown("**Lead:** " + leader + " +" + str(lead))
 
@@ -540,14 +681,25 @@ if shark_games:
                         str(p.get("clock", "")) + " " + icon + " " +
                         str(p.get("text", "")) + "</span>", unsafe_allow_html=True)
                     if idx_p == len(plays[-8:]) - 1 and tts_on and p.get("text"):
-                        speak_play(hp + " " + p.get("clock", "") + ". " + p.get("text", ""))
+                        queue_announcement(announce_queue, play_event_id(g["id"], p),
+                            hp + " " + p.get("clock", "") + ". " + p.get("text", ""))
             else:
                 st.info("No play-by-play data available yet.")
 
+        court_rows.append(court_row(g, poss_side, plays))
         st.markdown("---")
+    with court_slot:
+        render_court_grid(court_rows)
     st.divider()
 
 
+with announce_slot:
+    render_announcer(announce_queue, ANNOUNCE_MODES[st.session_state.get("announce_mode", "Speak")])
+
+if replay is None and warm_refresh is None and stale_age is None:
+    warm.record(all_games, cursors=play_cursors, derived=derived)
+
+
 # ══════════════════════════════════════════════════════════════════════
 # HOW TO USE
 # ══════════════════════════════════════════════════════════════════════
@@ -558,7 +710,7 @@ with st.expander("How to Use", expanded=False):
 
 1. Slider defaults to **40 min** — only shows games near the end
 2. **Only games with 7+ point lead** appear — close games are hidden
-3. Click any game expander to see the **court, possession, and play-by-play**
+3. Watch the **court grid** for score and possession, click any game expander for **play-by-play** — tick **Announce plays** to have new plays spoken or flashed
 4. Look for **FORTRESS SHARK** and **SAFE SHARK** ratings
 5. Click **Trade on Kalshi** to go straight to the order book
 
@@ -587,6 +739,33 @@ with st.expander("How to Use", expanded=False):
     """)
 
 
+# ══════════════════════════════════════════════════════════════════════
+# OWNER TOOLS — on-demand sampling profiler
+# ══════════════════════════════════════════════════════════════════════
+
+with st.expander("Profiler", expanded=False):
+    prof = sharkprof.current()
+    if prof is not None and prof.active():
+        st.info("Capturing " + prof.mode + ": " + str(prof.done_count) + "/" + str(prof.count) +
+                " done, " + str(prof.total) + " samples so far")
+    else:
+        pc1, pc2, pc3 = st.columns(3)
+        prof_mode = pc1.selectbox("Capture", ["Next reruns", "Poller ticks"], key="prof_mode")
+        prof_n = pc2.number_input("Count", min_value=1, max_value=50, value=5, key="prof_n")
+        if pc3.button("Start capture", key="prof_start"):
+            poller = get_poller()
+            if prof_mode == "Poller ticks" and not poller.is_leader:
+                st.warning("This process is standby — the poller runs in pid " + str(tick.get("poller_pid", "?")))
+            else:
+                sharkprof.start_capture("ncaa", "poller" if prof_mode == "Poller ticks" else "reruns",
+                                        int(prof_n), poller if prof_mode == "Poller ticks" else None)
+                st.rerun()
+    if prof is not None and not prof.active():
+        if prof.paths:
+            st.caption("Last capture: " + prof.paths[0] + " (folded stacks) | " + prof.paths[1])
+        st.code(prof.summary)
+
+
 # ══════════════════════════════════════════════════════════════════════
 # FOOTER
 # ══════════════════════════════════════════════════════════════════════
@@ -599,3 +778,5 @@ st.markdown(
     "Only wager what you can afford to lose.<br><br>"
     "<a href='https://bigsnapshot.com' style='color:#888'>bigsnapshot.com</a>"
     "</div>", unsafe_allow_html=True)
+
+sharkprof.rerun_end()
@@ -6,10 +6,18 @@ Run: streamlit run shark.py
 import streamlit as st
 st.set_page_config(page_title="BigSnapshot NBA Cushion Scanner", page_icon="🏀", layout="wide")
 
-import requests, json, time, hashlib, datetime as dt
+import json, time, hashlib, datetime as dt
 from datetime import datetime, timedelta, timezone
 from zoneinfo import ZoneInfo
 from streamlit_autorefresh import st_autorefresh
+from sharkstate import WarmStart, SharedSnapshot
+from sharkfetch import ESPN, FetchError
+from sharkcore import NBA, build_tick, fetch_games, line_move_text, situation_possession
+from sharkpoller import Poller, STALE_AFTER
+from sharklines import LineHistory
+import sharkprof
+from sharkreplay import SPEEDS, ReplaySource, open_recording, recorded_days
+from sharkwatch import WatchStore, alert_text, new_rule, rule_text
 
 # ══════════════════════════════════════════════════════════════════════
 # TIMEZONE — Always use Eastern for NBA game dates
@@ -44,20 +52,16 @@ def check_auth():
 
 check_auth()
 
-st_autorefresh(interval=30_000, limit=10000, key="nba_refresh")
+st_autorefresh(interval=2_000 if getattr(st.session_state.get("replay"), "playing", False) else 30_000,
+               limit=10000, key="nba_refresh")
+sharkprof.rerun_begin()
 
 # ══════════════════════════════════════════════════════════════════════
 # CONFIG
 # ══════════════════════════════════════════════════════════════════════
 
 VERSION = "1.1"
-GAME_MINUTES = 48
-QUARTER_MINUTES = 12
-OT_MINUTES = 5
-LEAGUE_AVG_TOTAL = 224
-THRESHOLDS = [190.5, 195.5, 200.5, 205.5, 210.5, 215.5, 220.5,
-              225.5, 230.5, 235.5, 240.5, 245.5, 250.5]
-SHARK_MINUTES = 6.0
+LEAGUE = NBA     # clock, projection, thresholds and SHARK window live in sharkcore
 
 if "session_id" not in st.session_state:
     st.session_state["session_id"] = hashlib.md5(str(time.time()).encode()).hexdigest()[:12]
@@ -78,57 +82,9 @@ def get_team_color(abbr):
 
 
 # ══════════════════════════════════════════════════════════════════════
-# TIME / PACE CALCULATIONS
+# PACE LABELS
 # ══════════════════════════════════════════════════════════════════════
 
-def calc_minutes_elapsed(period, clock_str):
-    try:
-        if not clock_str or clock_str == "0:00":
-            if period <= 4:
-                return min(period * QUARTER_MINUTES, GAME_MINUTES)
-            else:
-                return GAME_MINUTES + (period - 4) * OT_MINUTES
-        parts = clock_str.replace(" ", "").split(":")
-        if len(parts) == 2:
-            mins_left = int(parts[0])
-            secs_left = int(parts[1])
-        elif len(parts) == 1:
-            mins_left = 0
-            secs_left = int(parts[0])
-        else:
-            mins_left, secs_left = 0, 0
-        time_left_in_period = mins_left + secs_left / 60.0
-        if period <= 4:
-            elapsed_before = (period - 1) * QUARTER_MINUTES
-            elapsed_in_period = QUARTER_MINUTES - time_left_in_period
-        else:
-            elapsed_before = GAME_MINUTES + (period - 5) * OT_MINUTES
-            elapsed_in_period = OT_MINUTES - time_left_in_period
-        return max(0, elapsed_before + elapsed_in_period)
-    except Exception:
-        return 0.0
-
-def calc_total_game_minutes(period):
-    if period <= 4:
-        return GAME_MINUTES
-    return GAME_MINUTES + (period - 4) * OT_MINUTES
-
-def calc_projection(home_score, away_score, minutes_elapsed, total_game_mins):
-    total = home_score + away_score
-    if minutes_elapsed <= 0:
-        return LEAGUE_AVG_TOTAL
-    cur_pace = total / minutes_elapsed
-    lg_pace = LEAGUE_AVG_TOTAL / GAME_MINUTES
-    pct = minutes_elapsed / total_game_mins
-    if pct < 0.15:
-        blend = 0.3
-    elif pct < 0.5:
-        blend = 0.5 + (pct - 0.15) * 1.0
-    else:
-        blend = 0.85 + (pct - 0.5) * 0.3
-    blend = min(blend, 0.98)
-    return round(((cur_pace * blend) + (lg_pace * (1 - blend))) * total_game_mins, 1)
-
 def get_pace_label(ppm):
     if ppm >= 5.2: return "VERY HIGH"
     if ppm >= 4.8: return "HIGH"
@@ -160,86 +116,182 @@ def get_kalshi_nba_link(away_abbr, home_abbr):
 # ESPN NBA SCOREBOARD FETCH — USES EASTERN TIME FOR DATE
 # ══════════════════════════════════════════════════════════════════════
 
-def fetch_nba_games():
-    games = []
-    today = now_et().strftime("%Y%m%d")
-    url = ("https://site.api.espn.com/apis/site/v2/sports/basketball/nba/scoreboard"
-           "?dates=" + today + "&limit=50")
+def fetch_nba_games(deadline=None):
+    return fetch_games(NBA, deadline)
+
+
+# ══════════════════════════════════════════════════════════════════════
+# WARM START — paint last snapshot after a restart, refresh behind it
+# ══════════════════════════════════════════════════════════════════════
+
+@st.cache_resource
+def get_warm_start():
+    return WarmStart("nba")
+
+def load_games(warm, deadline):
+    # Returns (games, stale_age, refresh). stale_age is seconds since the data
+    # shown was fresh (None when live); refresh is the warm-start thread, if any.
+    if not warm.live and (warm.load() or {}).get("games"):
+        refresh = warm.refresh_async(lambda: fetch_nba_games(ESPN.deadline(15))[0])
+        return warm.load()["games"], warm.age(), refresh
     try:
-        r = requests.get(url, timeout=10)
-        if r.status_code != 200:
-            return games
-        data = r.json()
-        for event in data.get("events", []):
-            comp = event.get("competitions", [{}])[0]
-            competitors = comp.get("competitors", [])
-            if len(competitors) < 2:
-                continue
-            home = away = None
-            for c in competitors:
-                if c.get("homeAway") == "home":
-                    home = c
-                elif c.get("homeAway") == "away":
-                    away = c
-            if not home or not away:
-                continue
-            ht = home.get("team", {})
-            at = away.get("team", {})
-            status = event.get("status", {})
-            state = status.get("type", {}).get("state", "pre")
-            period = status.get("period", 0)
-            clock = status.get("displayClock", "")
-            odds_list = comp.get("odds", [])
-            over_under = None
-            spread = ""
-            if odds_list:
-                o = odds_list[0]
-                ou_raw = o.get("overUnder")
-                if ou_raw:
-                    try:
-                        over_under = float(ou_raw)
-                    except (ValueError, TypeError):
-                        pass
-                spread = o.get("spread", "")
-            home_record = home.get("records", [{}])[0].get("summary", "") if home.get("records") else ""
-            away_record = away.get("records", [{}])[0].get("summary", "") if away.get("records") else ""
-            bcasts = comp.get("broadcasts", [])
-            broadcast = ""
-            if bcasts:
-                names = []
-                for b in bcasts:
-                    for n in b.get("names", []):
-                        names.append(n)
-                broadcast = ", ".join(names)
-            game = {
-                "id": str(event.get("id", "")),
-                "name": event.get("name", ""),
-                "shortName": event.get("shortName", ""),
-                "state": state,
-                "period": period,
-                "clock": clock,
-                "home_team": ht.get("displayName", ""),
-                "home_abbr": ht.get("abbreviation", ""),
-                "home_score": int(home.get("score", 0) or 0),
-                "home_color": "#" + str(ht.get("color", "555555")),
-                "home_record": home_record,
-                "away_team": at.get("displayName", ""),
-                "away_abbr": at.get("abbreviation", ""),
-                "away_score": int(away.get("score", 0) or 0),
-                "away_color": "#" + str(at.get("color", "555555")),
-                "away_record": away_record,
-                "over_under": over_under,
-                "spread": spread,
-                "broadcast": broadcast,
-                "venue": comp.get("venue", {}).get("fullName", ""),
-                "minutes_elapsed": 0.0,
-            }
-            if state == "in":
-                game["minutes_elapsed"] = calc_minutes_elapsed(period, clock)
-            games.append(game)
-    except Exception as e:
+        games, stale_age = fetch_nba_games(deadline)
+    except FetchError as e:
+        snap = warm.load()
+        if snap and snap.get("games"):
+            return snap["games"], warm.age(), None
         st.error("ESPN fetch error: " + str(e))
-    return games
+        return [], None, None
+    return games, stale_age, None
+
+
+# ══════════════════════════════════════════════════════════════════════
+# SHARED SNAPSHOT — one poller per box, every worker maps its ticks
+# ══════════════════════════════════════════════════════════════════════
+
+@st.cache_resource
+def get_poller():
+    return Poller(NBA).ensure()
+
+@st.cache_resource
+def get_shared_snapshot():
+    return SharedSnapshot("nba")
+
+@st.cache_resource
+def get_line_reader():
+    return LineHistory("nba", readonly=True)
+
+def load_tick(warm, deadline):
+    # Returns (tick, refresh). Uses the poller's published tick when it is
+    # current; otherwise fetches in-process and derives the same tick shape.
+    tick = get_shared_snapshot().read()
+    if tick and time.time() - tick.get("ts", 0) <= STALE_AFTER:
+        return tick, None
+    games, stale_age, refresh = load_games(warm, deadline)
+    # Lines come from the poller's log read-only: only the process holding
+    # the poller lock records them.
+    return build_tick(NBA, games, stale_age, get_line_reader()), refresh
+
+
+# ══════════════════════════════════════════════════════════════════════
+# REPLAY — scrub back through a recorded game day
+# ══════════════════════════════════════════════════════════════════════
+
+def replay_session():
+    return st.session_state.get("replay")
+
+
+def et_naive(ts):
+    return datetime.fromtimestamp(ts, ET).replace(tzinfo=None)
+
+
+def start_replay():
+    st.session_state["replay"] = ReplaySource(open_recording(LEAGUE.key, st.session_state["replay_day"]),
+                                              st.session_state["replay_speed"])
+
+
+def stop_replay():
+    st.session_state.pop("replay", None)
+
+
+def toggle_replay():
+    replay = replay_session()
+    if replay.playing:
+        replay.pause()
+    else:
+        replay.play()
+
+
+def replay_speed_changed():
+    replay = replay_session()
+    if replay is not None:
+        replay.set_speed(st.session_state["replay_speed"])
+
+
+def replay_seek_changed():
+    replay_session().seek(st.session_state["replay_seek"].replace(tzinfo=ET).timestamp())
+
+
+def render_replay_controls():
+    replay = replay_session()
+    with st.expander("Replay", expanded=replay is not None):
+        days = recorded_days(LEAGUE.key)
+        if not days:
+            st.caption("Nothing recorded yet — the poller records every tick it publishes.")
+            return
+        rc1, rc2, rc3, rc4 = st.columns(4)
+        rc1.selectbox("Day", days, key="replay_day")
+        rc2.select_slider("Speed", options=list(SPEEDS), value=10, key="replay_speed",
+                          format_func=lambda s: str(s) + "x", on_change=replay_speed_changed)
+        if replay is not None:
+            rc4.button("Back to live", key="replay_stop", on_click=stop_replay)
+        if replay is None or str(replay.recording.day) != st.session_state["replay_day"]:
+            rc3.button("Replay this day", key="replay_start", on_click=start_replay)
+            return
+        rc3.button("Pause" if replay.playing else "Play", key="replay_toggle", on_click=toggle_replay)
+        rec = replay.recording
+        if rec.ts and rec.end() > rec.start():
+            st.session_state["replay_seek"] = et_naive(replay.position())
+            st.slider("Time (ET)", min_value=et_naive(rec.start()), max_value=et_naive(rec.end()),
+                      step=timedelta(seconds=15), format="h:mm:ss a", key="replay_seek",
+                      on_change=replay_seek_changed)
+
+
+# ══════════════════════════════════════════════════════════════════════
+# WATCHLIST & ALERTS — saved per user, matched by the poller every tick
+# ══════════════════════════════════════════════════════════════════════
+
+ALERT_SHOW_SECONDS = 600
+
+@st.cache_resource
+def get_watch_store():
+    return WatchStore()
+
+
+def render_watch_panel(store, games, tick):
+    user = st.session_state.get("watch_user") or st.query_params.get("user", "owner")
+    alerts = tick.get("alerts", {}).get(user, [])
+    fresh = [a for a in reversed(alerts) if tick["ts"] - a["ts"] <= ALERT_SHOW_SECONDS]
+    for a in fresh[:3]:
+        st.error("🔔 " + alert_text(a))
+    if len(fresh) > 3:
+        st.caption("+" + str(len(fresh) - 3) + " more in Watchlist & Alerts")
+    with st.expander("Watchlist & Alerts", expanded=False):
+        user = st.text_input("User", value=user, key="watch_user")
+        prefs = store.user(user)
+        labels = {g["id"]: str(g["away_abbr"]) + " @ " + str(g["home_abbr"]) for g in games if g["state"] != "post"}
+        saved = prefs["watchlist"].get(LEAGUE.key, [])
+        on_board = [gid for gid in saved if gid in labels]
+        picked = st.multiselect("Watchlist", list(labels), default=on_board, format_func=labels.get,
+                                key="watch_games_" + user)
+        if sorted(picked) != sorted(on_board):
+            store.set_watchlist(user, LEAGUE.key, [gid for gid in saved if gid not in labels] + picked)
+        with st.form("watch_rule_form"):
+            wc1, wc2, wc3 = st.columns(3)
+            scope = wc1.selectbox("Games", ["watchlist", "any"] + list(labels),
+                                  format_func=lambda s: {"watchlist": "My watchlist", "any": "Any game"}.get(s, labels.get(s, s)))
+            side = wc2.selectbox("Side", ["BOTH", "OVER", "UNDER"])
+            tier = wc3.selectbox("At least", ["TIGHT", "SAFE", "FORTRESS"], index=2)
+            lo, hi = LEAGUE.thresholds[0] - 20, LEAGUE.thresholds[-1] + 20
+            band = st.slider("Threshold band", lo, hi, (lo, hi), step=0.5)
+            wc4, wc5 = st.columns(2)
+            max_left = wc4.number_input("Max minutes remaining (0 = any)", 0.0, float(LEAGUE.game_minutes),
+                                        float(LEAGUE.shark_minutes), step=1.0)
+            shark_only = wc5.checkbox("SHARK window only")
+            if st.form_submit_button("Add alert rule"):
+                store.add_rule(user, new_rule(LEAGUE.key, scope, side, band[0], band[1], tier,
+                                              max_left or None, shark_only, labels.get(scope, "")))
+                st.rerun()
+        for rule in [r for r in prefs["rules"] if r.get("league") == LEAGUE.key]:
+            rc1, rc2 = st.columns([5, 1])
+            rc1.caption(rule_text(rule))
+            if rc2.button("Delete", key="watch_del_" + rule["id"]):
+                store.remove_rule(user, rule["id"])
+                st.rerun()
+        if alerts:
+            st.markdown("**Recent alerts**")
+            for a in reversed(alerts):
+                st.caption(datetime.fromtimestamp(a["ts"], ET).strftime("%I:%M %p") + " — " + alert_text(a))
 
 
 # ══════════════════════════════════════════════════════════════════════
@@ -286,8 +338,33 @@ def render_scoreboard(g):
 
 st.markdown("## BIGSNAPSHOT NBA CUSHION SCANNER")
 st.caption("v" + VERSION + " | " + now_et().strftime("%A %b %d, %Y | %I:%M %p ET") + " | NBA | Cushion + Pace")
+render_replay_controls()
 
-all_games = fetch_nba_games()
+get_poller()
+warm = get_warm_start()
+fetch_deadline = ESPN.deadline()
+replay = replay_session()
+if replay is not None:
+    try:
+        tick, warm_refresh = replay.tick(), None
+    except FetchError as e:
+        st.warning("Replay: " + str(e) + " — back to live")
+        stop_replay()
+        replay = None
+if replay is None:
+    tick, warm_refresh = load_tick(warm, fetch_deadline)
+all_games, stale_age = tick["games"], tick["stale_age"]
+derived = tick["derived"]
+line_moves = tick.get("lines", {})
+scanner_rows = {}
+for row in tick["scanner"]:
+    scanner_rows.setdefault(row["game_id"], []).append(row)
+if replay is not None:
+    st.info("⏪ " + replay.describe() + " — " + et_naive(replay.position()).strftime("%I:%M:%S %p ET"))
+elif warm_refresh is not None:
+    st.warning("Warm start: showing snapshot from " + "{:.0f}".format(stale_age / 60) + " min ago — refreshing from ESPN...")
+elif stale_age is not None:
+    st.warning(ESPN.describe() + " — showing last good scoreboard from " + "{:.0f}".format(stale_age) + "s ago")
 
 live_games = [g for g in all_games if g["state"] == "in"]
 scheduled_games = [g for g in all_games if g["state"] == "pre"]
@@ -308,23 +385,20 @@ st.divider()
 if live_games:
     st.markdown("### LIVE GAMES")
     for g in live_games:
-        mins = g.get("minutes_elapsed", 0)
-        total_game_mins = calc_total_game_minutes(g["period"])
-        total = g["home_score"] + g["away_score"]
-        pace = total / max(mins, 0.5)
-        proj = calc_projection(g["home_score"], g["away_score"], mins, total_game_mins)
-        remaining = total_game_mins - mins
+        d = derived[g["id"]]
+        mins, total_game_mins = d["mins"], d["total_game_mins"]
+        pace, proj, remaining = d["pace"], d["proj"], d["remaining"]
         pace_label = get_pace_label(pace)
-        pct = mins / total_game_mins * 100
-        period = g.get("period", 0)
-        ql = "Q" + str(period) if period <= 4 else "OT" + str(period - 4)
-        shark = " SHARK" if remaining <= SHARK_MINUTES else ""
+        pct = d["pct"]
+        shark = " SHARK" if d["is_shark"] else ""
 
         render_scoreboard(g)
         lc, rc = st.columns(2)
         with lc:
             st.markdown("**Pace:** " + "{:.2f}".format(pace) + " pts/min " + pace_label)
             st.markdown("**Projected Total:** " + str(proj))
+            if d.get("late_ppm"):
+                st.markdown("**Late fouling:** +" + "{:.1f}".format(d["late_ppm"]) + " pts/min in projection")
             st.markdown("**Progress:** " + "{:.0f}".format(pct) + "% (" + "{:.1f}".format(mins) + "/" + str(total_game_mins) + " min)")
         with rc:
             lead = g["home_score"] - g["away_score"]
@@ -339,13 +413,24 @@ if live_games:
                 diff = proj - g["over_under"]
                 if abs(diff) >= 5:
                     direction = "OVER" if diff > 0 else "UNDER"
-                    st.markdown("**Totals Edge:** Proj " + str(proj) + " vs Line " + str(g["over_under"]) + " -> **" + direction + " (" + "{:+.1f}".format(diff) + ")**")
+                    st.markdown("**Totals Edge:** Proj " + str(proj) + " vs Line " + str(g["over_under"]) + " -> **" + direction + " (" + "{:+.1f}".format(diff) + ")**" + line_move_text(line_moves, g["id"]))
+        if g.get("last_play"):
+            poss_name, poss_side = situation_possession(g)
+            poss = g[poss_side + "_abbr"] if poss_side else ""
+            st.caption("Last play: " + str(g["last_play"]["text"]) + (" | " + poss + " ball" if poss else ""))
         kalshi_link = get_kalshi_nba_link(g["away_abbr"], g["home_abbr"])
         st.markdown("[Trade on Kalshi](" + kalshi_link + ")")
         st.markdown("---")
     st.divider()
 
 
+# ══════════════════════════════════════════════════════════════════════
+# WATCHLIST & ALERTS
+# ══════════════════════════════════════════════════════════════════════
+
+render_watch_panel(get_watch_store(), all_games, tick)
+
+
 # ══════════════════════════════════════════════════════════════════════
 # CUSHION SCANNER — TOTALS (THE MONEY MAKER)
 # ══════════════════════════════════════════════════════════════════════
@@ -363,60 +448,30 @@ if live_games:
         label = str(g["away_abbr"]) + " @ " + str(g["home_abbr"])
         if cs_sel != "ALL GAMES" and cs_sel != label:
             continue
-        mins = g.get("minutes_elapsed", 0)
-        if mins < cs_min:
+        d = derived[g["id"]]
+        if d["mins"] < cs_min:
             continue
-        total = g["home_score"] + g["away_score"]
-        total_game_mins = calc_total_game_minutes(g["period"])
-        remaining = total_game_mins - mins
-        pace = total / max(mins, 0.5)
-        is_shark = remaining <= SHARK_MINUTES
 
-        for thresh in THRESHOLDS:
+        for row in scanner_rows.get(g["id"], []):
+            safety = row["tier"] + (" SHARK" if row["shark"] else "")
             # ── OVER ──────────────────────────────────────────────
-            needed_over = thresh - total
-            if cs_side in ["Both", "Over"] and needed_over > 0 and remaining > 0:
-                rate_needed = needed_over / remaining
-                cushion = pace - rate_needed
-                if cushion > 1.0:
-                    safety = "FORTRESS"
-                elif cushion > 0.4:
-                    safety = "SAFE"
-                elif cushion > 0.0:
-                    safety = "TIGHT"
-                else:
-                    safety = "RISKY"
-                if is_shark:
-                    safety += " SHARK"
+            if row["side"] == "OVER" and cs_side in ["Both", "Over"]:
                 found_any = True
                 st.markdown(
-                    "**" + label + "** OVER " + str(thresh) +
-                    " — Need " + "{:.0f}".format(needed_over) +
-                    " in " + "{:.0f}".format(remaining) + "min (" +
-                    "{:.2f}".format(rate_needed) + "/min) | Pace " +
-                    "{:.2f}".format(pace) + "/min | **" + safety + "**")
+                    "**" + label + "** OVER " + str(row["thresh"]) +
+                    " — Need " + "{:.0f}".format(row["needed"]) +
+                    " in " + "{:.0f}".format(d["remaining"]) + "min (" +
+                    "{:.2f}".format(row["rate_needed"]) + "/min) | Pace " +
+                    "{:.2f}".format(d["pace"]) + "/min | **" + safety + "**")
 
             # ── UNDER ─────────────────────────────────────────────
-            if cs_side in ["Both", "Under"] and remaining > 0:
-                projected_final = total + (remaining * pace)
-                under_cushion = thresh - projected_final
-                if projected_final < thresh:
-                    if under_cushion > 10:
-                        u_safety = "FORTRESS"
-                    elif under_cushion > 4:
-                        u_safety = "SAFE"
-                    elif under_cushion > 0:
-                        u_safety = "TIGHT"
-                    else:
-                        u_safety = "RISKY"
-                    if is_shark:
-                        u_safety += " SHARK"
-                    found_any = True
-                    st.markdown(
-                        "**" + label + "** UNDER " + str(thresh) +
-                        " — Proj " + "{:.0f}".format(projected_final) +
-                        " vs Line " + str(thresh) + " | Cushion " +
-                        "{:.1f}".format(under_cushion) + " pts | **" + u_safety + "**")
+            elif row["side"] == "UNDER" and cs_side in ["Both", "Under"]:
+                found_any = True
+                st.markdown(
+                    "**" + label + "** UNDER " + str(row["thresh"]) +
+                    " — Proj " + "{:.0f}".format(row["projected"]) +
+                    " vs Line " + str(row["thresh"]) + " | Cushion " +
+                    "{:.1f}".format(row["cushion"]) + " pts | **" + safety + "**")
 
     if not found_any:
         st.info("No games match the current filter. Try lowering the minutes elapsed slider.")
@@ -430,19 +485,13 @@ if live_games:
 if live_games:
     st.markdown("### PACE SCANNER")
     for g in live_games:
-        mins = g.get("minutes_elapsed", 0)
-        if mins < 2:
+        d = derived[g["id"]]
+        if d["mins"] < 2:
             continue
-        total = g["home_score"] + g["away_score"]
-        total_game_mins = calc_total_game_minutes(g["period"])
-        remaining = total_game_mins - mins
-        pace = total / max(mins, 0.5)
-        proj = calc_projection(g["home_score"], g["away_score"], mins, total_game_mins)
+        pace, proj, pct = d["pace"], d["proj"], d["pct"]
         plabel = get_pace_label(pace)
-        period = g.get("period", 0)
-        ql = "Q" + str(period) if period <= 4 else "OT" + str(period - 4)
-        pct = mins / total_game_mins * 100
-        shark = " SHARK" if remaining <= SHARK_MINUTES else ""
+        ql = NBA.period_label(g.get("period", 0))
+        shark = " SHARK" if d["is_shark"] else ""
 
         col1, col2, col3 = st.columns([2, 1, 1])
         col1.markdown(
@@ -464,7 +513,7 @@ if live_games:
                     st.markdown(
                         "→ Proj " + str(proj) + " vs Line " +
                         str(g["over_under"]) + ": **" + arrow +
-                        " (" + "{:+.1f}".format(diff) + ")**")
+                        " (" + "{:+.1f}".format(diff) + ")**" + line_move_text(line_moves, g["id"]))
             except (ValueError, TypeError):
                 pass
         kalshi_link = get_kalshi_nba_link(g["away_abbr"], g["home_abbr"])
@@ -500,7 +549,8 @@ for g in all_games:
         if g.get("spread"):
             parts.append("Spread: " + str(g["spread"]))
         if g.get("over_under"):
-            parts.append("O/U: " + str(g["over_under"]))
+            moved = line_move_text(line_moves, g["id"])
+            parts.append("O/U: " + str(g["over_under"]) + (" (" + moved[3:] + ")" if moved else ""))
         if g.get("broadcast"):
             parts.append(str(g["broadcast"]))
         st.markdown(
@@ -509,6 +559,9 @@ for g in all_games:
 
 st.divider()
 
+if replay is None and warm_refresh is None and stale_age is None:
+    warm.record(all_games, derived=derived)
+
 
 # ══════════════════════════════════════════════════════════════════════
 # HOW TO USE
@@ -562,6 +615,33 @@ with st.expander("How to Use This App", expanded=False):
     """)
 
 
+# ══════════════════════════════════════════════════════════════════════
+# OWNER TOOLS — on-demand sampling profiler
+# ══════════════════════════════════════════════════════════════════════
+
+with st.expander("Profiler", expanded=False):
+    prof = sharkprof.current()
+    if prof is not None and prof.active():
+        st.info("Capturing " + prof.mode + ": " + str(prof.done_count) + "/" + str(prof.count) +
+                " done, " + str(prof.total) + " samples so far")
+    else:
+        pc1, pc2, pc3 = st.columns(3)
+        prof_mode = pc1.selectbox("Capture", ["Next reruns", "Poller ticks"], key="prof_mode")
+        prof_n = pc2.number_input("Count", min_value=1, max_value=50, value=5, key="prof_n")
+        if pc3.button("Start capture", key="prof_start"):
+            poller = get_poller()
+            if prof_mode == "Poller ticks" and not poller.is_leader:
+                st.warning("This process is standby — the poller runs in pid " + str(tick.get("poller_pid", "?")))
+            else:
+                sharkprof.start_capture("nba", "poller" if prof_mode == "Poller ticks" else "reruns",
+                                        int(prof_n), poller if prof_mode == "Poller ticks" else None)
+                st.rerun()
+    if prof is not None and not prof.active():
+        if prof.paths:
+            st.caption("Last capture: " + prof.paths[0] + " (folded stacks) | " + prof.paths[1])
+        st.code(prof.summary)
+
+
 # ══════════════════════════════════════════════════════════════════════
 # FOOTER
 # ══════════════════════════════════════════════════════════════════════
@@ -574,3 +654,5 @@ st.markdown(
     "Only wager what you can afford to lose.<br><br>"
     "<a href='https://bigsnapshot.com' style='color:#888'>bigsnapshot.com</a>"
     "</div>", unsafe_allow_html=True)
+
+sharkprof.rerun_end()
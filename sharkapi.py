@@ -0,0 +1,326 @@
+"""
+sharkapi.py — BigSnapshot scanner JSON API
+Small standalone HTTP server for bots, sheets and widgets. Serves each
+league's games, derived pace/projection and cushion matrix straight from the
+poller's SharedSnapshot. Response bodies and ETags are built once per tick;
+requests only pick pre-encoded bytes, and If-None-Match hits answer 304.
+
+Run: python sharkapi.py [--host 127.0.0.1] [--port 8502] [--poll]
+  GET /v1/<league>            games + derived + scanner + line moves
+  GET /v1/<league>/games      games + derived
+  GET /v1/<league>/scanner    cushion matrix rows
+  GET /v1/<league>/lines?game=<id>[&at=<unix ts>]
+                              a game's O/U + spread history, or the lines at a time
+  GET /v1/<league>/stream     Server-Sent Events of scanner deltas
+  GET /healthz
+Auth: ?key=<SHARK_API_KEY> or an X-Shark-Key header. There is no default
+key: without SHARK_API_KEY the server only binds to localhost.
+
+The stream opens with a `snapshot` event (full matrix + scores), then one
+`delta` event per tick that changed anything: new/removed cells, tier
+upgrades/downgrades, games entering the SHARK window, score changes. Event
+ids are the snapshot version; reconnect with Last-Event-ID (or ?since=) to
+replay missed deltas, or get a fresh snapshot if they fell out of the backlog.
+"""
+
+import asyncio, hashlib, json, os, sys, time
+from collections import deque
+from urllib.parse import parse_qs, urlsplit
+
+from sharkcore import LEAGUES, diff_ticks
+from sharklines import KINDS, LineHistory
+from sharkstate import SharedSnapshot
+
+API_KEY = os.environ.get("SHARK_API_KEY", "")
+LOCAL_HOSTS = ("127.0.0.1", "localhost", "::1")
+REFRESH_SECONDS = 0.5
+MAX_HEADER_BYTES = 8192
+STREAM_BACKLOG = 500        # delta events kept for resume
+STREAM_QUEUE = 256          # per-client buffer before a slow client is dropped
+STREAM_PING = 15.0
+
+
+# ══════════════════════════════════════════════════════════════════════
+# PER-TICK RESPONSE CACHE
+# ══════════════════════════════════════════════════════════════════════
+
+class Resource:
+    __slots__ = ("body", "etag")
+
+    def __init__(self, payload):
+        self.body = json.dumps(payload, separators=(",", ":")).encode()
+        self.etag = '"' + hashlib.sha1(self.body).hexdigest()[:16] + '"'
+
+
+def sse(seq, event, payload):
+    return ("id: " + str(seq) + "\nevent: " + event + "\ndata: " +
+            json.dumps(payload, separators=(",", ":")) + "\n\n").encode()
+
+
+class Subscriber:
+    __slots__ = ("queue", "dropped")
+
+    def __init__(self):
+        self.queue = asyncio.Queue(maxsize=STREAM_QUEUE)
+        self.dropped = False
+
+
+class LeagueFeed:
+
+    def __init__(self, key):
+        self.key = key
+        self.snapshot = SharedSnapshot(key)
+        self.version = -1
+        self.resources = {}
+        self.tick = None
+        self.backlog = deque(maxlen=STREAM_BACKLOG)
+        self.backlog_floor = None   # deltas after this version are all in backlog
+        self.subscribers = set()
+        self.line_history = LineHistory(key, readonly=True)
+
+    def lines(self):
+        # The poller's line log, reread whenever it grew or was compacted.
+        return self.line_history.reload()
+
+    def refresh(self):
+        # Returns the encoded delta event when a new tick changed anything.
+        version = self.snapshot.version()
+        if version == self.version:
+            return None
+        tick = self.snapshot.read()
+        self.version = version
+        if not tick:
+            return None
+        meta = {"league": self.key, "stale_age": tick.get("stale_age")}
+        self.resources = {
+            "": Resource(dict(meta, games=tick["games"], derived=tick["derived"], scanner=tick["scanner"],
+                              lines=tick.get("lines", {}))),
+            "games": Resource(dict(meta, games=tick["games"], derived=tick["derived"])),
+            "scanner": Resource(dict(meta, scanner=tick["scanner"])),
+        }
+        prev, self.tick = self.tick, tick
+        if prev is None:
+            self.backlog_floor = version
+            return None
+        changes = diff_ticks(prev, tick)
+        if not changes:
+            return None
+        msg = sse(version, "delta", {"league": self.key, "seq": version, "changes": changes})
+        if len(self.backlog) == self.backlog.maxlen:
+            self.backlog_floor = self.backlog[0][0]
+        self.backlog.append((version, msg))
+        return msg
+
+    def snapshot_event(self):
+        tick = self.tick or {"games": [], "scanner": []}
+        scores = [{"game_id": g["id"], "state": g["state"], "home_score": g["home_score"],
+                   "away_score": g["away_score"], "period": g["period"], "clock": g["clock"]}
+                  for g in tick["games"]]
+        return sse(self.version, "snapshot", {"league": self.key, "seq": self.version,
+                                              "scanner": tick["scanner"], "scores": scores})
+
+    def resume(self, last_id):
+        # Events to send a (re)connecting client, oldest first.
+        if last_id is not None and self.backlog_floor is not None \
+                and self.backlog_floor <= last_id <= self.version:
+            return [msg for seq, msg in self.backlog if seq > last_id]
+        return [self.snapshot_event()]
+
+    def broadcast(self, msg):
+        for sub in list(self.subscribers):
+            try:
+                sub.queue.put_nowait(msg)
+            except asyncio.QueueFull:
+                sub.dropped = True
+                self.subscribers.discard(sub)
+
+
+# ══════════════════════════════════════════════════════════════════════
+# HTTP
+# ══════════════════════════════════════════════════════════════════════
+
+REASONS = {200: "OK", 304: "Not Modified", 400: "Bad Request", 401: "Unauthorized",
+           404: "Not Found", 405: "Method Not Allowed", 503: "Service Unavailable"}
+
+
+def response(status, body=b"", etag=None, keep_alive=True, extra=None):
+    head = ["HTTP/1.1 " + str(status) + " " + REASONS[status],
+            "Content-Type: application/json",
+            "Content-Length: " + str(len(body)),
+            "Cache-Control: no-cache",
+            "Access-Control-Allow-Origin: *",
+            "Connection: " + ("keep-alive" if keep_alive else "close")]
+    if etag:
+        head.append("ETag: " + etag)
+    for k, v in (extra or {}).items():
+        head.append(k + ": " + v)
+    return ("\r\n".join(head) + "\r\n\r\n").encode() + body
+
+
+def error(status, msg, keep_alive=True):
+    return response(status, json.dumps({"error": msg}).encode(), keep_alive=keep_alive)
+
+
+class SharkAPI:
+
+    def __init__(self, leagues):
+        self.feeds = {k: LeagueFeed(k) for k in leagues}
+        self.started = time.time()
+
+    async def refresher(self):
+        while True:
+            for feed in self.feeds.values():
+                try:
+                    msg = feed.refresh()
+                except (OSError, ValueError):
+                    continue
+                if msg:
+                    feed.broadcast(msg)
+            await asyncio.sleep(REFRESH_SECONDS)
+
+    def authorized(self, query, headers):
+        if not API_KEY:
+            return True     # localhost only, see main()
+        return query.get("key", [""])[0] == API_KEY or headers.get("x-shark-key") == API_KEY
+
+    def route(self, method, target, headers, keep_alive):
+        if method not in ("GET", "HEAD"):
+            return error(405, "GET only", keep_alive)
+        url = urlsplit(target)
+        query = parse_qs(url.query)
+        parts = [p for p in url.path.split("/") if p]
+        if parts == ["healthz"]:
+            body = json.dumps({"ok": True, "uptime": round(time.time() - self.started),
+                               "versions": {k: f.version for k, f in self.feeds.items()}}).encode()
+            return response(200, body, keep_alive=keep_alive)
+        if not self.authorized(query, headers):
+            return error(401, "missing or wrong key", keep_alive)
+        if len(parts) not in (2, 3) or parts[0] != "v1" or parts[1] not in self.feeds:
+            return error(404, "unknown resource", keep_alive)
+        feed = self.feeds[parts[1]]
+        if parts[2:] == ["stream"]:
+            last_id = headers.get("last-event-id") or query.get("since", [None])[0]
+            try:
+                last_id = int(last_id) if last_id is not None else None
+            except ValueError:
+                last_id = None
+            return ("stream", feed, last_id)
+        if parts[2:] == ["lines"]:
+            return self.lines(feed, query, keep_alive)
+        res = feed.resources.get(parts[2] if len(parts) == 3 else "")
+        if res is None:
+            if feed.resources:
+                return error(404, "unknown resource", keep_alive)
+            return error(503, "no tick published yet for " + feed.key, keep_alive)
+        extra = {"X-Shark-Version": str(feed.version)}
+        if headers.get("if-none-match") == res.etag:
+            return response(304, etag=res.etag, keep_alive=keep_alive, extra=extra)
+        return response(200, res.body, res.etag, keep_alive, extra)
+
+    def lines(self, feed, query, keep_alive):
+        gid = query.get("game", [""])[0]
+        if not gid:
+            return error(400, "game=<id> is required", keep_alive)
+        history = feed.lines()
+        payload = {"league": feed.key, "game_id": gid}
+        if "at" in query:
+            try:
+                ts = float(query["at"][0])
+            except ValueError:
+                return error(400, "at must be a unix timestamp", keep_alive)
+            payload["at"] = ts
+            for kind in KINDS:
+                payload[kind] = history.at(gid, kind, ts)
+        else:
+            payload.update(history.history(gid))
+        return response(200, json.dumps(payload, separators=(",", ":")).encode(), keep_alive=keep_alive)
+
+    async def handle(self, reader, writer):
+        try:
+            while True:
+                try:
+                    raw = await reader.readuntil(b"\r\n\r\n")
+                except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+                    break
+                lines = raw.decode("latin-1").split("\r\n")
+                try:
+                    method, target, version = lines[0].split(" ", 2)
+                except ValueError:
+                    writer.write(error(400, "bad request line", False))
+                    break
+                headers = {}
+                for line in lines[1:]:
+                    if ":" in line:
+                        k, v = line.split(":", 1)
+                        headers[k.strip().lower()] = v.strip()
+                conn = headers.get("connection", "").lower()
+                keep_alive = conn != "close" if version == "HTTP/1.1" else conn == "keep-alive"
+                out = self.route(method, target, headers, keep_alive)
+                if isinstance(out, tuple):
+                    await self.stream(writer, out[1], out[2])
+                    break
+                if method == "HEAD":
+                    # Same headers (and Content-Length) as the GET, no body.
+                    out = out[:out.index(b"\r\n\r\n") + 4]
+                writer.write(out)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        finally:
+            writer.close()
+
+    async def stream(self, writer, feed, last_id):
+        writer.write(("HTTP/1.1 200 OK\r\nContent-Type: text/event-stream\r\n"
+                      "Cache-Control: no-cache\r\nAccess-Control-Allow-Origin: *\r\n"
+                      "Connection: keep-alive\r\n\r\nretry: 3000\n\n").encode())
+        sub = Subscriber()
+        feed.subscribers.add(sub)
+        try:
+            for msg in feed.resume(last_id):
+                writer.write(msg)
+            await writer.drain()
+            while not sub.dropped:
+                try:
+                    msg = await asyncio.wait_for(sub.queue.get(), STREAM_PING)
+                except asyncio.TimeoutError:
+                    msg = b": ping\n\n"
+                writer.write(msg)
+                await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            feed.subscribers.discard(sub)
+
+    async def serve(self, host, port):
+        server = await asyncio.start_server(self.handle, host, port, limit=MAX_HEADER_BYTES)
+        asyncio.get_running_loop().create_task(self.refresher())
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv):
+    port = 8502
+    host = "127.0.0.1"
+    poll = "--poll" in argv
+    if "--port" in argv:
+        port = int(argv[argv.index("--port") + 1])
+    if "--host" in argv:
+        host = argv[argv.index("--host") + 1]
+    if not API_KEY and host not in LOCAL_HOSTS:
+        print("sharkapi: set SHARK_API_KEY to serve on " + host + " (without a key only localhost is allowed)")
+        sys.exit(2)
+    if poll:
+        # No Streamlit workers on this box: take part in poller election too.
+        from sharkpoller import Poller
+        for k in LEAGUES:
+            Poller(LEAGUES[k]).ensure()
+    api = SharkAPI(list(LEAGUES))
+    print("sharkapi: http://" + host + ":" + str(port) + "/v1/<" + "|".join(LEAGUES) + ">")
+    try:
+        asyncio.run(api.serve(host, port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
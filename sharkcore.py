@@ -0,0 +1,635 @@
+"""
+sharkcore.py — BigSnapshot league logic shared by the scanners and the poller
+League clocks, pace/projection, ESPN scoreboard parsing and the cushion
+scanner matrix. Nothing here touches Streamlit, so the same path runs inside
+shark.py / ncaashark.py, the background poller and offline tools.
+"""
+
+import hashlib, json, math, os, threading, time
+from concurrent import futures
+from datetime import datetime, timedelta
+from zoneinfo import ZoneInfo
+
+from sharkfetch import ESPN, FetchError
+from sharklate import late_ppm, summary_stats, forget as forget_late
+from sharkpace import PaceIndex
+
+ET = ZoneInfo("America/New_York")
+ESPN_BASE = os.environ.get("SHARK_ESPN_BASE", "https://site.api.espn.com/apis/site/v2/sports/basketball/")
+
+
+# ══════════════════════════════════════════════════════════════════════
+# LEAGUE CONFIG + CLOCK MATH
+# ══════════════════════════════════════════════════════════════════════
+
+class League:
+
+    def __init__(self, key, name, path, query, regulation_periods, period_minutes,
+                 ot_minutes, league_avg_total, thresholds, shark_minutes, date_tz,
+                 ladder_step=1.0, ladder_width=12.0, max_rate=7.0, shard_groups=None, ladder_max=None):
+        if ladder_step != int(ladder_step) or ladder_step < 1:
+            # Lines sit on the half point; a fractional step would land on whole numbers.
+            raise ValueError(key + ": ladder_step must be a whole number of points, got " + str(ladder_step))
+        self.key = key
+        self.name = name
+        self.path = path
+        self.query = query
+        self.regulation_periods = regulation_periods
+        self.period_minutes = period_minutes
+        self.ot_minutes = ot_minutes
+        self.game_minutes = regulation_periods * period_minutes
+        self.league_avg_total = league_avg_total
+        self.thresholds = thresholds        # headline lines; the scanner uses ladder()
+        self.shark_minutes = shark_minutes
+        self.date_tz = date_tz
+        self.ladder_step = int(ladder_step)     # points between scanned lines
+        self.ladder_width = ladder_width        # points either side of line / projection
+        self.ladder_max = ladder_max or len(thresholds)     # lines scanned per game, nearest the anchor
+        self.max_rate = max_rate            # combined pts/min no game sustains
+        self.shard_groups = shard_groups    # ESPN group ids to split the scoreboard by
+        self._pace_index = None
+        self._pace_loaded = False
+        self._pace_lock = threading.Lock()
+
+    def today(self):
+        return datetime.now(self.date_tz).strftime("%Y%m%d")
+
+    def slate_day(self, now=None):
+        # The date whose games the page is "on": a night's slate runs until
+        # the rollover hour the next morning.
+        now = now or datetime.now(self.date_tz)
+        return (now - timedelta(hours=ROLLOVER_HOUR)).date()
+
+    def scoreboard_url(self, date_str, group=None):
+        if group is not None:
+            return ESPN_BASE + self.path + "/scoreboard?dates=" + date_str + "&limit=200&groups=" + str(group)
+        return ESPN_BASE + self.path + "/scoreboard?dates=" + date_str + self.query
+
+    def summary_url(self, game_id):
+        return ESPN_BASE + self.path + "/summary?event=" + str(game_id)
+
+    def period_label(self, period):
+        if period <= self.regulation_periods:
+            return ("Q" if self.regulation_periods == 4 else "H") + str(period)
+        return "OT" + str(period - self.regulation_periods)
+
+    def minutes_elapsed(self, period, clock_str):
+        try:
+            reg = self.regulation_periods
+            if not clock_str or clock_str == "0:00":
+                if not period:
+                    return 0
+                if period <= reg:
+                    return min(period * self.period_minutes, self.game_minutes)
+                return self.game_minutes + (period - reg) * self.ot_minutes
+            parts = clock_str.replace(" ", "").split(":")
+            if len(parts) == 2:
+                mins_left = int(parts[0])
+                secs_left = float(parts[1])
+            elif len(parts) == 1:
+                # ESPN drops the minutes in the last minute: "45.3"
+                mins_left = 0
+                secs_left = float(parts[0])
+            else:
+                mins_left, secs_left = 0, 0
+            time_left = mins_left + secs_left / 60.0
+            if period <= reg:
+                elapsed_before = (period - 1) * self.period_minutes
+                elapsed_in = self.period_minutes - time_left
+            else:
+                elapsed_before = self.game_minutes + (period - reg - 1) * self.ot_minutes
+                elapsed_in = self.ot_minutes - time_left
+            return max(0, elapsed_before + elapsed_in)
+        except Exception:
+            return 0.0
+
+    def total_game_minutes(self, period):
+        if period <= self.regulation_periods:
+            return self.game_minutes
+        return self.game_minutes + (period - self.regulation_periods) * self.ot_minutes
+
+    def pace_index(self):
+        # Loaded once per process; None until `python sharkpace.py build` has run.
+        if not self._pace_loaded:
+            with self._pace_lock:
+                if not self._pace_loaded:
+                    self._pace_index = PaceIndex.load(self.key)
+                    self._pace_loaded = True
+        return self._pace_index
+
+    def prior_total(self, home_id, away_id):
+        idx = self.pace_index()
+        if idx is None:
+            return self.league_avg_total
+        return idx.expected_total(home_id, away_id, self.game_minutes)
+
+    def projection(self, home_score, away_score, minutes_elapsed, total_game_mins, prior_total=None):
+        total = home_score + away_score
+        prior = prior_total if prior_total is not None else self.league_avg_total
+        if minutes_elapsed <= 0:
+            return round(prior, 1)
+        cur_pace = total / minutes_elapsed
+        lg_pace = prior / self.game_minutes
+        pct = minutes_elapsed / total_game_mins
+        if pct < 0.15:
+            blend = 0.3
+        elif pct < 0.5:
+            blend = 0.5 + (pct - 0.15) * 1.0
+        else:
+            blend = 0.85 + (pct - 0.5) * 0.3
+        blend = min(blend, 0.98)
+        return round(((cur_pace * blend) + (lg_pace * (1 - blend))) * total_game_mins, 1)
+
+
+# ESPN men's D1 conference group ids. SHARK_NCAA_GROUPS="" turns sharding off.
+NCAA_GROUPS = [int(g) for g in os.environ.get(
+    "SHARK_NCAA_GROUPS",
+    "1,2,3,4,5,6,7,8,9,10,11,12,13,14,16,18,19,20,21,22,23,24,25,26,27,29,30,43,44,45,46,49,62",
+).split(",") if g.strip()]
+
+NBA = League(
+    "nba", "NBA", "nba", "&limit=50",
+    regulation_periods=4, period_minutes=12, ot_minutes=5, league_avg_total=224,
+    thresholds=[190.5, 195.5, 200.5, 205.5, 210.5, 215.5, 220.5,
+                225.5, 230.5, 235.5, 240.5, 245.5, 250.5],
+    shark_minutes=6.0, date_tz=ET, ladder_step=2, ladder_width=8.0, max_rate=7.0)
+
+NCAA = League(
+    "ncaa", "NCAA", "mens-college-basketball", "&limit=200&groups=50",
+    regulation_periods=2, period_minutes=20, ot_minutes=5, league_avg_total=135,
+    thresholds=[120.5, 125.5, 130.5, 135.5, 140.5, 145.5, 150.5, 155.5, 160.5],
+    shark_minutes=5.0, date_tz=ET, ladder_step=2, ladder_width=6.0, max_rate=6.0,
+    shard_groups=NCAA_GROUPS)
+
+LEAGUES = {"nba": NBA, "ncaa": NCAA}
+
+
+# ══════════════════════════════════════════════════════════════════════
+# ESPN SCOREBOARD
+# ══════════════════════════════════════════════════════════════════════
+
+def parse_scoreboard(league, data):
+    games = []
+    for event in data.get("events", []):
+        comp = event.get("competitions", [{}])[0]
+        competitors = comp.get("competitors", [])
+        if len(competitors) < 2:
+            continue
+        home = away = None
+        for c in competitors:
+            if c.get("homeAway") == "home":
+                home = c
+            elif c.get("homeAway") == "away":
+                away = c
+        if not home or not away:
+            continue
+        ht = home.get("team", {})
+        at = away.get("team", {})
+        status = event.get("status", {})
+        state = status.get("type", {}).get("state", "pre")
+        period = status.get("period", 0)
+        clock = status.get("displayClock", "")
+        odds_list = comp.get("odds", [])
+        over_under = None
+        spread = ""
+        if odds_list:
+            o = odds_list[0]
+            ou_raw = o.get("overUnder")
+            if ou_raw:
+                try:
+                    over_under = float(ou_raw)
+                except (ValueError, TypeError):
+                    pass
+            spread = o.get("spread", "")
+        home_record = home.get("records", [{}])[0].get("summary", "") if home.get("records") else ""
+        away_record = away.get("records", [{}])[0].get("summary", "") if away.get("records") else ""
+        home_rank = home.get("curatedRank", {}).get("current", 99)
+        away_rank = away.get("curatedRank", {}).get("current", 99)
+        situation = comp.get("situation") or {}
+        last = situation.get("lastPlay") or {}
+        last_play = None
+        if last.get("text"):
+            last_play = {
+                "id": str(last.get("id", "")),
+                "text": last.get("text", ""),
+                "team_id": str((last.get("team") or {}).get("id", "")),
+                "type": (last.get("type") or {}).get("text", ""),
+                "score": int(last.get("scoreValue", 0) or 0),
+            }
+        poss = situation.get("possession")
+        bcasts = comp.get("broadcasts", [])
+        broadcast = ""
+        if bcasts:
+            names = []
+            for b in bcasts:
+                for n in b.get("names", []):
+                    names.append(n)
+            broadcast = ", ".join(names)
+        game = {
+            "id": str(event.get("id", "")),
+            "name": event.get("name", ""),
+            "shortName": event.get("shortName", ""),
+            "state": state, "period": period, "clock": clock,
+            "home_team": ht.get("displayName", ""),
+            "home_abbr": ht.get("abbreviation", ""),
+            "home_score": int(home.get("score", 0) or 0),
+            "home_color": "#" + str(ht.get("color", "555555")),
+            "home_record": home_record, "home_rank": home_rank,
+            "home_id": str(ht.get("id", "")),
+            "away_team": at.get("displayName", ""),
+            "away_abbr": at.get("abbreviation", ""),
+            "away_score": int(away.get("score", 0) or 0),
+            "away_color": "#" + str(at.get("color", "555555")),
+            "away_record": away_record, "away_rank": away_rank,
+            "away_id": str(at.get("id", "")),
+            "over_under": over_under, "spread": spread,
+            "broadcast": broadcast,
+            "venue": comp.get("venue", {}).get("fullName", ""),
+            "minutes_elapsed": 0.0,
+            # From the scoreboard's live `situation` block, when ESPN sends one.
+            "poss_id": str(poss) if poss else "",
+            "last_play": last_play,
+        }
+        if state == "in":
+            game["minutes_elapsed"] = league.minutes_elapsed(period, clock)
+        games.append(game)
+    return games
+
+
+def situation_possession(g):
+    # (team name, "home"/"away") from the scoreboard's situation block.
+    poss = g.get("poss_id", "")
+    if poss and poss == g.get("home_id"):
+        return g["home_team"], "home"
+    if poss and poss == g.get("away_id"):
+        return g["away_team"], "away"
+    return None, None
+
+
+# ══════════════════════════════════════════════════════════════════════
+# SLATE — adjacent ET dates fetched together, merged by event id
+# ══════════════════════════════════════════════════════════════════════
+#
+# The slate day's scoreboard is always shown in full. Adjacent dates only
+# contribute games that are live (a late tip still going past midnight, or
+# ESPN filing it under the neighbouring date) and keep them until they go
+# final. Shards with nothing live are polled slowly, all-final ones not at
+# all. At the rollover hour the slate moves on: finished games, their cached
+# scoreboards/summaries and every evict hook's per-game state are dropped,
+# so a process running for weeks holds about one night's games at a time.
+
+ROLLOVER_HOUR = int(os.environ.get("SHARK_ROLLOVER_HOUR", "6"))    # ET
+SLATE_OFFSETS = (-1, 0, 1)
+SHARD_IDLE_SECONDS = 60     # shards with nothing live are refetched this often
+SHARD_SWEEP_SECONDS = 120   # full-board safety net behind conference shards
+SHARD_WAIT = 3.0            # longest a tick waits on slow shards
+SHARD_RETRIES = 1
+
+
+class Shard:
+    __slots__ = ("url", "offset", "sweep", "games", "fetched_at", "ok_at", "digest", "pending")
+
+    def __init__(self, url, offset, sweep=False):
+        self.url = url
+        self.offset = offset
+        self.sweep = sweep
+        self.games = []
+        self.fetched_at = 0.0
+        self.ok_at = None
+        self.digest = None
+        self.pending = None
+
+    def due(self, now):
+        if self.pending is not None:
+            return False
+        if self.sweep:
+            return now - self.fetched_at >= SHARD_SWEEP_SECONDS
+        if self.ok_at is None or any(g["state"] == "in" for g in self.games):
+            return True
+        if self.games and all(g["state"] == "post" for g in self.games):
+            return False
+        return now - self.fetched_at >= SHARD_IDLE_SECONDS
+
+    def parse(self, league, raw):
+        # Unchanged response bytes: keep the games parsed last time.
+        digest = hashlib.sha1(raw).digest()
+        if digest == self.digest:
+            return self.games
+        games = parse_scoreboard(league, json.loads(raw))
+        self.digest = digest
+        return games
+
+
+class Slate:
+
+    def __init__(self, league, offsets=SLATE_OFFSETS):
+        self.league = league
+        self.offsets = offsets
+        self.day = None
+        self.shards = []
+        self.tracked = set()
+        self._evict_hooks = []
+        self._lock = threading.Lock()
+
+    def on_evict(self, hook):
+        # hook(game_ids) runs at rollover for games leaving the slate.
+        self._evict_hooks.append(hook)
+
+    def _urls(self, day, offset):
+        # (url, sweep) pairs. The slate day of a sharded league is split by
+        # conference group, with the full board as a slow sweep behind it.
+        date_str = (day + timedelta(days=offset)).strftime("%Y%m%d")
+        if offset != 0 or not self.league.shard_groups:
+            return [(self.league.scoreboard_url(date_str), False)]
+        return [(self.league.scoreboard_url(date_str, g), False) for g in self.league.shard_groups] + \
+            [(self.league.scoreboard_url(date_str), True)]
+
+    def _rollover(self, day):
+        old = {s.url: s for s in self.shards}
+        shards = []
+        for o in self.offsets:
+            for url, sweep in self._urls(day, o):
+                shard = old.pop(url, None) or Shard(url, o)
+                shard.offset = o
+                shard.sweep = sweep
+                shard.fetched_at = 0.0
+                shards.append(shard)
+        # Finished games go; unfinished ones stay tracked while their date is
+        # still in the window. Dates leaving the window take everything along.
+        evicted = set(g["id"] for s in old.values() for g in s.games)
+        evicted |= set(g["id"] for s in shards for g in s.games if g["state"] == "post")
+        self.day = day
+        self.shards = shards
+        self.tracked -= evicted
+        ESPN.forget(list(old) + [self.league.summary_url(gid) for gid in evicted])
+        for hook in self._evict_hooks:
+            try:
+                hook(evicted)
+            except Exception:
+                pass
+
+    def _job(self, shard):
+        return {"url": shard.url, "route": self.league.key + "-scoreboard", "raw": True,
+                "parse": lambda raw: shard.parse(self.league, raw), "retries": SHARD_RETRIES}
+
+    def fetch(self, deadline=None):
+        # Returns (games, stale_age); raises FetchError only when no shard has
+        # ever come back. Shards still running after SHARD_WAIT keep going in
+        # the background and land on a later tick. The lock only guards shard
+        # state: callers wait on the fetches without holding it, and whoever
+        # looks first after a fetch lands collects it.
+        with self._lock:
+            day = self.league.slate_day()
+            if day != self.day:
+                self._rollover(day)
+            now = time.time()
+            for shard in self.shards:
+                if shard.due(now):
+                    shard.fetched_at = now
+                    shard.pending = ESPN.submit(self._job(shard), deadline)
+            pending = [s.pending for s in self.shards if s.pending is not None]
+        wait_for = SHARD_WAIT if deadline is None else min(SHARD_WAIT, max(deadline.remaining(), 0.0))
+        if pending:
+            futures.wait(pending, timeout=wait_for)
+        with self._lock:
+            now = time.time()
+            error = None
+            stale_age = None
+            for shard in self.shards:
+                if shard.pending is not None and shard.pending.done():
+                    res = shard.pending.result()
+                    shard.pending = None
+                    if isinstance(res, FetchError):
+                        error = error or res
+                        if shard.ok_at is not None:
+                            stale_age = max(stale_age or 0.0, now - shard.ok_at)
+                        continue
+                    shard.games, age = res
+                    if age is None:
+                        shard.ok_at = now
+                    else:
+                        shard.ok_at = shard.ok_at or now - age
+                        stale_age = max(stale_age or 0.0, age)
+            if all(s.ok_at is None for s in self.shards):
+                raise error or FetchError("no scoreboard for " + self.league.key)
+            return self.merge(), stale_age
+
+    def merge(self):
+        games = []
+        seen = set()
+        for shard in sorted(self.shards, key=lambda s: (s.offset != 0, s.sweep)):
+            for g in shard.games:
+                if g["id"] in seen:
+                    continue
+                if shard.offset != 0 and g["state"] != "in" and g["id"] not in self.tracked:
+                    continue
+                seen.add(g["id"])
+                games.append(g)
+        self.tracked |= seen
+        return games
+
+
+_slates = {}
+_slates_lock = threading.Lock()
+
+
+def get_slate(league):
+    with _slates_lock:
+        if league.key not in _slates:
+            _slates[league.key] = Slate(league)
+            _slates[league.key].on_evict(forget_late)
+        return _slates[league.key]
+
+
+def fetch_games(league, deadline=None):
+    # Returns (games, stale_age); raises sharkfetch.FetchError with no fallback.
+    return get_slate(league).fetch(deadline)
+
+
+# ══════════════════════════════════════════════════════════════════════
+# DERIVED METRICS + CUSHION SCANNER
+# ══════════════════════════════════════════════════════════════════════
+
+def derive(league, g, summary=None):
+    # summary: the poller's latest parsed summary for the game, if any.
+    mins = g.get("minutes_elapsed", 0)
+    total_game_mins = league.total_game_minutes(g["period"])
+    total = g["home_score"] + g["away_score"]
+    remaining = total_game_mins - mins
+    d = {
+        "mins": mins,
+        "total": total,
+        "total_game_mins": total_game_mins,
+        "remaining": remaining,
+        "pace": total / max(mins, 0.5),
+        "proj": league.projection(g["home_score"], g["away_score"], mins, total_game_mins,
+                                  league.prior_total(g.get("home_id", ""), g.get("away_id", ""))),
+        "pct": mins / total_game_mins * 100,
+        "is_shark": remaining <= league.shark_minutes,
+        "lead": abs(g["home_score"] - g["away_score"]),
+        "leader": g["home_abbr"] if g["home_score"] > g["away_score"] else g["away_abbr"],
+        "late_ppm": 0.0,
+    }
+    if d["is_shark"] and remaining > 0 and summary is not None:
+        # Fouling/free-throw burst from the summary the poller fetched.
+        d["late_ppm"] = late_ppm(league, g, d, summary_stats(league, g, summary))
+        if d["late_ppm"]:
+            d["proj"] = round(d["proj"] + d["late_ppm"] * remaining, 1)
+    return d
+
+
+def over_tier(cushion):
+    if cushion > 1.0:
+        return "FORTRESS"
+    if cushion > 0.4:
+        return "SAFE"
+    if cushion > 0.0:
+        return "TIGHT"
+    return "RISKY"
+
+
+def under_tier(cushion):
+    if cushion > 10:
+        return "FORTRESS"
+    if cushion > 4:
+        return "SAFE"
+    if cushion > 0:
+        return "TIGHT"
+    return "RISKY"
+
+
+def ladder(league, g, d, step=None):
+    # This game's lines: x.5 steps spanning ladder_width around the posted
+    # over/under and the projection, clipped to what is still reachable.
+    # At or below the current total the OVER has cleared and the UNDER is
+    # dead; above total + remaining * max_rate the result is already decided.
+    # The ladder is anchored on the posted line (else the projection), so
+    # with a wider step it still lands on the book's number, and holds at
+    # most ladder_max lines (the ones nearest the anchor): never more cells
+    # per game than the old global threshold list.
+    step = int(step or league.ladder_step)
+    total, remaining = d["total"], d["remaining"]
+    centers = [d["proj"]]
+    if g.get("over_under"):
+        centers.append(g["over_under"])
+    lo = max(min(centers) - league.ladder_width, total)
+    hi = min(max(centers) + league.ladder_width, total + remaining * league.max_rate)
+    base = math.floor(centers[-1]) + 0.5
+    k_lo = math.floor((lo - base) / step) + 1
+    k_hi = math.floor((hi - base) / step)
+    if k_hi - k_lo + 1 > league.ladder_max:
+        # Keep a window of ladder_max steps around the anchor (k = 0).
+        k_lo = min(max(k_lo, -(league.ladder_max // 2)), k_hi - league.ladder_max + 1)
+        k_hi = k_lo + league.ladder_max - 1
+    return [base + k * step for k in range(k_lo, k_hi + 1)]
+
+
+def scan_game(league, g, d):
+    # One row per (threshold, side) cell that the scanner would show.
+    rows = []
+    total, remaining = d["total"], d["remaining"]
+    pace = d["pace"] + d.get("late_ppm", 0.0)
+    if remaining <= 0:
+        return rows
+    for thresh in ladder(league, g, d):
+        needed_over = thresh - total
+        if needed_over > 0:
+            rate_needed = needed_over / remaining
+            cushion = pace - rate_needed
+            rows.append({
+                "game_id": g["id"], "side": "OVER", "thresh": thresh,
+                "needed": needed_over, "rate_needed": rate_needed,
+                "cushion": cushion, "tier": over_tier(cushion), "shark": d["is_shark"],
+            })
+        projected_final = total + (remaining * pace)
+        if projected_final < thresh:
+            under_cushion = thresh - projected_final
+            rows.append({
+                "game_id": g["id"], "side": "UNDER", "thresh": thresh,
+                "projected": projected_final,
+                "cushion": under_cushion, "tier": under_tier(under_cushion), "shark": d["is_shark"],
+            })
+    return rows
+
+
+def build_tick(league, games, stale_age=None, lines=None, summaries=None):
+    # lines: a sharklines.LineHistory to record this tick's odds into (the
+    # poller's) or to read them from (read-only); the tick then carries each
+    # game's open line and move since open.
+    # summaries: {game id: parsed summary} from the poller, for late_ppm.
+    now = time.time()
+    summaries = summaries or {}
+    derived = {}
+    scanner = []
+    for g in games:
+        if g["state"] != "in":
+            continue
+        d = derive(league, g, summaries.get(g["id"]))
+        derived[g["id"]] = d
+        scanner.extend(scan_game(league, g, d))
+    tick = {
+        "league": league.key,
+        "ts": now,
+        "stale_age": stale_age,
+        "games": games,
+        "derived": derived,
+        "scanner": scanner,
+    }
+    if lines is not None:
+        if stale_age is None:
+            lines.record(games, now)
+        tick["lines"] = {g["id"]: lines.summary(g["id"]) for g in games}
+    return tick
+
+
+def line_move_text(lines, game_id):
+    # " | opened 141.5, +1.0" once the posted total has moved since open.
+    info = lines.get(game_id) or {}
+    move = info.get("ou_move")
+    if not move:
+        return ""
+    return " | opened " + str(info["ou_open"]) + ", " + "{:+.1f}".format(move)
+
+
+# ══════════════════════════════════════════════════════════════════════
+# TICK DELTAS — what changed between two published ticks
+# ══════════════════════════════════════════════════════════════════════
+
+TIER_RANK = {"RISKY": 0, "TIGHT": 1, "SAFE": 2, "FORTRESS": 3}
+
+
+def cell_key(row):
+    return (row["game_id"], row["side"], row["thresh"])
+
+
+def diff_ticks(prev, cur):
+    # Changed cells and games only: new/removed cells, tier upgrades and
+    # downgrades, games entering the SHARK window, score changes.
+    changes = []
+    prev_cells = {cell_key(r): r for r in (prev or {}).get("scanner", [])}
+    cur_cells = {cell_key(r): r for r in cur.get("scanner", [])}
+    for key, row in cur_cells.items():
+        old = prev_cells.get(key)
+        cell = {"game_id": row["game_id"], "side": row["side"], "thresh": row["thresh"],
+                "tier": row["tier"], "shark": row["shark"], "cushion": round(row["cushion"], 2)}
+        if old is None:
+            changes.append(dict(cell, type="new"))
+        elif old["tier"] != row["tier"]:
+            up = TIER_RANK[row["tier"]] > TIER_RANK[old["tier"]]
+            changes.append(dict(cell, type="upgrade" if up else "downgrade", was=old["tier"]))
+    for key in prev_cells:
+        if key not in cur_cells:
+            changes.append({"type": "removed", "game_id": key[0], "side": key[1], "thresh": key[2]})
+    prev_games = {g["id"]: g for g in (prev or {}).get("games", [])}
+    prev_derived = (prev or {}).get("derived", {})
+    for g in cur.get("games", []):
+        old = prev_games.get(g["id"])
+        d = cur.get("derived", {}).get(g["id"])
+        if d and d["is_shark"] and not (prev_derived.get(g["id"]) or {}).get("is_shark"):
+            changes.append({"type": "shark_window", "game_id": g["id"], "remaining": round(d["remaining"], 2)})
+        if old is None or old["home_score"] != g["home_score"] or old["away_score"] != g["away_score"] \
+                or old["state"] != g["state"]:
+            changes.append({"type": "score", "game_id": g["id"], "state": g["state"],
+                            "home_score": g["home_score"], "away_score": g["away_score"],
+                            "period": g["period"], "clock": g["clock"]})
+    return changes
@@ -0,0 +1,246 @@
+"""
+sharkexport.py — BigSnapshot columnar export for offline analysis
+The poller streams every tick into three Parquet tables under
+STATE_DIR/export/<table>/league=<key>/date=<slate day>/: scoreboard ticks
+(a row per game whenever its state, clock, score or line changed), parsed
+plays (from the summaries the poller fetched) and cushion-scanner rows. A
+scanner row is written only when diff_ticks reports its cell new, re-tiered
+or removed (removed cells get a row with no tier); the cushion in between
+follows from the ticks table. Game, team, state, side and tier columns are
+dictionary-encoded. Rows are buffered and written as a new part file every
+FLUSH_SECONDS or FLUSH_ROWS, so a crash loses at most that much, and a season
+loads with one pyarrow.dataset / pandas / DuckDB read over the hive
+partitions (compact a finished day to merge its part files).
+
+Needs pyarrow (in requirements.txt); without it nothing is written.
+Disable with SHARK_EXPORT=0.
+
+Show:     python sharkexport.py show [nba] [ncaa]
+Compact:  python sharkexport.py compact nba 2026-03-14
+"""
+
+import atexit, os, sys, threading, time
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = pq = None
+
+from sharkcore import cell_key, diff_ticks
+from sharklines import parse_line
+from sharkstate import STATE_DIR
+
+EXPORT_DIR = os.path.join(STATE_DIR, "export")
+EXPORT_ENABLED = os.environ.get("SHARK_EXPORT", "1") != "0"
+FLUSH_SECONDS = 30
+FLUSH_ROWS = 5000
+TABLES = ("ticks", "plays", "scanner")
+
+
+def schemas():
+    ids = pa.dictionary(pa.int32(), pa.string())
+    small = pa.dictionary(pa.int8(), pa.string())
+    ts = pa.timestamp("ms", tz="UTC")
+    return {
+        "ticks": pa.schema([
+            ("ts", ts), ("game_id", ids), ("home_id", ids), ("away_id", ids), ("state", small),
+            ("period", pa.int8()), ("clock", pa.string()), ("minutes_elapsed", pa.float32()),
+            ("home_score", pa.int16()), ("away_score", pa.int16()),
+            ("over_under", pa.float32()), ("spread", pa.float32()),
+            ("pace", pa.float32()), ("proj", pa.float32()), ("remaining", pa.float32()),
+            ("late_ppm", pa.float32()), ("is_shark", pa.bool_()), ("stale_age", pa.float32()),
+        ]),
+        "plays": pa.schema([
+            ("ts", ts), ("game_id", ids), ("seq", pa.int32()), ("play_id", pa.string()),
+            ("period", pa.int8()), ("clock", pa.string()), ("team_id", ids), ("type", ids),
+            ("score", pa.int8()), ("text", pa.string()),
+        ]),
+        "scanner": pa.schema([
+            ("ts", ts), ("game_id", ids), ("side", small), ("thresh", pa.float32()),
+            ("cushion", pa.float32()), ("needed", pa.float32()), ("rate_needed", pa.float32()),
+            ("projected", pa.float32()), ("tier", small), ("shark", pa.bool_()),
+        ]),
+    }
+
+
+def partition_dir(table, league_key, day, root=None):
+    return os.path.join(root or EXPORT_DIR, table, "league=" + league_key, "date=" + str(day))
+
+
+class Exporter:
+    # One per poller. record() is called with every published tick; rows
+    # collect per (table, day) and go out as one part file per flush.
+
+    def __init__(self, league, root=None, flush_seconds=FLUSH_SECONDS, flush_rows=FLUSH_ROWS):
+        self.league = league
+        self.root = root or EXPORT_DIR
+        self.enabled = EXPORT_ENABLED and pa is not None
+        self.flush_seconds = flush_seconds
+        self.flush_rows = flush_rows
+        self.schemas = schemas() if pa is not None else {}
+        self.rows_written = 0
+        self.last_error = None
+        self._buf = {}
+        self._buf_rows = 0
+        self._last_flush = time.time()
+        self._seen = {}         # game id -> last exported tick signature
+        self._cursor = {}       # game id -> plays already exported
+        self._scanner = []      # previous tick's scanner rows, for diff_ticks
+        self._seq = 0
+        self._lock = threading.Lock()
+        if self.enabled:
+            atexit.register(self.flush)
+
+    def _append(self, table, day, row):
+        cols = self._buf.get((table, day))
+        if cols is None:
+            cols = self._buf[(table, day)] = {name: [] for name in self.schemas[table].names}
+        for name, values in cols.items():
+            values.append(row.get(name))
+        self._buf_rows += 1
+
+    def record(self, tick, summaries=None):
+        # summaries: {game id: parsed summary} the poller fetched this tick.
+        if not self.enabled:
+            return
+        ts = int(tick["ts"] * 1000)
+        day = self.league.slate_day()
+        derived = tick.get("derived", {})
+        with self._lock:
+            for g in tick["games"]:
+                sig = (g["state"], g["period"], g["clock"], g["home_score"], g["away_score"],
+                       g["over_under"], g["spread"])
+                if self._seen.get(g["id"]) == sig:
+                    continue
+                self._seen[g["id"]] = sig
+                d = derived.get(g["id"], {})
+                self._append("ticks", day, {
+                    "ts": ts, "game_id": g["id"], "home_id": g.get("home_id"), "away_id": g.get("away_id"),
+                    "state": g["state"], "period": g["period"], "clock": g["clock"],
+                    "minutes_elapsed": g.get("minutes_elapsed"),
+                    "home_score": g["home_score"], "away_score": g["away_score"],
+                    "over_under": g["over_under"], "spread": parse_line(g["spread"]),
+                    "pace": d.get("pace"), "proj": d.get("proj"), "remaining": d.get("remaining"),
+                    "late_ppm": d.get("late_ppm"), "is_shark": d.get("is_shark"),
+                    "stale_age": tick.get("stale_age"),
+                })
+            self._record_scanner(tick, ts, day)
+            for gid, summary in (summaries or {}).items():
+                self._record_plays(gid, summary.get("plays"), ts, day)
+            due = self._buf_rows >= self.flush_rows or time.time() - self._last_flush >= self.flush_seconds
+        if due:
+            self.flush()
+
+    def _record_scanner(self, tick, ts, day):
+        scanner = tick.get("scanner", [])
+        rows = {cell_key(r): r for r in scanner}
+        for c in diff_ticks({"scanner": self._scanner}, {"scanner": scanner}):
+            if c["type"] == "removed":
+                self._append("scanner", day, {"ts": ts, "game_id": c["game_id"], "side": c["side"], "thresh": c["thresh"]})
+            else:
+                self._append("scanner", day, dict(rows[cell_key(c)], ts=ts))
+        self._scanner = scanner
+
+    def _record_plays(self, gid, plays, ts, day):
+        # Only the plays past the game's cursor are new.
+        if not plays:
+            return
+        start = self._cursor.get(gid, 0)
+        if start > len(plays):
+            start = 0       # ESPN rewrote the feed; take it again
+        for i in range(start, len(plays)):
+            p = plays[i]
+            self._append("plays", day, {
+                "ts": ts, "game_id": gid, "seq": i, "play_id": p.get("id"), "period": p.get("period"),
+                "clock": p.get("clock"), "team_id": p.get("team_id"), "type": p.get("type"),
+                "score": p.get("score"), "text": p.get("text"),
+            })
+        self._cursor[gid] = len(plays)
+
+    def flush(self):
+        with self._lock:
+            buf, self._buf = self._buf, {}
+            self._buf_rows = 0
+            self._last_flush = time.time()
+            self._seq += 1
+            seq = self._seq
+        for (table, day), cols in buf.items():
+            try:
+                data = pa.Table.from_pydict(cols, schema=self.schemas[table])
+                path = partition_dir(table, self.league.key, day, self.root)
+                os.makedirs(path, exist_ok=True)
+                name = "part-" + time.strftime("%H%M%S") + "-" + str(os.getpid()) + "-" + str(seq) + ".parquet"
+                tmp = os.path.join(path, "." + name + ".tmp")
+                pq.write_table(data, tmp)
+                os.replace(tmp, os.path.join(path, name))
+                self.rows_written += data.num_rows
+                self.last_error = None
+            except Exception as e:
+                self.last_error = table + " export failed: " + str(e)
+
+    def forget(self, game_ids):
+        # Slate eviction hook: the day is over for these games.
+        self.flush()
+        with self._lock:
+            for gid in game_ids:
+                self._seen.pop(gid, None)
+                self._cursor.pop(gid, None)
+            gone = set(game_ids)
+            self._scanner = [r for r in self._scanner if r["game_id"] not in gone]
+
+
+# ══════════════════════════════════════════════════════════════════════
+# CLI — inspect and compact partitions
+# ══════════════════════════════════════════════════════════════════════
+
+def compact(table, league_key, day, root=None):
+    # Merge a finished day's part files into one; returns rows kept.
+    path = partition_dir(table, league_key, day, root)
+    parts = sorted(f for f in os.listdir(path) if f.startswith("part-") and f.endswith(".parquet"))
+    if len(parts) < 2:
+        return None
+    data = pa.concat_tables([pq.read_table(os.path.join(path, f)) for f in parts])
+    tmp = os.path.join(path, ".compact.tmp")
+    pq.write_table(data.combine_chunks(), tmp)
+    os.replace(tmp, os.path.join(path, "part-" + str(day) + "-all.parquet"))
+    for f in parts:
+        if f != "part-" + str(day) + "-all.parquet":
+            os.remove(os.path.join(path, f))
+    return data.num_rows
+
+
+def main(argv):
+    if pa is None:
+        print("sharkexport: pyarrow is not installed")
+        return
+    cmd = argv[0] if argv else "show"
+    if cmd == "compact":
+        league_key, day = argv[1], argv[2]
+        for table in TABLES:
+            try:
+                n = compact(table, league_key, day)
+            except OSError:
+                n = None
+            print(table + " " + league_key + " " + day + ": " + ("nothing to compact" if n is None else str(n) + " rows"))
+        return
+    import pyarrow.dataset as ds
+    keys = argv[1:] or ["nba", "ncaa"]
+    for table in TABLES:
+        root = os.path.join(EXPORT_DIR, table)
+        if not os.path.isdir(root):
+            print(table + ": nothing exported under " + root)
+            continue
+        dataset = ds.dataset(root, format="parquet", partitioning="hive")
+        for k in keys:
+            data = dataset.to_table(columns=["date", "game_id"], filter=ds.field("league") == k)
+            if not data.num_rows:
+                continue
+            days = sorted(set(str(d) for d in data.column("date").to_pylist()))
+            games = len(set(data.column("game_id").to_pylist()))
+            print(table + " " + k + ": " + str(data.num_rows) + " rows, " + str(games) + " games, "
+                  + str(len(days)) + " days (" + days[0] + " .. " + days[-1] + ")")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
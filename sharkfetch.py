@@ -0,0 +1,269 @@
+"""
+sharkfetch.py — BigSnapshot ESPN fetch layer
+Deadline-bounded GETs with hedged duplicates, a circuit breaker with
+exponential backoff, and last-good fallback, shared by every session in
+the process so a slow or failing ESPN never stalls a rerun.
+"""
+
+import random, threading, time
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+
+import requests
+
+REQUEST_TIMEOUT = 10.0      # hard cap for any single request
+RERUN_BUDGET = 6.0          # total ESPN wall time one rerun may spend
+HEDGE_DEFAULT = 1.5         # hedge delay until a route has enough samples
+HEDGE_FLOOR = 0.25
+HEDGE_MIN_SAMPLES = 8
+LATENCY_WINDOW = 50
+BREAKER_FAILURES = 3        # consecutive failures that open the circuit
+BREAKER_BASE = 2.0
+BREAKER_MAX = 120.0
+LAST_GOOD_MAX = 512
+RETRYABLE_STATUS = (429, 500, 502, 503, 504)
+
+
+class FetchError(Exception):
+    pass
+
+
+class StatusError(FetchError):
+    def __init__(self, status, msg):
+        FetchError.__init__(self, msg)
+        self.status = status
+
+
+class CircuitOpen(FetchError):
+    pass
+
+
+class BudgetExceeded(FetchError):
+    pass
+
+
+class Deadline:
+    def __init__(self, seconds):
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self):
+        return self.expires - time.monotonic()
+
+
+class Fetcher:
+
+    def __init__(self, name="espn", workers=16, fanout=8):
+        self.name = name
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name + "-fetch")
+        # fetch_many() callers block on get_json, which itself waits on _pool,
+        # so they get their own threads.
+        self._fanout = ThreadPoolExecutor(max_workers=fanout, thread_name_prefix=name + "-fanout")
+        self._session = requests.Session()
+        self._lock = threading.Lock()
+        self._latency = {}
+        self._last_good = OrderedDict()
+        self._failures = 0
+        self._trips = 0
+        self._open_until = 0.0
+        self._probing = False
+        self.stats = {"requests": 0, "hedges": 0, "retries": 0, "failures": 0, "fallbacks": 0, "rejected": 0}
+
+    def deadline(self, seconds=RERUN_BUDGET):
+        return Deadline(seconds)
+
+    # ── Latency tracking ─────────────────────────────────────────────
+
+    def _record_latency(self, route, secs):
+        with self._lock:
+            self._latency.setdefault(route, deque(maxlen=LATENCY_WINDOW)).append(secs)
+
+    def p95(self, route):
+        with self._lock:
+            samples = sorted(self._latency.get(route, ()))
+        if len(samples) < HEDGE_MIN_SAMPLES:
+            return None
+        return samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+
+    # ── Circuit breaker ──────────────────────────────────────────────
+
+    def _admit(self):
+        with self._lock:
+            now = time.monotonic()
+            if self._open_until == 0.0:
+                return
+            if now < self._open_until or self._probing:
+                self.stats["rejected"] += 1
+                raise CircuitOpen(self.name + " circuit open, retry in " +
+                                  "{:.0f}".format(max(0.0, self._open_until - now)) + "s")
+            self._probing = True    # half-open: let exactly one request through
+
+    def _succeeded(self):
+        with self._lock:
+            self._failures = 0
+            self._trips = 0
+            self._open_until = 0.0
+            self._probing = False
+
+    def _release_probe(self):
+        with self._lock:
+            self._probing = False
+
+    def _failed(self):
+        with self._lock:
+            self.stats["failures"] += 1
+            self._failures += 1
+            if self._probing or self._failures >= BREAKER_FAILURES:
+                backoff = min(BREAKER_BASE * (2 ** self._trips), BREAKER_MAX)
+                self._open_until = time.monotonic() + backoff * random.uniform(0.8, 1.2)
+                self._trips += 1
+                self._failures = 0
+            self._probing = False
+
+    def status(self):
+        with self._lock:
+            wait_s = self._open_until - time.monotonic()
+            state = "closed" if self._open_until == 0.0 else "open" if wait_s > 0 else "half-open"
+            return {"state": state, "retry_in": max(0.0, wait_s), "trips": self._trips,
+                    "stats": dict(self.stats)}
+
+    # ── Requests ─────────────────────────────────────────────────────
+
+    def _get(self, url, timeout, raw=False):
+        with self._lock:
+            self.stats["requests"] += 1
+        r = self._session.get(url, timeout=timeout)
+        if r.status_code != 200:
+            raise StatusError(r.status_code, "HTTP " + str(r.status_code) + " from " + self.name)
+        return r.content if raw else r.json()
+
+    def get_json(self, url, deadline=None, route="default", raw=False):
+        # raw=True hands back the undecoded response bytes for streaming parsers.
+        remaining = deadline.remaining() if deadline else REQUEST_TIMEOUT
+        if remaining <= 0:
+            raise BudgetExceeded("rerun fetch budget spent")
+        self._admit()
+        timeout = min(REQUEST_TIMEOUT, remaining)
+        hedge_at = max(self.p95(route) or HEDGE_DEFAULT, HEDGE_FLOOR)
+        started = time.monotonic()
+        pending = {self._pool.submit(self._get, url, timeout, raw)}
+        hedged = False
+        error = None
+        while pending:
+            elapsed = time.monotonic() - started
+            left = timeout - elapsed
+            if left <= 0:
+                break
+            wait_for = left if hedged else min(left, max(hedge_at - elapsed, 0.0))
+            done, pending = wait(pending, timeout=wait_for, return_when=FIRST_COMPLETED)
+            for fut in done:
+                try:
+                    data = fut.result()
+                except StatusError as e:
+                    if e.status not in RETRYABLE_STATUS:
+                        # A plain 4xx is our request, not an unhealthy upstream.
+                        self._release_probe()
+                        raise
+                    error = e
+                    continue
+                except Exception as e:
+                    error = e
+                    continue
+                self._record_latency(route, time.monotonic() - started)
+                self._succeeded()
+                return data
+            left = timeout - (time.monotonic() - started)
+            if pending and not hedged and left > HEDGE_FLOOR:
+                # Slower than this route's recent p95: race a duplicate.
+                hedged = True
+                with self._lock:
+                    self.stats["hedges"] += 1
+                pending.add(self._pool.submit(self._get, url, left, raw))
+        # Failures and timeouts stay out of the latency window: the p95 is
+        # what a good response costs, not how long we waited for a bad one.
+        if error is None and timeout < REQUEST_TIMEOUT:
+            # Cut short by the caller's deadline, not by ESPN: the breaker
+            # only counts upstream errors and full-length timeouts.
+            self._release_probe()
+            raise BudgetExceeded(self.name + " request cut off by the fetch budget after " +
+                                 "{:.1f}".format(timeout) + "s")
+        self._failed()
+        if error is not None:
+            raise FetchError(str(error))
+        raise FetchError(self.name + " timed out after " + "{:.1f}".format(timeout) + "s")
+
+    # ── Last-good fallback ───────────────────────────────────────────
+
+    def fetch(self, url, parse, deadline=None, route="default", key=None, raw=False):
+        # Returns (value, stale_age). stale_age is None for a fresh value, or
+        # the age in seconds of the last good value served in its place.
+        key = key or url
+        try:
+            value = parse(self.get_json(url, deadline, route, raw))
+        except FetchError:
+            with self._lock:
+                hit = self._last_good.get(key)
+                if hit is None:
+                    raise
+                self.stats["fallbacks"] += 1
+            return hit[0], time.time() - hit[1]
+        except Exception as e:
+            raise FetchError("bad " + route + " payload: " + str(e))
+        with self._lock:
+            self._last_good[key] = (value, time.time())
+            self._last_good.move_to_end(key)
+            while len(self._last_good) > LAST_GOOD_MAX:
+                self._last_good.popitem(last=False)
+        return value, None
+
+    def fetch_many(self, jobs, deadline=None):
+        # jobs: list of dicts with fetch() keyword args (url, parse, route,
+        # key, raw, retries). Runs them concurrently under one deadline and
+        # returns, in order, either (value, stale_age) or the FetchError raised.
+        futures = [self.submit(job, deadline) for job in jobs]
+        return [f.result() for f in futures]
+
+    def submit(self, job, deadline=None):
+        # Background fetch(); the future resolves to what fetch_many returns.
+        return self._fanout.submit(self._fetch_job, job, deadline)
+
+    def _fetch_job(self, job, deadline):
+        retries = job.get("retries", 0)
+        while True:
+            try:
+                value, stale_age = self.fetch(job["url"], job["parse"], deadline, job.get("route", "default"),
+                                              job.get("key"), job.get("raw", False))
+            except FetchError as e:
+                if retries <= 0 or isinstance(e, (CircuitOpen, BudgetExceeded)):
+                    return e
+            else:
+                # A stale fallback means the request failed: worth one more try
+                # while the breaker is closed and the deadline has room.
+                if stale_age is None or retries <= 0 or self._open_until or \
+                        (deadline is not None and deadline.remaining() < HEDGE_FLOOR):
+                    return value, stale_age
+            retries -= 1
+            with self._lock:
+                self.stats["retries"] += 1
+
+    def forget(self, keys):
+        with self._lock:
+            for key in keys:
+                self._last_good.pop(key, None)
+
+    def last_good(self, key):
+        with self._lock:
+            hit = self._last_good.get(key)
+        if hit is None:
+            return None, None
+        return hit[0], time.time() - hit[1]
+
+    def describe(self):
+        s = self.status()
+        if s["state"] == "open":
+            return "ESPN circuit open (retry in " + "{:.0f}".format(s["retry_in"]) + "s)"
+        if s["state"] == "half-open":
+            return "ESPN recovering"
+        return "ESPN slow"
+
+
+ESPN = Fetcher("espn")
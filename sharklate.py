@@ -0,0 +1,96 @@
+"""
+sharklate.py — BigSnapshot late-game foul/bonus pace adjustment
+Intentional fouling turns the last minutes into free-throw trips the flat
+pace never sees. From the summary the poller fetched for a SHARK-window game
+(its play-by-play) this works out each side's fouls in the current period, who is
+shooting bonus free throws and the recent free-throw scoring rate, and turns
+them into extra points per minute applied inside the SHARK window.
+"""
+
+import threading
+
+LOOKBACK_MINUTES = 3.0      # recent free-throw rate window (game minutes)
+FOUL_LEAD_MAX = 8           # trailing by more than this, teams stop fouling
+MAX_EXTRA_PPM = 4.0
+
+# key: (bonus fouls per period, combined FT pts/min in a normal game,
+#       extra pts/min once the trailing side is fouling into the bonus)
+LATE_RULES = {
+    "nba": (5, 0.70, 1.6),
+    "ncaa": (7, 0.65, 1.3),
+}
+
+
+def is_foul(p):
+    return "foul" in (p.get("type", "") or "").lower()
+
+
+def is_free_throw(p):
+    return "free throw" in (p.get("type", "") or "").lower()
+
+
+def late_stats(league, summary, home_id, away_id):
+    # summary: {"plays": [...], ...} from sharkparse; only the plays are used.
+    plays = summary.get("plays") or []
+    if not plays:
+        return None
+    bonus_at, ft_base, burst = LATE_RULES.get(league.key, LATE_RULES["nba"])
+    period = plays[-1].get("period", 0)
+    now = league.minutes_elapsed(period, plays[-1].get("clock", ""))
+    fouls = {home_id: 0, away_id: 0}
+    ft_pts = 0
+    for p in plays:
+        if p.get("period") == period and is_foul(p) and p.get("team_id") in fouls:
+            fouls[p["team_id"]] += 1
+        if is_free_throw(p) and now - league.minutes_elapsed(p.get("period", 0), p.get("clock", "")) <= LOOKBACK_MINUTES:
+            ft_pts += p.get("score", 0)
+    return {
+        "home_fouls": fouls[home_id], "away_fouls": fouls[away_id],
+        # A side is "in the bonus" when the *other* side has reached the limit.
+        "home_bonus": fouls[away_id] >= bonus_at, "away_bonus": fouls[home_id] >= bonus_at,
+        "ft_rate": ft_pts / LOOKBACK_MINUTES,
+    }
+
+
+def late_ppm(league, g, d, stats):
+    # Extra combined points per minute expected for the rest of the game.
+    if not stats or not d["is_shark"] or d["remaining"] <= 0:
+        return 0.0
+    bonus_at, ft_base, burst = LATE_RULES.get(league.key, LATE_RULES["nba"])
+    extra = max(0.0, stats["ft_rate"] - ft_base)
+    lead = g["home_score"] - g["away_score"]
+    if 0 < abs(lead) <= FOUL_LEAD_MAX:
+        leader_bonus = stats["home_bonus"] if lead > 0 else stats["away_bonus"]
+        if leader_bonus:
+            extra += burst
+    return min(extra, MAX_EXTRA_PPM)
+
+
+# ══════════════════════════════════════════════════════════════════════
+# MEMO — one late_stats pass per fetched summary
+# ══════════════════════════════════════════════════════════════════════
+
+_memo = {}
+_memo_lock = threading.Lock()
+
+
+def summary_stats(league, g, summary):
+    # late_stats for the summary handed in (the poller's latest for this
+    # game), recomputed only when a new summary object arrives.
+    if not isinstance(summary, dict):
+        return None
+    with _memo_lock:
+        hit = _memo.get(g["id"])
+        if hit is not None and hit[0] is summary:
+            return hit[1]
+    stats = late_stats(league, summary, g.get("home_id", ""), g.get("away_id", ""))
+    with _memo_lock:
+        _memo[g["id"]] = (summary, stats)
+    return stats
+
+
+def forget(game_ids):
+    # Slate eviction hook.
+    with _memo_lock:
+        for gid in game_ids:
+            _memo.pop(gid, None)
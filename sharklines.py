@@ -0,0 +1,191 @@
+"""
+sharklines.py — BigSnapshot over/under + spread movement history
+Each game keeps two change-only series. A series is its opening value and
+time plus parallel arrays of (seconds since open, half-points from open), so
+a whole night's moves cost a few bytes each and "line at T" is a bisect.
+Only the poller holding the league lock records lines: it appends changes to
+a per-league log, which is replayed on restart and compacted when games are
+evicted. Everyone else (standby workers, sharkapi) opens the log read-only
+and rereads it whenever it changed.
+"""
+
+import json, os, threading, time
+from array import array
+from bisect import bisect_right
+
+from sharkstate import STATE_DIR
+
+KINDS = ("ou", "spread")
+
+
+def parse_line(value):
+    # overUnder is numeric; spread is a number or a "BOS -3.5" style string.
+    if value is None or value == "":
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    try:
+        return float(str(value).split()[-1])
+    except (ValueError, IndexError):
+        return None
+
+
+class LineSeries:
+    __slots__ = ("open_ts", "open_value", "dt", "dv")
+
+    def __init__(self, ts, value):
+        self.open_ts = ts
+        self.open_value = value
+        self.dt = array("l", [0])
+        self.dv = array("h", [0])
+
+    def last(self):
+        return self.open_value + self.dv[-1] / 2.0
+
+    def record(self, ts, value):
+        if value == self.last():
+            return False
+        self.dt.append(max(int(ts - self.open_ts), self.dt[-1]))
+        self.dv.append(int(round((value - self.open_value) * 2)))
+        return True
+
+    def at(self, ts):
+        if ts < self.open_ts:
+            return None
+        i = bisect_right(self.dt, int(ts - self.open_ts)) - 1
+        return self.open_value + self.dv[i] / 2.0
+
+    def move(self):
+        return self.last() - self.open_value
+
+    def points(self):
+        return [(self.open_ts + t, self.open_value + v / 2.0) for t, v in zip(self.dt, self.dv)]
+
+
+class LineHistory:
+
+    def __init__(self, league, path=None, readonly=False):
+        self.league = league
+        self.path = path or os.path.join(STATE_DIR, league + ".lines.log")
+        self.readonly = readonly
+        self.series = {}
+        self._lock = threading.Lock()
+        self._loaded = False
+        self._sig = None
+
+    def _apply(self, gid, kind, ts, value, series=None):
+        per_game = (self.series if series is None else series).setdefault(gid, {})
+        s = per_game.get(kind)
+        if s is None:
+            per_game[kind] = LineSeries(ts, value)
+            return True
+        return s.record(ts, value)
+
+    def _read(self):
+        series = {}
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        gid, kind, ts, value = json.loads(line)
+                    except ValueError:
+                        continue
+                    self._apply(gid, kind, ts, value, series)
+        except OSError:
+            pass
+        return series
+
+    def load(self):
+        with self._lock:
+            if self._loaded:
+                return
+            self._loaded = True
+            self.series = self._read()
+
+    def reload(self):
+        # Rereads the log when it grew or was compacted since the last read;
+        # queries keep the previous copy until the new one is complete.
+        try:
+            st = os.stat(self.path)
+            sig = (st.st_size, st.st_mtime_ns)
+        except OSError:
+            sig = None
+        with self._lock:
+            if self._loaded and sig == self._sig:
+                return self
+            self._sig = sig
+            self._loaded = True
+            self.series = self._read()
+        return self
+
+    def record(self, games, ts=None):
+        # Feeds one tick's lines; returns the number of changes logged. A
+        # read-only history just picks up what the poller has logged.
+        if self.readonly:
+            self.reload()
+            return 0
+        self.load()
+        ts = ts or time.time()
+        out = []
+        with self._lock:
+            for g in games:
+                for kind, raw in (("ou", g.get("over_under")), ("spread", g.get("spread"))):
+                    value = parse_line(raw)
+                    if value is not None and self._apply(g["id"], kind, ts, value):
+                        out.append(json.dumps([g["id"], kind, round(ts, 1), value]))
+        if out:
+            try:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                with open(self.path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(out) + "\n")
+            except OSError:
+                pass
+        return len(out)
+
+    # ── Queries ──────────────────────────────────────────────────────
+
+    def at(self, gid, kind, ts):
+        s = self.series.get(gid, {}).get(kind)
+        return s.at(ts) if s else None
+
+    def history(self, gid):
+        # {kind: [(ts, value), ...]} change points for one game.
+        return {kind: s.points() for kind, s in self.series.get(gid, {}).items()}
+
+    def move_since_open(self, gid, kind):
+        s = self.series.get(gid, {}).get(kind)
+        return s.move() if s else None
+
+    def summary(self, gid):
+        # What a tick carries per game: open, current and move for each kind.
+        out = {}
+        for kind, s in self.series.get(gid, {}).items():
+            out[kind + "_open"] = s.open_value
+            out[kind + "_move"] = s.move()
+            out[kind + "_changes"] = len(s.dt) - 1
+        return out
+
+    # ── Eviction ─────────────────────────────────────────────────────
+
+    def forget(self, game_ids):
+        # Slate eviction hook: drop the games and compact the log.
+        if self.readonly:
+            return
+        with self._lock:
+            gone = [gid for gid in game_ids if gid in self.series]
+            if not gone:
+                return
+            for gid in gone:
+                del self.series[gid]
+            lines = []
+            for gid, per_game in self.series.items():
+                for kind, s in per_game.items():
+                    for ts, value in s.points():
+                        lines.append(json.dumps([gid, kind, round(ts, 1), value]))
+            try:
+                tmp = self.path + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    f.write("\n".join(lines) + ("\n" if lines else ""))
+                os.replace(tmp, self.path)
+            except OSError:
+                pass
@@ -0,0 +1,212 @@
+"""
+sharkload.py — BigSnapshot concurrent-session load test
+Drives N simulated sessions of shark.py / ncaashark.py against a local fake
+ESPN and reports, per N: rerun latency percentiles, CPU seconds and RSS per
+session, and upstream ESPN request counts. Each (app, N) level runs in a
+fresh worker process with its own state dir, the way one Streamlit server
+process holds every session and one poller.
+
+Run: python sharkload.py --key <owner key> [--app shark.py,ncaashark.py]
+                         [--sessions 1,5,10,25] [--duration 60] [--refresh 30] [--games 12]
+Sessions rerun every --refresh seconds (the apps' autorefresh is 30s) and
+authenticate with ?key= like a real trader's bookmark (--key, or
+SHARK_LOAD_KEY). Games come from the seeded sharksim simulator (--seed), so
+--games 1000 is a realistic big slate.
+"""
+
+import json, os, random, subprocess, sys, tempfile, threading, time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlsplit
+
+HERE = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_KEY = os.environ.get("SHARK_LOAD_KEY")
+
+
+# ══════════════════════════════════════════════════════════════════════
+# FAKE ESPN — simulated scoreboard + summary over HTTP
+# ══════════════════════════════════════════════════════════════════════
+
+class FakeESPN:
+    # Serves sharksim games; the simulated slate runs `speed` times real time.
+
+    def __init__(self, games=12, seed=7, speed=4.0):
+        from sharkcore import LEAGUES
+        from sharksim import Simulator
+        self.sims = {lg.path: Simulator(lg, games, seed) for lg in LEAGUES.values()}
+        self.speed = speed
+        self.t0 = time.time()
+        self.counts = {}
+        self._lock = threading.Lock()
+        self.server = None
+
+    def _now(self, path):
+        # Caller holds the lock.
+        sim = self.sims[path]
+        sim.advance((time.time() - self.t0) * self.speed)
+        return sim
+
+    def scoreboard(self, path):
+        with self._lock:
+            return self._now(path).scoreboard()
+
+    def summary(self, path, game_id):
+        with self._lock:
+            return self._now(path).summary(game_id)
+
+    def count(self, route):
+        with self._lock:
+            self.counts[route] = self.counts.get(route, 0) + 1
+
+    def snapshot_counts(self):
+        with self._lock:
+            return dict(self.counts)
+
+    def serve(self, port=0):
+        fake = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                url = urlsplit(self.path)
+                parts = url.path.rstrip("/").split("/")
+                query = parse_qs(url.query)
+                body = None
+                if len(parts) >= 2 and parts[-2] in fake.sims:
+                    if parts[-1] == "scoreboard":
+                        fake.count(parts[-2] + " scoreboard")
+                        body = fake.scoreboard(parts[-2])
+                    elif parts[-1] == "summary":
+                        fake.count(parts[-2] + " summary")
+                        body = fake.summary(parts[-2], query.get("event", [""])[0])
+                data = json.dumps(body).encode() if body is not None else b'{"error":"not found"}'
+                self.send_response(200 if body is not None else 404)
+                self.send_header("Content-Type", "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def log_message(self, *args):
+                pass
+
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+        self.server.daemon_threads = True
+        threading.Thread(target=self.server.serve_forever, name="fake-espn", daemon=True).start()
+        return "http://127.0.0.1:" + str(self.server.server_address[1]) + "/apis/site/v2/sports/basketball/"
+
+
+# ══════════════════════════════════════════════════════════════════════
+# WORKER — one process, N sessions of one app
+# ══════════════════════════════════════════════════════════════════════
+
+def rss_mb():
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE") / 1e6
+    except (OSError, ValueError, AttributeError):
+        import resource
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1e3
+
+
+def run_session(app, key, refresh, latencies, errors, stop_at):
+    from streamlit.testing.v1 import AppTest
+    at = AppTest.from_file(os.path.join(HERE, app), default_timeout=120)
+    at.query_params["key"] = key
+    time.sleep(random.uniform(0, refresh))     # sessions don't all land on the same second
+    while time.time() < stop_at:
+        started = time.perf_counter()
+        try:
+            at.run()
+            if at.exception:
+                errors.append(str(at.exception[0].value)[:200])
+        except Exception as e:
+            errors.append(repr(e)[:200])
+        latencies.append(time.perf_counter() - started)
+        time.sleep(max(0.0, refresh - (time.perf_counter() - started)))
+
+
+def worker(app, n, key, duration, refresh):
+    base_rss = rss_mb()
+    cpu0 = os.times()
+    latencies, errors = [], []
+    stop_at = time.time() + duration
+    threads = [threading.Thread(target=run_session, args=(app, key, refresh, latencies, errors, stop_at),
+                                daemon=True) for _ in range(n)]
+    for t in threads:
+        t.start()
+    peak = base_rss
+    while any(t.is_alive() for t in threads):
+        peak = max(peak, rss_mb())
+        time.sleep(0.5)
+    cpu1 = os.times()
+    from sharkfetch import ESPN
+    cpu = (cpu1.user - cpu0.user) + (cpu1.system - cpu0.system)
+    return {"reruns": len(latencies), "latencies": latencies, "errors": errors[:5], "error_count": len(errors),
+            "cpu_s": cpu, "base_rss": base_rss, "peak_rss": peak, "fetch_stats": ESPN.stats}
+
+
+# ══════════════════════════════════════════════════════════════════════
+# DRIVER
+# ══════════════════════════════════════════════════════════════════════
+
+def pct(values, p):
+    if not values:
+        return 0.0
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))]
+
+
+def arg(argv, name, default):
+    return argv[argv.index(name) + 1] if name in argv else default
+
+
+def main(argv):
+    if "--worker" in argv:
+        res = worker(arg(argv, "--app", "shark.py"), int(arg(argv, "--worker", "1")), arg(argv, "--key", DEFAULT_KEY),
+                     float(arg(argv, "--duration", "60")), float(arg(argv, "--refresh", "30")))
+        print("RESULT " + json.dumps(res))
+        return
+    apps = arg(argv, "--app", "shark.py,ncaashark.py").split(",")
+    levels = [int(x) for x in arg(argv, "--sessions", "1,5,10,25").split(",")]
+    duration = arg(argv, "--duration", "60")
+    refresh = arg(argv, "--refresh", "30")
+    key = arg(argv, "--key", DEFAULT_KEY)
+    if not key:
+        print("sharkload: pass --key (or set SHARK_LOAD_KEY) to the app's access key")
+        sys.exit(2)
+    fake = FakeESPN(games=int(arg(argv, "--games", "12")), seed=int(arg(argv, "--seed", "7")))
+    base = fake.serve()
+    print("fake ESPN at " + base + " | " + duration + "s per level, rerun every " + refresh + "s")
+    print("app            N  reruns   p50 ms   p90 ms   p99 ms   max ms  cpu s/sess  rss MB/sess  "
+          "upstream/min  errors")
+    for app in apps:
+        for n in levels:
+            env = dict(os.environ, SHARK_ESPN_BASE=base, SHARK_STATE_DIR=tempfile.mkdtemp(prefix="sharkload-"))
+            before = fake.snapshot_counts()
+            started = time.time()
+            out = subprocess.run([sys.executable, os.path.abspath(__file__), "--worker", str(n), "--app", app,
+                                  "--key", key, "--duration", duration, "--refresh", refresh],
+                                 env=env, cwd=HERE, capture_output=True, text=True)
+            elapsed = time.time() - started
+            line = [l for l in out.stdout.splitlines() if l.startswith("RESULT ")]
+            if not line:
+                print(app.ljust(12) + str(n).rjust(4) + "  worker failed: " + out.stderr.strip()[-300:])
+                continue
+            res = json.loads(line[-1][7:])
+            after = fake.snapshot_counts()
+            upstream = sum(after.values()) - sum(before.values())
+            lat = [x * 1000 for x in res["latencies"]]
+            print(app.ljust(12) + str(n).rjust(4) + str(res["reruns"]).rjust(8) +
+                  "".join("{:9.0f}".format(v) for v in (pct(lat, 0.5), pct(lat, 0.9), pct(lat, 0.99), max(lat or [0]))) +
+                  "{:12.2f}".format(res["cpu_s"] / n) +
+                  "{:13.1f}".format((res["peak_rss"] - res["base_rss"]) / n) +
+                  "{:14.1f}".format(upstream / elapsed * 60) +
+                  str(res["error_count"]).rjust(8))
+            for route in sorted(after):
+                delta = after[route] - before.get(route, 0)
+                if delta:
+                    print("                  " + route + ": " + str(delta))
+            for e in res["errors"]:
+                print("                  error: " + e)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,214 @@
+"""
+sharkpace.py — BigSnapshot team pace priors
+The poller appends every final it sees to a per-league finals log; the
+offline build turns that log into a compact per-team index of offensive and
+defensive scoring rates (points per minute, shrunk toward the league rate).
+League.projection blends live pace with the matchup's expected total from
+this index instead of one league-wide constant.
+
+Build:  python sharkpace.py build [nba] [ncaa]
+Show:   python sharkpace.py show nba
+"""
+
+import json, os, struct, sys, threading
+from array import array
+
+from sharkstate import STATE_DIR
+
+PRIOR_GAMES = 8             # shrinkage: each team starts with this many league-average games
+PACE_MAGIC = b"PACE"
+PACE_FORMAT = 1
+PACE_HEADER = struct.Struct("<4sIIf")   # magic | format | teams | league rate
+
+
+def finals_path(league_key):
+    return os.path.join(STATE_DIR, league_key + ".finals.jsonl")
+
+
+def index_path(league_key):
+    return os.path.join(STATE_DIR, league_key + ".pace")
+
+
+# ══════════════════════════════════════════════════════════════════════
+# FINALS LOG — written by the poller
+# ══════════════════════════════════════════════════════════════════════
+
+class FinalsLog:
+
+    def __init__(self, league, path=None):
+        self.league = league
+        self.path = path or finals_path(league.key)
+        self._lock = threading.Lock()
+        self._seen = None
+
+    def _load_seen(self):
+        seen = set()
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                for line in f:
+                    try:
+                        seen.add(json.loads(line)["id"])
+                    except (ValueError, KeyError):
+                        continue
+        except OSError:
+            pass
+        return seen
+
+    def record(self, games):
+        # Appends finals not logged before; returns how many were new.
+        finals = [g for g in games if g["state"] == "post" and g.get("home_id") and g.get("away_id")]
+        if not finals:
+            return 0
+        with self._lock:
+            if self._seen is None:
+                self._seen = self._load_seen()
+            lines = []
+            for g in finals:
+                if g["id"] in self._seen:
+                    continue
+                self._seen.add(g["id"])
+                lines.append(json.dumps({
+                    "id": g["id"], "home_id": g["home_id"], "away_id": g["away_id"],
+                    "home_score": g["home_score"], "away_score": g["away_score"],
+                    "minutes": self.league.total_game_minutes(g["period"]),
+                }, separators=(",", ":")))
+            if lines:
+                try:
+                    os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                    with open(self.path, "a", encoding="utf-8") as f:
+                        f.write("\n".join(lines) + "\n")
+                except OSError:
+                    pass
+            return len(lines)
+
+    def forget(self, game_ids):
+        # Slate eviction hook: these games will not be seen again.
+        with self._lock:
+            if self._seen is not None:
+                self._seen -= set(game_ids)
+
+
+# ══════════════════════════════════════════════════════════════════════
+# PACE INDEX — compact arrays, O(1) lookup per game
+# ══════════════════════════════════════════════════════════════════════
+
+class PaceIndex:
+    # rates holds (offense, defense) points-per-minute pairs, one per slot;
+    # slots maps ESPN team id -> slot. Unknown teams get the league rate.
+
+    def __init__(self, slots, rates, league_rate):
+        self.slots = slots
+        self.rates = rates
+        self.league_rate = league_rate
+
+    @classmethod
+    def load(cls, league_key, path=None):
+        try:
+            with open(path or index_path(league_key), "rb") as f:
+                blob = f.read()
+            magic, fmt, n, lg = PACE_HEADER.unpack_from(blob, 0)
+            if magic != PACE_MAGIC or fmt != PACE_FORMAT:
+                return None
+            ids = array("I")
+            ids.frombytes(blob[PACE_HEADER.size:PACE_HEADER.size + 4 * n])
+            rates = array("f")
+            rates.frombytes(blob[PACE_HEADER.size + 4 * n:PACE_HEADER.size + 12 * n])
+        except (OSError, struct.error, ValueError):
+            return None
+        if len(ids) != n or len(rates) != 2 * n or lg <= 0:
+            return None
+        return cls({str(t): i for i, t in enumerate(ids)}, rates, lg)
+
+    def team(self, team_id):
+        i = self.slots.get(team_id)
+        if i is None:
+            return self.league_rate, self.league_rate
+        return self.rates[2 * i], self.rates[2 * i + 1]
+
+    def expected_total(self, home_id, away_id, game_minutes):
+        h_off, h_def = self.team(home_id)
+        a_off, a_def = self.team(away_id)
+        lg = self.league_rate
+        return (h_off * a_def + a_off * h_def) / lg * game_minutes
+
+    def save(self, path):
+        ids = array("I", [0] * len(self.slots))
+        for t, i in self.slots.items():
+            ids[i] = int(t)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        tmp = path + ".tmp"
+        with open(tmp, "wb") as f:
+            f.write(PACE_HEADER.pack(PACE_MAGIC, PACE_FORMAT, len(ids), self.league_rate))
+            f.write(ids.tobytes())
+            f.write(self.rates.tobytes())
+        os.replace(tmp, path)
+
+
+def build_index(finals, game_minutes, league_avg_total, prior_games=PRIOR_GAMES):
+    # finals: iterable of finals-log dicts. Rates are points per minute for
+    # one team; the league rate falls back to league_avg_total when empty.
+    scored, allowed, minutes = {}, {}, {}
+    pts = mins = 0.0
+    for g in finals:
+        m = float(g["minutes"])
+        if m <= 0:
+            continue
+        for team, pf, pa in ((g["home_id"], g["home_score"], g["away_score"]),
+                             (g["away_id"], g["away_score"], g["home_score"])):
+            if not str(team).isdigit():
+                continue
+            scored[team] = scored.get(team, 0.0) + pf
+            allowed[team] = allowed.get(team, 0.0) + pa
+            minutes[team] = minutes.get(team, 0.0) + m
+        pts += g["home_score"] + g["away_score"]
+        mins += m
+    lg = pts / (2 * mins) if mins else league_avg_total / (2.0 * game_minutes)
+    k = prior_games * game_minutes
+    slots = {}
+    rates = array("f")
+    for team in sorted(minutes, key=int):
+        slots[team] = len(slots)
+        rates.append((scored[team] + k * lg) / (minutes[team] + k))
+        rates.append((allowed[team] + k * lg) / (minutes[team] + k))
+    return PaceIndex(slots, rates, lg)
+
+
+def read_finals(path):
+    finals = []
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    finals.append(json.loads(line))
+                except ValueError:
+                    continue
+    except OSError:
+        pass
+    return finals
+
+
+def main(argv):
+    from sharkcore import LEAGUES
+    cmd = argv[0] if argv else "build"
+    keys = argv[1:] or list(LEAGUES)
+    for k in keys:
+        league = LEAGUES[k]
+        if cmd == "build":
+            finals = read_finals(finals_path(k))
+            idx = build_index(finals, league.game_minutes, league.league_avg_total)
+            idx.save(index_path(k))
+            print(k + ": " + str(len(finals)) + " finals, " + str(len(idx.slots)) + " teams, league "
+                  + str(round(idx.league_rate * 2 * league.game_minutes, 1)) + " pts/game -> " + index_path(k))
+        elif cmd == "show":
+            idx = PaceIndex.load(k)
+            if idx is None:
+                print(k + ": no index at " + index_path(k))
+                continue
+            for t in sorted(idx.slots, key=lambda t: -sum(idx.team(t))):
+                off, dfn = idx.team(t)
+                print(k + " " + t.rjust(6) + "  off " + str(round(off * league.game_minutes, 1))
+                      + "  def " + str(round(dfn * league.game_minutes, 1)))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,126 @@
+"""
+sharkparse.py — BigSnapshot field-projected ESPN summary parser
+Pulls only the play fields the scanners use (and, optionally, boxscore team
+fouls) straight from the summary response bytes. With ijson installed the
+document is streamed by its C backend and boxscore/leaders/news/odds history
+never become Python objects; without it we fall back to json.loads.
+"""
+
+import json
+from io import BytesIO
+
+try:
+    import ijson
+except ImportError:
+    ijson = None
+
+FOUL_STATS = ("fouls", "teamFouls", "totalFouls")
+
+
+def project_play(item):
+    period = item.get("period") or {}
+    clock = item.get("clock") or {}
+    team = item.get("team") or {}
+    ptype = item.get("type") or {}
+    return {
+        "id": str(item.get("id", "")),
+        "text": item.get("text", ""),
+        "period": int(period.get("number", 0) or 0),
+        "clock": clock.get("displayValue", ""),
+        "score": int(item.get("scoreValue", 0) or 0),
+        "team_id": str(team.get("id", "")),
+        "type": ptype.get("text", ""),
+    }
+
+
+def project_team_fouls(team_item):
+    team_id = str((team_item.get("team") or {}).get("id", ""))
+    for stat in team_item.get("statistics", []) or []:
+        if stat.get("name") in FOUL_STATS:
+            try:
+                return team_id, int(float(stat.get("displayValue", 0) or 0))
+            except (ValueError, TypeError):
+                return team_id, None
+    return team_id, None
+
+
+# ijson prefix -> (play field, convert) for the one-pass event parser.
+PLAY_FIELDS = {
+    "plays.item.id": ("id", str),
+    "plays.item.text": ("text", lambda v: v),
+    "plays.item.period.number": ("period", lambda v: int(v or 0)),
+    "plays.item.clock.displayValue": ("clock", lambda v: v),
+    "plays.item.scoreValue": ("score", lambda v: int(v or 0)),
+    "plays.item.team.id": ("team_id", str),
+    "plays.item.type.text": ("type", lambda v: v),
+}
+EMPTY_PLAY = {"id": "", "text": "", "period": 0, "clock": "", "score": 0, "team_id": "", "type": ""}
+
+
+def stream_summary(raw, fouls):
+    # One ijson.parse pass: scalar events under the projected prefixes fill
+    # flat play dicts directly; everything else is skipped as it streams by.
+    out = {"plays": [], "team_fouls": {}}
+    play = team_id = team_fouls = stat = None
+    for prefix, event, value in ijson.parse(BytesIO(raw), use_float=True):
+        field = PLAY_FIELDS.get(prefix)
+        if field is not None:
+            if play is not None and value is not None:
+                try:
+                    play[field[0]] = field[1](value)
+                except (ValueError, TypeError):
+                    pass
+        elif prefix == "plays.item":
+            if event == "start_map":
+                play = dict(EMPTY_PLAY)
+            elif event == "end_map":
+                out["plays"].append(play)
+                play = None
+        elif not fouls or not prefix.startswith("boxscore.teams.item"):
+            continue
+        elif prefix == "boxscore.teams.item":
+            if event == "start_map":
+                team_id, team_fouls = "", None
+            elif event == "end_map":
+                if team_id and team_fouls is not None and team_fouls >= 0:
+                    out["team_fouls"][team_id] = team_fouls
+        elif prefix == "boxscore.teams.item.team.id":
+            team_id = str(value)
+        elif prefix == "boxscore.teams.item.statistics.item":
+            if event == "start_map":
+                stat = {}
+            elif event == "end_map":
+                if team_fouls is None and stat.get("name") in FOUL_STATS:
+                    try:
+                        team_fouls = int(float(stat.get("displayValue", 0) or 0))
+                    except (ValueError, TypeError):
+                        team_fouls = -1
+                stat = None
+        elif stat is not None and prefix in ("boxscore.teams.item.statistics.item.name",
+                                             "boxscore.teams.item.statistics.item.displayValue"):
+            stat[prefix.rsplit(".", 1)[1]] = value
+    return out
+
+
+def project_summary(raw, fouls=False):
+    # raw: summary response bytes. Returns {"plays": [...], "team_fouls": {id: n}}
+    # (team_fouls only filled when fouls=True and the boxscore carries them).
+    if ijson is not None:
+        return stream_summary(raw, fouls)
+    out = {"plays": [], "team_fouls": {}}
+    data = json.loads(raw)
+    out["plays"] = [project_play(item) for item in data.get("plays", [])]
+    if fouls:
+        for team_item in (data.get("boxscore") or {}).get("teams", []):
+            team_id, n = project_team_fouls(team_item)
+            if team_id and n is not None:
+                out["team_fouls"][team_id] = n
+    return out
+
+
+def parse_summary_plays(raw):
+    return project_summary(raw)["plays"]
+
+
+def parse_summary_full(raw):
+    return project_summary(raw, fouls=True)
@@ -0,0 +1,208 @@
+"""
+sharkpoller.py — BigSnapshot shared poller
+One process per league wins a file lock and polls ESPN on a fixed interval;
+each tick's scoreboard, derived metrics and scanner matrix are published to
+the league's SharedSnapshot for every shark.py / ncaashark.py worker to map.
+The leader also fetches game summaries, at most one every SUMMARY_SECONDS
+per game: SHARK-window games close enough for intentional fouling (they feed
+the late-game adjustment), and, only while the Parquet export or the replay
+recorder is on, other live games by urgency within SUMMARY_BUDGET a tick
+plus each game once more as it goes final.
+Workers start a Poller themselves (whoever gets the lock polls), or run one
+standalone:  python sharkpoller.py [nba] [ncaa]
+"""
+
+import os, sys, threading, time
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from sharkcore import LEAGUES, build_tick, fetch_games, get_slate
+from sharkexport import Exporter
+from sharkfetch import ESPN, FetchError
+from sharklate import FOUL_LEAD_MAX
+from sharklines import LineHistory
+from sharkpace import FinalsLog
+from sharkparse import parse_summary_full
+from sharkreplay import TickRecorder
+from sharksched import PlayScheduler
+from sharkstate import STATE_DIR, SharedSnapshot
+from sharkwatch import AlertEngine
+
+POLL_SECONDS = float(os.environ.get("SHARK_POLL_SECONDS", "15"))
+TICK_BUDGET = 12.0
+SUMMARY_SECONDS = 30.0      # shortest refetch interval for one game's summary
+SUMMARY_BUDGET = 4          # non-SHARK summary requests per tick (export/replay only)
+STALE_AFTER = POLL_SECONDS * 3
+
+
+class Poller:
+
+    def __init__(self, league, interval=POLL_SECONDS):
+        self.league = league
+        self.interval = interval
+        self.lock_path = os.path.join(STATE_DIR, league.key + ".lock")
+        self.snapshot = SharedSnapshot(league.key)
+        self.finals = FinalsLog(league)
+        self.lines = LineHistory(league.key)
+        self.export = Exporter(league)
+        self.recorder = TickRecorder(league)
+        self.alerts = AlertEngine(league)
+        self.sched = PlayScheduler(league.thresholds, league.shark_minutes, SUMMARY_BUDGET, interval)
+        self.summaries = {}     # game id -> latest parsed summary
+        self._summary_at = {}   # game id -> when it was last requested
+        self._closing = []      # finished games whose summary goes after this tick
+        get_slate(league).on_evict(self.sched.forget)
+        get_slate(league).on_evict(self.finals.forget)
+        get_slate(league).on_evict(self.export.forget)
+        get_slate(league).on_evict(self.recorder.forget)
+        get_slate(league).on_evict(self.alerts.forget)
+        get_slate(league).on_evict(self.forget)
+        self.is_leader = False
+        self.last_error = None
+        self.last_tick = None
+        self.tick_hooks = []
+        self._lock_fd = None
+        self._thread = None
+        self._guard = threading.Lock()
+        self._stop = threading.Event()
+
+    def ensure(self):
+        with self._guard:
+            if self._thread is not None and self._thread.is_alive():
+                return self
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="poller-" + self.league.key, daemon=True)
+            self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+
+    def forget(self, game_ids):
+        # Slate eviction hook. Only the leader writes the line log, so only
+        # the leader compacts it.
+        if self.is_leader:
+            self.lines.forget(game_ids)
+        for gid in game_ids:
+            self.summaries.pop(gid, None)
+            self._summary_at.pop(gid, None)
+
+    def _try_lead(self):
+        if fcntl is None:
+            # No flock means no way to elect one leader: stand by, and the
+            # workers fall back to fetching in-process.
+            self.last_error = "no file locking on this platform; standing by"
+            return False
+        if self._lock_fd is None:
+            os.makedirs(STATE_DIR, exist_ok=True)
+            self._lock_fd = os.open(self.lock_path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(self._lock_fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            return False
+        os.ftruncate(self._lock_fd, 0)
+        os.write(self._lock_fd, str(os.getpid()).encode())
+        return True
+
+    def _run(self):
+        while not self._stop.is_set():
+            if not self.is_leader:
+                self.is_leader = self._try_lead()
+                if not self.is_leader:
+                    self._stop.wait(self.interval)
+                    continue
+            started = time.monotonic()
+            self.tick()
+            self._stop.wait(max(0.0, self.interval - (time.monotonic() - started)))
+
+    def tick(self):
+        try:
+            return self._tick()
+        finally:
+            for hook in list(self.tick_hooks):
+                hook()
+
+    def _tick(self):
+        deadline = ESPN.deadline(TICK_BUDGET)
+        try:
+            games, stale_age = fetch_games(self.league, deadline)
+            summaries = self._fetch_summaries(games, deadline)
+        except FetchError as e:
+            self.last_error = str(e)
+            return None
+        except Exception as e:
+            self.last_error = "tick failed: " + str(e)
+            return None
+        tick = build_tick(self.league, games, stale_age, self.lines, summaries)
+        tick["poller_pid"] = os.getpid()
+        tick["alerts"] = self.alerts.evaluate(tick)
+        self.snapshot.publish(tick)
+        self.finals.record(games)
+        self.export.record(tick, summaries)
+        self.recorder.record(tick, summaries)
+        for gid in self._closing:
+            self.summaries.pop(gid, None)
+        self.last_error = None
+        self.last_tick = tick
+        return tick
+
+    def _fetch_summaries(self, games, deadline):
+        # Returns {game id: latest summary}. A failed fetch keeps the game's
+        # previous summary. Without export or recording the only requests are
+        # close SHARK-window games, two a minute each at most.
+        league = self.league
+        keep_plays = self.export.enabled or self.recorder.enabled
+        now = time.time()
+        ids, candidates, self._closing = [], [], []
+        for g in games:
+            due = now - self._summary_at.get(g["id"], 0.0) >= SUMMARY_SECONDS
+            if g["state"] == "post" and g["id"] in self.summaries:
+                if not keep_plays:
+                    self._closing.append(g["id"])
+                elif due:
+                    ids.append(g["id"])     # one last fetch for the closing plays
+                    self._closing.append(g["id"])
+            if g["state"] != "in" or not due:
+                continue
+            mins = g.get("minutes_elapsed", 0)
+            total = g["home_score"] + g["away_score"]
+            remaining = league.total_game_minutes(g["period"]) - mins
+            if remaining <= league.shark_minutes and abs(g["home_score"] - g["away_score"]) <= FOUL_LEAD_MAX:
+                ids.append(g["id"])
+            elif keep_plays:
+                candidates.append((g["id"], remaining, total, total / max(mins, 0.5)))
+        if candidates:
+            ids.extend(self.sched.plan(candidates))
+        jobs = [{"url": league.summary_url(gid), "parse": parse_summary_full, "route": "summary", "raw": True}
+                for gid in ids]
+        for gid, res in zip(ids, ESPN.fetch_many(jobs, deadline)):
+            self._summary_at[gid] = now
+            if not isinstance(res, FetchError):
+                self.summaries[gid] = res[0]
+        live = set(g["id"] for g in games if g["state"] in ("in", "post"))
+        for gid in [k for k in self.summaries if k not in live]:
+            del self.summaries[gid]
+        return dict(self.summaries)
+
+
+def main(argv):
+    keys = argv or list(LEAGUES)
+    pollers = [Poller(LEAGUES[k]).ensure() for k in keys]
+    print("sharkpoller: " + ", ".join(keys) + " every " + str(POLL_SECONDS) + "s -> " + STATE_DIR)
+    try:
+        while True:
+            time.sleep(POLL_SECONDS)
+            for p in pollers:
+                state = "leader" if p.is_leader else "standby"
+                err = " | " + p.last_error if p.last_error else ""
+                print(p.league.key + ": " + state + " v" + str(p.snapshot.version()) + err)
+    except KeyboardInterrupt:
+        for p in pollers:
+            p.stop()
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,209 @@
+"""
+sharkprof.py — BigSnapshot on-demand sampling profiler
+A background thread snapshots the stacks of the threads under study every few
+milliseconds (sys._current_frames, no tracing hooks, nothing to restart).
+A capture covers the next N script reruns in this process, or the next N
+poller ticks, plus the ESPN fetch threads working for them. Results land in
+STATE_DIR/profiles as a folded-stack file (flamegraph.pl, speedscope,
+inferno) and a top-functions summary.
+"""
+
+import os, sys, threading, time
+from collections import Counter
+
+from sharkstate import STATE_DIR
+
+PROFILE_DIR = os.path.join(STATE_DIR, "profiles")
+SAMPLE_INTERVAL = 0.005
+HELPER_THREADS = ("espn-fetch", "espn-fanout")
+TOP_N = 25
+IDLE_LEAF = "thread.py:_worker"     # pool thread blocked on its work queue
+BOOTSTRAP = ("threading.py:_bootstrap", "threading.py:_bootstrap_inner", "threading.py:run")
+MAX_SECONDS = 600           # a capture that never completes is cut off here
+
+
+def frame_label(code):
+    return os.path.basename(code.co_filename) + ":" + code.co_name
+
+
+class Capture:
+
+    def __init__(self, label, mode, count, interval=SAMPLE_INTERVAL, poller=None):
+        # mode "reruns": threads join via begin(); "poller": the thread named
+        # poller-<league> is sampled and tick_done() counts its ticks.
+        self.label = label
+        self.mode = mode
+        self.poller = poller
+        self.count = count
+        self.interval = interval
+        self.done_count = 0
+        self.samples = Counter()
+        self.total = 0
+        self.started = time.time()
+        self.finished = None
+        self.paths = None
+        self.summary = ""
+        self._threads = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="sharkprof", daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def active(self):
+        return self.finished is None
+
+    # ── Rerun / tick bookkeeping ─────────────────────────────────────
+
+    def begin(self):
+        # Reruns cut short by st.rerun()/st.stop() never reach end(); their
+        # script thread is gone (or starting over) by the next begin().
+        alive = set(t.ident for t in threading.enumerate())
+        tid = threading.get_ident()
+        with self._lock:
+            for old in [t for t in self._threads if t not in alive or t == tid]:
+                self._threads.discard(old)
+                self.done_count += 1
+            last = self.done_count >= self.count and not self._threads
+            if not last and self.done_count + len(self._threads) < self.count:
+                self._threads.add(tid)
+        if last:
+            self.finish()
+
+    def end(self):
+        with self._lock:
+            tid = threading.get_ident()
+            if tid not in self._threads:
+                return
+            self._threads.discard(tid)
+            self.done_count += 1
+            last = self.done_count >= self.count and not self._threads
+        if last:
+            self.finish()
+
+    def tick_done(self):
+        if not self.active():
+            return
+        with self._lock:
+            self.done_count += 1
+            last = self.done_count >= self.count
+        if last:
+            self.finish()
+
+    # ── Sampling ─────────────────────────────────────────────────────
+
+    def _wanted(self, tid, name):
+        if self.mode == "poller":
+            return name.startswith("poller-" + self.label) or name.startswith(HELPER_THREADS)
+        return tid in self._threads or (self._threads and name.startswith(HELPER_THREADS))
+
+    def _run(self):
+        me = threading.get_ident()
+        names = {}
+        n = 0
+        while not self._stop.is_set():
+            if n % 200 == 0:
+                names = {t.ident: t.name for t in threading.enumerate()}
+                if time.time() - self.started > MAX_SECONDS:
+                    self._stop.set()
+                    break
+            n += 1
+            for tid, frame in sys._current_frames().items():
+                if tid == me:
+                    continue
+                name = names.get(tid, "thread")
+                if not self._wanted(tid, name):
+                    continue
+                stack = []
+                while frame is not None:
+                    stack.append(frame_label(frame.f_code))
+                    frame = frame.f_back
+                if stack[0] == IDLE_LEAF:
+                    continue
+                if self.mode == "poller" and name.startswith("poller-") and "sharkpoller.py:tick" not in stack:
+                    continue    # sleeping between ticks
+                while stack and stack[-1] in BOOTSTRAP:
+                    stack.pop()
+                stack.append(name.rstrip("_0123456789"))
+                self.samples[tuple(reversed(stack))] += 1
+                self.total += 1
+            time.sleep(self.interval)
+        self._write()
+
+    def finish(self):
+        if self._stop.is_set():
+            return
+        self._stop.set()
+        self._thread.join(timeout=5)
+
+    # ── Output ───────────────────────────────────────────────────────
+
+    def _write(self):
+        own, cum = Counter(), Counter()
+        for stack, c in self.samples.items():
+            own[stack[-1]] += c
+            for fn in set(stack[1:]):
+                cum[fn] += c
+        lines = [self.label + " " + self.mode + ": " + str(self.done_count) + "/" + str(self.count) +
+                 " done, " + str(self.total) + " samples @ " + str(int(self.interval * 1000)) + "ms",
+                 "", "  self%   cum%  function"]
+        total = max(self.total, 1)
+        for fn, c in cum.most_common(TOP_N):
+            lines.append("{:6.1f} {:6.1f}  ".format(100.0 * own[fn] / total, 100.0 * c / total) + fn)
+        self.summary = "\n".join(lines)
+        stamp = time.strftime("%Y%m%d-%H%M%S")
+        base = os.path.join(PROFILE_DIR, self.label + "-" + self.mode + "-" + stamp)
+        try:
+            os.makedirs(PROFILE_DIR, exist_ok=True)
+            with open(base + ".folded", "w", encoding="utf-8") as f:
+                for stack, c in self.samples.most_common():
+                    f.write(";".join(stack) + " " + str(c) + "\n")
+            with open(base + ".txt", "w", encoding="utf-8") as f:
+                f.write(self.summary + "\n")
+            self.paths = (base + ".folded", base + ".txt")
+        except OSError:
+            self.paths = None
+        if self.poller is not None:
+            try:
+                self.poller.tick_hooks.remove(self.tick_done)
+            except ValueError:
+                pass
+        self.finished = time.time()
+
+
+# ══════════════════════════════════════════════════════════════════════
+# PROCESS-WIDE REGISTRY — one capture at a time per process
+# ══════════════════════════════════════════════════════════════════════
+
+_current = None
+_registry_lock = threading.Lock()
+
+
+def start_capture(label, mode, count, poller=None):
+    global _current
+    with _registry_lock:
+        if _current is not None and _current.active():
+            return _current
+        cap = Capture(label, mode, count, poller=poller)
+        if poller is not None:
+            poller.tick_hooks.append(cap.tick_done)
+        _current = cap.start()
+        return cap
+
+
+def current():
+    return _current
+
+
+def rerun_begin():
+    cap = _current
+    if cap is not None and cap.active() and cap.mode == "reruns":
+        cap.begin()
+
+
+def rerun_end():
+    cap = _current
+    if cap is not None and cap.active() and cap.mode == "reruns":
+        cap.end()
@@ -0,0 +1,313 @@
+"""
+sharkreplay.py — BigSnapshot recorded game days and time-travel replay
+The poller appends every published tick to STATE_DIR/replay/<league>/<day>.ticks
+(length-prefixed, zlib-compressed JSON) and a fixed-width time index
+<day>.idx of (ts, offset) pairs; new plays from the summaries the poller
+fetched go to <day>.plays as per-game deltas, and each tick records how many
+plays each game had and its boxscore team fouls. A ReplaySource answers
+fetch()/last_good() like sharkfetch.ESPN, from the tick under a playhead
+that runs at 1x-60x: seeking is a bisect over the index and one record
+read, never a pass from the start.
+
+List:  python sharkreplay.py [nba] [ncaa]
+"""
+
+import json, os, struct, sys, threading, time, zlib
+from array import array
+from bisect import bisect_right
+from collections import OrderedDict
+from urllib.parse import parse_qs, urlsplit
+
+from sharkfetch import FetchError
+from sharkstate import STATE_DIR
+
+REPLAY_DIR = os.path.join(STATE_DIR, "replay")
+RECORD_ENABLED = os.environ.get("SHARK_RECORD", "1") != "0"
+RECORD_HEADER = struct.Struct("<I")         # compressed length
+INDEX_ENTRY = struct.Struct("<dQ")          # tick ts | offset into .ticks
+SPEEDS = (1, 2, 5, 10, 30, 60)
+OPEN_RECORDINGS = 8
+
+
+def day_path(league_key, day, ext, root=None):
+    return os.path.join(root or REPLAY_DIR, league_key, str(day) + ext)
+
+
+def recorded_days(league_key, root=None):
+    try:
+        names = os.listdir(os.path.join(root or REPLAY_DIR, league_key))
+    except OSError:
+        return []
+    days = []
+    for n in names:
+        if n.endswith(".idx") and os.path.getsize(os.path.join(root or REPLAY_DIR, league_key, n)) > 0:
+            days.append(n[:-4])
+    return sorted(days, reverse=True)
+
+
+# ══════════════════════════════════════════════════════════════════════
+# RECORDER — written by the poller
+# ══════════════════════════════════════════════════════════════════════
+
+class TickRecorder:
+
+    def __init__(self, league, root=None):
+        self.league = league
+        self.root = root or REPLAY_DIR
+        self.enabled = RECORD_ENABLED
+        self.last_error = None
+        self._day = None
+        self._cursor = {}       # game id -> plays already written
+        self._lock = threading.Lock()
+
+    def record(self, tick, summaries=None):
+        # summaries: {game id: parsed summary} the poller fetched this tick.
+        if not self.enabled:
+            return
+        day = self.league.slate_day()
+        with self._lock:
+            if day != self._day:
+                self._day = day
+                self._cursor = {}
+            counts, fouls, deltas = {}, {}, []
+            for gid, summary in (summaries or {}).items():
+                if summary.get("team_fouls"):
+                    fouls[gid] = summary["team_fouls"]
+                plays = summary.get("plays")
+                if not plays:
+                    continue
+                start = self._cursor.get(gid, 0)
+                if start > len(plays):
+                    start = 0
+                if start < len(plays):
+                    deltas.append(json.dumps({"id": gid, "from": start, "plays": plays[start:]},
+                                             separators=(",", ":")))
+                self._cursor[gid] = counts[gid] = len(plays)
+            record = dict(tick, play_counts=counts, team_fouls=fouls)
+            blob = zlib.compress(json.dumps(record, separators=(",", ":")).encode(), 6)
+            try:
+                os.makedirs(os.path.join(self.root, self.league.key), exist_ok=True)
+                if deltas:
+                    with open(day_path(self.league.key, day, ".plays", self.root), "a", encoding="utf-8") as f:
+                        f.write("\n".join(deltas) + "\n")
+                with open(day_path(self.league.key, day, ".ticks", self.root), "ab") as f:
+                    offset = f.tell()
+                    f.write(RECORD_HEADER.pack(len(blob)) + blob)
+                # Index last: an entry only ever points at a complete record.
+                with open(day_path(self.league.key, day, ".idx", self.root), "ab") as f:
+                    f.write(INDEX_ENTRY.pack(tick["ts"], offset))
+                self.last_error = None
+            except OSError as e:
+                self.last_error = "recording failed: " + str(e)
+
+    def forget(self, game_ids):
+        # Slate eviction hook.
+        with self._lock:
+            for gid in game_ids:
+                self._cursor.pop(gid, None)
+
+
+# ══════════════════════════════════════════════════════════════════════
+# RECORDING — time index over one league day
+# ══════════════════════════════════════════════════════════════════════
+
+class Recording:
+    # Shared by every session replaying the same day. The index stays in
+    # memory (16 bytes a tick) and grows incrementally while today records.
+
+    def __init__(self, league_key, day, root=None):
+        self.league_key = league_key
+        self.day = day
+        self.ticks_path = day_path(league_key, day, ".ticks", root)
+        self.idx_path = day_path(league_key, day, ".idx", root)
+        self.plays_path = day_path(league_key, day, ".plays", root)
+        self.ts = array("d")
+        self.offsets = array("Q")
+        self._idx_size = 0
+        self._plays = None
+        self._plays_size = 0
+        self._last = (None, None)       # (position, decoded tick)
+        self._lock = threading.Lock()
+        self.refresh()
+
+    def refresh(self):
+        # Picks up index entries appended since the last call.
+        try:
+            with open(self.idx_path, "rb") as f:
+                f.seek(self._idx_size)
+                data = f.read()
+        except OSError:
+            return
+        n = len(data) // INDEX_ENTRY.size
+        with self._lock:
+            for ts, offset in INDEX_ENTRY.iter_unpack(data[:n * INDEX_ENTRY.size]):
+                self.ts.append(ts)
+                self.offsets.append(offset)
+            self._idx_size += n * INDEX_ENTRY.size
+
+    def start(self):
+        return self.ts[0] if self.ts else None
+
+    def end(self):
+        return self.ts[-1] if self.ts else None
+
+    def position(self, ts):
+        # Index of the last tick at or before ts (the first tick before start).
+        return max(bisect_right(self.ts, ts) - 1, 0)
+
+    def tick_at(self, ts):
+        if not self.ts:
+            return None
+        i = self.position(ts)
+        with self._lock:
+            if self._last[0] == i:
+                return self._last[1]
+        with open(self.ticks_path, "rb") as f:
+            f.seek(self.offsets[i])
+            (n,) = RECORD_HEADER.unpack(f.read(RECORD_HEADER.size))
+            tick = json.loads(zlib.decompress(f.read(n)))
+        with self._lock:
+            self._last = (i, tick)
+        return tick
+
+    def plays(self, game_id, count):
+        # The game's first `count` plays. The plays file is read once and then
+        # only its new tail, so a seek costs a slice.
+        with self._lock:
+            if self._plays is None:
+                self._plays = {}
+            try:
+                with open(self.plays_path, "rb") as f:
+                    f.seek(self._plays_size)
+                    data = f.read()
+            except OSError:
+                data = b""
+            end = data.rfind(b"\n") + 1
+            self._plays_size += end
+            for line in data[:end].splitlines():
+                try:
+                    delta = json.loads(line)
+                except ValueError:
+                    continue
+                plays = self._plays.setdefault(delta["id"], [])
+                del plays[delta["from"]:]
+                plays.extend(delta["plays"])
+            return self._plays.get(game_id, [])[:count]
+
+
+_recordings = OrderedDict()
+_recordings_lock = threading.Lock()
+
+
+def open_recording(league_key, day):
+    with _recordings_lock:
+        rec = _recordings.pop((league_key, day), None)
+        if rec is None:
+            rec = Recording(league_key, day)
+        _recordings[(league_key, day)] = rec
+        while len(_recordings) > OPEN_RECORDINGS:
+            _recordings.popitem(last=False)
+    rec.refresh()
+    return rec
+
+
+# ══════════════════════════════════════════════════════════════════════
+# REPLAY SOURCE — the fetch interface over a playhead
+# ══════════════════════════════════════════════════════════════════════
+
+class ReplaySource:
+    # One per session. The playhead is (base ts, wall-clock anchor, speed);
+    # position() is computed on demand, nothing runs in the background.
+
+    def __init__(self, recording, speed=1):
+        self.recording = recording
+        self.speed = speed
+        self.playing = False
+        self.base = recording.start()
+        self.anchor = time.time()
+
+    def position(self):
+        # None until the recording has its first tick.
+        if self.base is None:
+            self.base = self.recording.start()
+            if self.base is None:
+                return None
+        pos = self.base
+        if self.playing:
+            pos += (time.time() - self.anchor) * self.speed
+        end = self.recording.end()
+        if end is not None and pos >= end:
+            pos = end
+        return pos
+
+    def seek(self, ts):
+        start, end = self.recording.start(), self.recording.end()
+        if start is None:
+            return
+        self.base = min(max(ts, start), end)
+        self.anchor = time.time()
+
+    def set_speed(self, speed):
+        self.base = self.position()
+        self.anchor = time.time()
+        self.speed = speed
+
+    def play(self):
+        self.recording.refresh()
+        if self.position() is None:
+            return
+        if self.position() >= self.recording.end():
+            self.base = self.recording.start()
+        self.anchor = time.time()
+        self.playing = True
+
+    def pause(self):
+        self.base = self.position()
+        self.playing = False
+
+    def tick(self):
+        # The recorded tick under the playhead, shaped like a live one.
+        tick = self.recording.tick_at(self.position())
+        if tick is None:
+            raise FetchError("nothing recorded for " + self.recording.league_key + " " + str(self.recording.day))
+        return tick
+
+    def fetch(self, url, parse=None, deadline=None, route="default", key=None, raw=False):
+        # Summary URLs only: the plays the game had at the playhead.
+        game_id = parse_qs(urlsplit(url).query).get("event", [""])[0]
+        tick = self.tick()
+        count = tick.get("play_counts", {}).get(game_id)
+        if count is None:
+            raise FetchError("no plays recorded for " + game_id)
+        return {"plays": self.recording.plays(game_id, count),
+                "team_fouls": tick.get("team_fouls", {}).get(game_id, {})}, None
+
+    def last_good(self, key):
+        # Aged by how far the playhead has run past the recorded tick.
+        try:
+            data = self.fetch(key)[0]
+        except FetchError:
+            return None, None
+        return data, max(self.position() - self.tick()["ts"], 0.0)
+
+    def describe(self):
+        return "Replay " + str(self.recording.day) + " @ " + str(self.speed) + "x" + \
+            ("" if self.playing else " (paused)")
+
+
+def main(argv):
+    keys = argv or ["nba", "ncaa"]
+    for k in keys:
+        days = recorded_days(k)
+        if not days:
+            print(k + ": nothing recorded under " + os.path.join(REPLAY_DIR, k))
+        for day in days:
+            rec = Recording(k, day)
+            span = (rec.end() - rec.start()) / 3600.0 if rec.ts else 0.0
+            size = os.path.getsize(rec.ticks_path) if os.path.exists(rec.ticks_path) else 0
+            print(k + " " + day + ": " + str(len(rec.ts)) + " ticks over " + "{:.1f}".format(span) + "h, "
+                  + "{:.1f}".format(size / 1e6) + " MB")
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
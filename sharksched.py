@@ -0,0 +1,85 @@
+"""
+sharksched.py — BigSnapshot play-by-play poll scheduler
+Ranks live games by urgency (minutes remaining, distance from the projected
+final to the nearest threshold, recent scoring) and spends a fixed summary
+request budget per tick on the most urgent games first.
+"""
+
+import math, threading, time
+
+TICK_SECONDS = 30           # one autorefresh cycle
+TICK_BUDGET = 12            # summary requests per tick, whole process
+MIN_INTERVAL = 10.0         # most urgent game: poll at most this often
+MAX_INTERVAL = 180.0        # least urgent game: poll at least this often
+NEAR_SCALE = 3.0            # points from a threshold that count as "close"
+CHANGE_DECAY = 60.0         # seconds a score change keeps boosting priority
+W_TIME, W_NEAR, W_CHANGE = 0.5, 0.3, 0.2
+
+
+class PlayScheduler:
+
+    def __init__(self, thresholds, shark_minutes, budget=TICK_BUDGET, tick=TICK_SECONDS):
+        self.thresholds = list(thresholds)
+        self.shark_minutes = shark_minutes
+        self.budget = budget
+        self.tick = tick
+        self._lock = threading.Lock()
+        self._last_poll = {}
+        self._last_total = {}
+        self._last_change = {}
+        self._window_start = 0.0
+        self._spent = 0
+
+    def urgency(self, gid, remaining, total, pace, now=None):
+        now = now or time.time()
+        if remaining <= self.shark_minutes:
+            time_u = 1.0
+        else:
+            time_u = self.shark_minutes / max(remaining, 0.1)
+        proj_final = total + max(remaining, 0.0) * pace
+        dist = min(abs(proj_final - t) for t in self.thresholds) if self.thresholds else 99.0
+        near = 1.0 / (1.0 + dist / NEAR_SCALE)
+        changed_at = self._last_change.get(gid)
+        recent = math.exp(-(now - changed_at) / CHANGE_DECAY) if changed_at else 0.0
+        return W_TIME * time_u + W_NEAR * near + W_CHANGE * recent
+
+    def interval(self, urgency):
+        return MIN_INTERVAL + (MAX_INTERVAL - MIN_INTERVAL) * (1.0 - min(urgency, 1.0))
+
+    def plan(self, candidates, now=None):
+        # candidates: iterable of (gid, remaining, total, pace). Returns the ids
+        # to poll this rerun, most urgent first, within the tick's budget.
+        now = now or time.time()
+        with self._lock:
+            due = []
+            for gid, remaining, total, pace in candidates:
+                prev = self._last_total.get(gid)
+                if prev is not None and prev != total:
+                    self._last_change[gid] = now
+                self._last_total[gid] = total
+                u = self.urgency(gid, remaining, total, pace, now)
+                last = self._last_poll.get(gid)
+                waited = now - last if last is not None else float("inf")
+                if waited >= self.interval(u):
+                    due.append((u, waited, gid))
+            if now - self._window_start >= self.tick:
+                self._window_start = now
+                self._spent = 0
+            due.sort(key=lambda x: (x[0], x[1]), reverse=True)
+            picked = [gid for _, _, gid in due[:max(self.budget - self._spent, 0)]]
+            for gid in picked:
+                self._last_poll[gid] = now
+            self._spent += len(picked)
+            return picked
+
+    def last_polled(self, gid):
+        with self._lock:
+            return self._last_poll.get(gid)
+
+    def forget(self, game_ids):
+        # Slate eviction hook. A game missing from one session's candidates
+        # (filtered, or a shard not yet merged) keeps its poll history.
+        with self._lock:
+            for gid in game_ids:
+                for d in (self._last_poll, self._last_total, self._last_change):
+                    d.pop(gid, None)
@@ -0,0 +1,320 @@
+"""
+sharksim.py — BigSnapshot deterministic game-clock simulator
+Seeded, possession-by-possession games for either league config: periods
+and breaks, overtime on a tie, team tempo, scoring runs, shooting and
+bonus fouls, free throws and late intentional fouling, with ESPN-style
+clocks ("7:42", then "45.3" under a minute). A Simulator serves ESPN-shaped
+scoreboard and summary JSON at any virtual time, so the whole pipeline
+(parse_scoreboard, derive/ladder/scan, parse_summary_full) can be run at
+1,000 simultaneous games. Same seed and time, same bytes.
+
+Bench:   python sharksim.py bench [--league ncaa] [--games 1000] [--ticks 40]
+                                  [--step 15] [--seed 7]
+Digest:  python sharksim.py digest [--league nba] [--games 100] [--at 3600]
+sharkload.py serves the same simulator over HTTP for the app load test.
+"""
+
+import hashlib, json, random, sys, time
+
+from sharklate import LATE_RULES
+
+PTS_PER_POSS = 0.96         # combined average, used to set possession length
+STOPPAGE = (1.7, 2.5)       # wall seconds per game-clock second, per game
+FT_SECONDS = 25             # wall time a free-throw trip takes
+PERIOD_BREAK = 130
+HALFTIME = 900
+RUN_CHANCE = 0.04           # per possession: a scoring run starts
+RUN_BOOST = 0.12
+FOUL_LEAD_MAX = 8           # trailing by more than this, teams stop fouling
+LEAGUE_OFFSET = {"nba": 401900000, "ncaa": 401950000}
+
+# kind codes stored per play -> ESPN type text
+PLAY_TYPES = ["Jump Shot", "Three Point Jumper", "Free Throw - 1 of 2", "Free Throw - 2 of 2",
+              "Shooting Foul", "Personal Foul", "Lost Ball Turnover", "Defensive Rebound",
+              "Offensive Rebound", "End Period"]
+JUMPER, THREE, FT1, FT2, SHOOT_FOUL, FOUL, TURNOVER, DREB, OREB, END = range(10)
+MADE = {JUMPER: "made Jumper", THREE: "made Three Point Jumper", FT1: "made Free Throw 1 of 2",
+        FT2: "made Free Throw 2 of 2"}
+MISSED = {JUMPER: "missed Jumper", THREE: "missed Three Point Jumper", FT1: "missed Free Throw 1 of 2",
+          FT2: "missed Free Throw 2 of 2"}
+
+
+def display_clock(secs):
+    if secs >= 60:
+        return str(int(secs // 60)) + ":" + "{:02d}".format(int(secs % 60))
+    return "{:.1f}".format(secs) if secs > 0 else "0:00"
+
+
+class SimGame:
+    # Events are generated lazily up to the requested wall time; the rng is
+    # per game, so a game's stream does not depend on how often it is asked.
+
+    def __init__(self, league, n, seed, tip):
+        self.league = league
+        self.n = n
+        self.id = str(LEAGUE_OFFSET.get(league.key, 401990000) + n)
+        self.rng = random.Random(seed * 1000003 + LEAGUE_OFFSET.get(league.key, 0) + n)
+        rng = self.rng
+        self.team_ids = (str(2 * n + 1 + (0 if league.key == "nba" else 50000)),
+                         str(2 * n + 2 + (0 if league.key == "nba" else 50000)))
+        self.tip = tip
+        self.stoppage = rng.uniform(*STOPPAGE)
+        self.tempo = rng.uniform(0.88, 1.12)
+        self.skill = (rng.uniform(-0.04, 0.04), rng.uniform(-0.04, 0.04))
+        self.ft_pct = (rng.uniform(0.68, 0.82), rng.uniform(0.68, 0.82))
+        self.over_under = round(league.league_avg_total * self.tempo * (1 + sum(self.skill)) * 2) / 2.0 + \
+            rng.choice([-0.5, 0.5])
+        self.spread = round((self.skill[0] - self.skill[1]) * 60 * 2) / 2.0 + 0.5
+        ppm = league.league_avg_total / float(league.game_minutes)
+        self.poss_seconds = 60.0 * PTS_PER_POSS / ppm / self.tempo
+        self.bonus_at = LATE_RULES.get(league.key, LATE_RULES["nba"])[0]
+        self.period = 1
+        self.clock = league.period_minutes * 60.0
+        self.score = [0, 0]
+        self.fouls = [0, 0]             # this period
+        self.game_fouls = [0, 0]
+        self.poss = rng.randint(0, 1)
+        self.run = (0, 0)               # (team, possessions left)
+        self.wall = 0.0                 # wall seconds since tip of the next event
+        self.done = False
+        self.plays = []                 # (period, clock, team, kind, score)
+
+    # ── Simulation ───────────────────────────────────────────────────
+
+    def state_at(self, t):
+        return "pre" if t < self.tip else ("post" if self.done and t >= self.tip + self.wall else "in")
+
+    def advance(self, t):
+        while not self.done and self.tip + self.wall <= t:
+            self._possession()
+
+    def _add(self, team, kind, score=0):
+        self.plays.append((self.period, self.clock, team, kind, score))
+        if score:
+            self.score[team] += score
+
+    def _end_period(self):
+        lg = self.league
+        self._add(-1, END)
+        if self.period >= lg.regulation_periods and self.score[0] != self.score[1]:
+            self.done = True
+            return
+        self.wall += HALFTIME if self.period == lg.regulation_periods // 2 else PERIOD_BREAK
+        self.period += 1
+        self.clock = (lg.period_minutes if self.period <= lg.regulation_periods else lg.ot_minutes) * 60.0
+        self.fouls = [0, 0]
+
+    def _tick(self, secs):
+        secs = min(secs, self.clock)
+        self.clock -= secs
+        self.wall += secs * self.stoppage
+
+    def _free_throws(self, team, n):
+        for i in range(n):
+            kind = FT2 if i == n - 1 and n == 2 else FT1
+            self._add(team, kind, 1 if self.rng.random() < self.ft_pct[team] else 0)
+        self.wall += FT_SECONDS
+
+    def _foul(self, team, kind):
+        self._add(team, kind)
+        self.fouls[team] += 1
+        self.game_fouls[team] += 1
+
+    def _possession(self):
+        if self.clock <= 0:
+            self._end_period()
+            return
+        rng = self.rng
+        off, de = self.poss, 1 - self.poss
+        lead = self.score[off] - self.score[de]
+        late = self.period >= self.league.regulation_periods and self.clock <= 120
+        if late and 0 < lead <= FOUL_LEAD_MAX:
+            # Trailing side fouls on the catch to stop the clock.
+            self._tick(rng.uniform(2, 6))
+            self._foul(de, FOUL)
+            self._free_throws(off, 2)
+            self.poss = de
+            return
+        if self.run[1] <= 0 and rng.random() < RUN_CHANCE:
+            self.run = (rng.randint(0, 1), rng.randint(4, 10))
+        boost = self.skill[off] + (RUN_BOOST if self.run[1] > 0 and self.run[0] == off else 0.0)
+        self.run = (self.run[0], self.run[1] - 1)
+        self._tick(rng.uniform(0.45, 1.55) * self.poss_seconds)
+        r = rng.random()
+        if r < 0.10:
+            self._foul(de, SHOOT_FOUL)
+            self._free_throws(off, 2)
+        elif r < 0.16:
+            self._foul(de, FOUL)
+            if self.fouls[de] >= self.bonus_at:
+                self._free_throws(off, 2)
+            else:
+                return              # side out, same team keeps the ball
+        elif r < 0.29:
+            self._add(off, TURNOVER)
+        else:
+            three = rng.random() < 0.38
+            made = rng.random() < (0.36 if three else 0.52) + boost
+            self._add(off, THREE if three else JUMPER, (3 if three else 2) if made else 0)
+            if not made:
+                if rng.random() < 0.26:
+                    self._add(off, OREB)
+                    return
+                self._add(de, DREB)
+        self.poss = de
+
+    # ── ESPN-shaped output ───────────────────────────────────────────
+
+    def status(self, t):
+        state = self.state_at(t)
+        if state == "pre":
+            return state, 0, "0:00"
+        if state == "post":
+            return state, self.period, "0:00"
+        return state, self.period, display_clock(self.clock)
+
+    def play_json(self, i):
+        period, clock, team, kind, score = self.plays[i]
+        tid = self.team_ids[team] if team >= 0 else ""
+        if kind in MADE:
+            text = ("Home " if team == 0 else "Away ") + tid + " " + (MADE if score else MISSED)[kind]
+        elif kind == END:
+            text = "End of " + self.league.period_label(period)
+        else:
+            text = ("Home " if team == 0 else "Away ") + tid + " " + PLAY_TYPES[kind]
+        return {"id": self.id + "{:04d}".format(i), "text": text, "period": {"number": period},
+                "clock": {"displayValue": display_clock(clock)}, "scoreValue": score,
+                "team": {"id": tid}, "type": {"text": PLAY_TYPES[kind]}}
+
+    def event(self, t):
+        state, period, clock = self.status(t)
+        h, a = self.team_ids
+        comp = {
+            "competitors": [
+                {"homeAway": "home", "score": str(self.score[0] if state != "pre" else 0),
+                 "team": {"id": h, "displayName": "Home " + h, "abbreviation": "H" + h, "color": "1d428a"},
+                 "records": [{"summary": "10-5"}]},
+                {"homeAway": "away", "score": str(self.score[1] if state != "pre" else 0),
+                 "team": {"id": a, "displayName": "Away " + a, "abbreviation": "A" + a, "color": "ce1141"},
+                 "records": [{"summary": "8-7"}]},
+            ],
+            "odds": [{"overUnder": self.over_under, "spread": "H" + h + " -" + str(abs(self.spread))}],
+            "venue": {"fullName": "Arena " + h},
+            "broadcasts": [{"names": ["SIM"]}],
+        }
+        if state == "in" and self.plays:
+            last = self.play_json(len(self.plays) - 1)
+            comp["situation"] = {"possession": self.team_ids[self.poss], "lastPlay": {
+                "id": last["id"], "text": last["text"], "team": last["team"], "type": last["type"],
+                "scoreValue": last["scoreValue"]}}
+        return {"id": self.id, "name": "Away " + a + " at Home " + h, "shortName": "A" + a + " @ H" + h,
+                "status": {"type": {"state": state}, "period": period, "displayClock": clock},
+                "competitions": [comp]}
+
+    def summary(self, t):
+        if self.state_at(t) == "pre":
+            return {"plays": [], "boxscore": {"teams": []}}
+        teams = [{"team": {"id": self.team_ids[i]},
+                  "statistics": [{"name": "fouls", "displayValue": str(self.game_fouls[i])}]} for i in (0, 1)]
+        return {"plays": [self.play_json(i) for i in range(len(self.plays))], "boxscore": {"teams": teams}}
+
+
+class Simulator:
+    # t is wall seconds since the simulated slate started. Tips are spread so
+    # most games are live at t=0; time only moves forward.
+
+    def __init__(self, league, games=150, seed=7):
+        self.league = league
+        self.seed = seed
+        self.t = 0.0
+        rng = random.Random(seed)
+        length = league.game_minutes * 60 * sum(STOPPAGE) / 2 + HALFTIME
+        self.games = [SimGame(league, n, seed, rng.uniform(-0.85 * length, 0.15 * length)) for n in range(games)]
+        self.by_id = {g.id: g for g in self.games}
+        self.advance(0.0)
+
+    def advance(self, t):
+        self.t = max(self.t, t)
+        for g in self.games:
+            g.advance(self.t)
+
+    def scoreboard(self):
+        return {"events": [g.event(self.t) for g in self.games]}
+
+    def summary(self, game_id):
+        g = self.by_id.get(game_id)
+        return g.summary(self.t) if g is not None else None
+
+    def digest(self):
+        return hashlib.sha1(json.dumps(self.scoreboard(), sort_keys=True).encode()).hexdigest()
+
+
+# ══════════════════════════════════════════════════════════════════════
+# CLI — pipeline throughput at arbitrary scale
+# ══════════════════════════════════════════════════════════════════════
+
+def pct(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0.0
+
+
+def bench(league, games, ticks, step, seed):
+    from sharkcore import build_tick, parse_scoreboard
+    from sharkload import rss_mb
+    from sharkparse import parse_summary_full
+    rss0 = rss_mb()
+    started = time.perf_counter()
+    sim = Simulator(league, games, seed)
+    print(league.key + ": " + str(games) + " games, seed " + str(seed) + ", built in "
+          + "{:.2f}".format(time.perf_counter() - started) + "s")
+    stages = {"simulate": [], "parse": [], "derive+scan": [], "summaries": []}
+    live = rows = summaries = 0
+    for i in range(ticks):
+        t0 = time.perf_counter()
+        sim.advance(i * step)
+        raw = json.dumps(sim.scoreboard()).encode()
+        t1 = time.perf_counter()
+        parsed = parse_scoreboard(league, json.loads(raw))
+        t2 = time.perf_counter()
+        tick = build_tick(league, parsed)
+        t3 = time.perf_counter()
+        for gid, d in tick["derived"].items():
+            if d["is_shark"]:
+                parse_summary_full(json.dumps(sim.summary(gid)).encode())
+                summaries += 1
+        t4 = time.perf_counter()
+        for name, a, b in (("simulate", t0, t1), ("parse", t1, t2), ("derive+scan", t2, t3), ("summaries", t3, t4)):
+            stages[name].append((b - a) * 1000)
+        live += len(tick["derived"])
+        rows += len(tick["scanner"])
+    print("ticks " + str(ticks) + " every " + str(step) + "s | live games/tick " + "{:.0f}".format(live / ticks)
+          + " | scanner rows/tick " + "{:.0f}".format(rows / ticks) + " | summaries parsed " + str(summaries))
+    print("stage           p50 ms   p90 ms   max ms")
+    for name, ms in stages.items():
+        print(name.ljust(14) + "".join("{:9.1f}".format(v) for v in (pct(ms, 0.5), pct(ms, 0.9), max(ms or [0]))))
+    pipeline = [a + b + c for a, b, c in zip(stages["parse"], stages["derive+scan"], stages["summaries"])]
+    print("pipeline p50 " + "{:.1f}".format(pct(pipeline, 0.5)) + " ms/tick = "
+          + "{:.0f}".format(games / max(pct(pipeline, 0.5) / 1000, 1e-9)) + " games/s | rss +"
+          + "{:.1f}".format(rss_mb() - rss0) + " MB | scoreboard " + "{:.1f}".format(len(raw) / 1e6) + " MB")
+
+
+def arg(argv, name, default):
+    return argv[argv.index(name) + 1] if name in argv else default
+
+
+def main(argv):
+    from sharkcore import LEAGUES
+    cmd = argv[0] if argv else "bench"
+    league = LEAGUES[arg(argv, "--league", "ncaa")]
+    seed = int(arg(argv, "--seed", "7"))
+    if cmd == "digest":
+        sim = Simulator(league, int(arg(argv, "--games", "100")), seed)
+        sim.advance(float(arg(argv, "--at", "3600")))
+        print(league.key + " seed " + str(seed) + " t=" + str(sim.t) + ": " + sim.digest())
+        return
+    bench(league, int(arg(argv, "--games", "1000")), int(arg(argv, "--ticks", "40")),
+          float(arg(argv, "--step", "15")), seed)
+
+
+if __name__ == "__main__":
+    main(sys.argv[1:])
@@ -0,0 +1,246 @@
+"""
+sharkstate.py — BigSnapshot on-disk state
+WarmStart keeps the latest scoreboard, per-game play cursors and derived
+state on disk so a restarted shark.py / ncaashark.py can paint from it before
+the first ESPN fetch returns. SharedSnapshot is the memory-mapped, versioned
+tick file one poller publishes and every worker process maps; a worker
+copies and decodes the payload once per published version, not per rerun.
+"""
+
+import json, mmap, os, struct, threading, time
+
+STATE_DIR = os.environ.get(
+    "SHARK_STATE_DIR",
+    os.path.join(os.path.dirname(os.path.abspath(__file__)), ".shark_state"))
+SAVE_INTERVAL = 60
+
+
+class WarmStart:
+    # One per league per process (held via st.cache_resource). `live` flips to
+    # True the first time this process records fresh data; until then callers
+    # paint from the on-disk snapshot and kick off refresh_async().
+
+    def __init__(self, league, path=None, interval=SAVE_INTERVAL):
+        self.league = league
+        self.path = path or os.path.join(STATE_DIR, league + ".json")
+        self.interval = interval
+        self.live = False
+        self._lock = threading.Lock()
+        self._snapshot = None
+        self._loaded = False
+        self._last_save = 0.0
+        self._refresh = None
+
+    # ── Read side ────────────────────────────────────────────────────
+
+    def load(self):
+        with self._lock:
+            if not self._loaded:
+                self._loaded = True
+                if self._snapshot is None:
+                    try:
+                        with open(self.path, "r", encoding="utf-8") as f:
+                            snap = json.load(f)
+                        if snap.get("league") == self.league:
+                            self._snapshot = snap
+                    except (OSError, ValueError, AttributeError):
+                        self._snapshot = None
+            return self._snapshot
+
+    def age(self):
+        snap = self.load()
+        if not snap:
+            return None
+        return max(0.0, time.time() - snap.get("saved_at", 0))
+
+    def cursor(self, game_id):
+        snap = self.load() or {}
+        return snap.get("play_cursors", {}).get(str(game_id))
+
+    # ── Write side ───────────────────────────────────────────────────
+
+    def record(self, games, cursors=None, derived=None, force=False):
+        now = time.time()
+        with self._lock:
+            prev = self._snapshot or {}
+            live_ids = set(str(g.get("id", "")) for g in games)
+            merged = {}
+            for gid, c in prev.get("play_cursors", {}).items():
+                if gid in live_ids:
+                    merged[gid] = c
+            for gid, c in (cursors or {}).items():
+                merged[str(gid)] = c
+            snap = {
+                "league": self.league,
+                "saved_at": now,
+                "games": games,
+                "play_cursors": merged,
+                "derived": derived if derived is not None else prev.get("derived", {}),
+            }
+            self._snapshot = snap
+            self._loaded = True
+            self.live = True
+            due = force or now - self._last_save >= self.interval
+            if due:
+                self._last_save = now
+        if due:
+            self._write(snap)
+        return snap
+
+    def _write(self, snap):
+        try:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            tmp = self.path + ".tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(snap, f, separators=(",", ":"))
+            os.replace(tmp, self.path)
+        except (OSError, TypeError, ValueError):
+            pass
+
+    # ── Background refresh ───────────────────────────────────────────
+
+    def refresh_async(self, fetch):
+        # Single-flight: every session that lands on a stale snapshot shares
+        # one refresh thread. `fetch` must not touch st.* and should raise on
+        # failure so a bad fetch never overwrites the snapshot.
+        with self._lock:
+            if self._refresh is not None and self._refresh.is_alive():
+                return self._refresh
+            t = threading.Thread(target=self._run_refresh, args=(fetch,),
+                                 name="warm-refresh-" + self.league, daemon=True)
+            self._refresh = t
+        t.start()
+        return t
+
+    def _run_refresh(self, fetch):
+        try:
+            games = fetch()
+        except Exception:
+            return
+        self.record(games)
+
+
+# ══════════════════════════════════════════════════════════════════════
+# SHARED SNAPSHOT — one writer, any number of mmap readers
+# ══════════════════════════════════════════════════════════════════════
+#
+# Layout: 32-byte header then a JSON payload.
+#   magic b"SHRK" | u32 format | u64 seq | u64 length | f64 published_at
+# seq is a seqlock: odd while the writer is mid-update, even when stable.
+# Readers compare seq against the last one they decoded and only copy and
+# parse the payload when it moved.
+
+SNAP_MAGIC = b"SHRK"
+SNAP_FORMAT = 1
+SNAP_HEADER = struct.Struct("<4sIQQd")
+SNAP_MIN_SIZE = 1 << 16
+
+
+class SharedSnapshot:
+
+    def __init__(self, league, path=None):
+        self.league = league
+        self.path = path or os.path.join(STATE_DIR, league + ".snap")
+        self._lock = threading.Lock()
+        self._fd = None
+        self._map = None
+        self._size = 0
+        self._seq = 0
+        self._cached = None
+
+    def _open(self, create):
+        if self._fd is None:
+            if create:
+                os.makedirs(os.path.dirname(self.path), exist_ok=True)
+                self._fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+            else:
+                try:
+                    self._fd = os.open(self.path, os.O_RDONLY)
+                except OSError:
+                    return False
+        size = os.fstat(self._fd).st_size
+        if size < SNAP_HEADER.size:
+            return False
+        if self._map is None or size != self._size:
+            if self._map is not None:
+                self._map.close()
+            access = mmap.ACCESS_WRITE if create else mmap.ACCESS_READ
+            self._map = mmap.mmap(self._fd, size, access=access)
+            self._size = size
+        return True
+
+    def _header(self):
+        magic, fmt, seq, length, published = SNAP_HEADER.unpack_from(self._map, 0)
+        if magic != SNAP_MAGIC or fmt != SNAP_FORMAT:
+            return None
+        return seq, length, published
+
+    # ── Writer (the poller) ──────────────────────────────────────────
+
+    def publish(self, tick):
+        payload = json.dumps(tick, separators=(",", ":")).encode()
+        need = SNAP_HEADER.size + len(payload)
+        with self._lock:
+            self._open(create=True)
+            if self._size < need:
+                size = max(SNAP_MIN_SIZE, self._size)
+                while size < need:
+                    size *= 2
+                os.ftruncate(self._fd, size)
+                self._open(create=True)
+            head = self._header()
+            seq = head[0] if head else 0
+            seq += 2 if seq % 2 == 0 else 1
+            SNAP_HEADER.pack_into(self._map, 0, SNAP_MAGIC, SNAP_FORMAT, seq - 1, 0, 0.0)
+            self._map[SNAP_HEADER.size:need] = payload
+            SNAP_HEADER.pack_into(self._map, 0, SNAP_MAGIC, SNAP_FORMAT, seq, len(payload), time.time())
+            self._seq = seq
+            self._cached = tick
+            return seq
+
+    # ── Readers (every worker) ───────────────────────────────────────
+
+    def version(self):
+        with self._lock:
+            if not self._open(create=False):
+                return 0
+            head = self._header()
+            return head[0] if head else 0
+
+    def read(self):
+        # Returns the latest tick dict, or None when nothing has been published.
+        # Not zero-copy: a new version is copied out of the map and json-decoded
+        # once, and every call until the next publish returns that same dict.
+        with self._lock:
+            if not self._open(create=False):
+                return self._cached
+            for _ in range(5):
+                head = self._header()
+                if head is None:
+                    return self._cached
+                seq, length, published = head
+                if seq == self._seq:
+                    return self._cached
+                if seq % 2 == 1:
+                    time.sleep(0.005)
+                    continue
+                end = SNAP_HEADER.size + length
+                if end > self._size:
+                    self._open(create=False)
+                    continue
+                payload = self._map[SNAP_HEADER.size:end]
+                if SNAP_HEADER.unpack_from(self._map, 0)[2] != seq:
+                    continue
+                try:
+                    self._cached = json.loads(payload)
+                except ValueError:
+                    continue
+                self._seq = seq
+                break
+            return self._cached
+
+    def age(self):
+        tick = self.read()
+        if not tick:
+            return None
+        return max(0.0, time.time() - tick.get("ts", 0))
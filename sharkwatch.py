@@ -0,0 +1,232 @@
+"""
+sharkwatch.py — BigSnapshot per-user watchlists and alert rules
+Users keep a watchlist of games per league and alert rules (game scope,
+side, threshold band, minimum tier, minutes remaining, SHARK only) in
+STATE_DIR/watch.json. The poller compiles every user's rules into one
+inverted index keyed by (game, side) with rules sorted by the band's low
+edge, matches each tick's scanner rows against it in a single pass and
+publishes newly matching cells as alerts in the tick, so sessions only read
+their user's list.
+"""
+
+import hashlib, json, os, threading, time
+from bisect import bisect_right
+from collections import deque
+
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+
+from sharkcore import TIER_RANK
+from sharkstate import STATE_DIR
+
+WATCH_PATH = os.path.join(STATE_DIR, "watch.json")
+RECENT_ALERTS = 20          # per user, carried in every tick
+ANY_GAME = "*"
+
+
+def new_rule(league_key, games, side, lo, hi, tier, max_remaining=None, shark_only=False, label=""):
+    # games: "watchlist", "any" or one game id. side: "OVER", "UNDER" or "BOTH".
+    rule_id = hashlib.md5((league_key + str(time.time())).encode()).hexdigest()[:8]
+    return {"id": rule_id, "league": league_key, "games": games, "side": side, "lo": float(lo), "hi": float(hi),
+            "tier": tier, "max_remaining": max_remaining, "shark_only": bool(shark_only), "label": label}
+
+
+def rule_text(rule):
+    scope = {"watchlist": "watchlist", "any": "any game"}.get(rule["games"], rule.get("label") or rule["games"])
+    side = "OVER/UNDER" if rule["side"] == "BOTH" else rule["side"]
+    text = scope + " — " + side + " " + str(rule["lo"]) + "–" + str(rule["hi"]) + ", " + rule["tier"] + "+"
+    if rule.get("max_remaining") is not None:
+        text += ", ≤" + "{:g}".format(rule["max_remaining"]) + " min left"
+    if rule.get("shark_only"):
+        text += ", SHARK only"
+    return text
+
+
+def alert_text(alert):
+    return alert["label"] + " " + alert["side"] + " " + str(alert["thresh"]) + " hit " + alert["tier"] + \
+        (" SHARK" if alert["shark"] else "") + " — cushion " + "{:.2f}".format(alert["cushion"]) + ", " + \
+        "{:.1f}".format(alert["remaining"]) + " min left"
+
+
+# ══════════════════════════════════════════════════════════════════════
+# STORE — one JSON file, read-modify-write under a file lock
+# ══════════════════════════════════════════════════════════════════════
+
+class WatchStore:
+
+    def __init__(self, path=None):
+        self.path = path or WATCH_PATH
+        self._lock = threading.Lock()
+        self._cache = (None, {"users": {}})
+
+    def version(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _read(self):
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {"users": {}}
+
+    def load(self):
+        v = self.version()
+        if v is None or v != self._cache[0]:
+            self._cache = (v, self._read())
+        return self._cache[1]
+
+    def user(self, name):
+        prefs = self.load()["users"].get(name) or {}
+        return {"watchlist": prefs.get("watchlist", {}), "rules": prefs.get("rules", [])}
+
+    def _update(self, name, change):
+        with self._lock:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+            fd = os.open(self.path + ".lock", os.O_RDWR | os.O_CREAT, 0o644)
+            try:
+                if fcntl is not None:
+                    fcntl.flock(fd, fcntl.LOCK_EX)
+                data = self._read()
+                prefs = data["users"].setdefault(name, {"watchlist": {}, "rules": []})
+                change(prefs)
+                tmp = self.path + ".tmp"
+                with open(tmp, "w", encoding="utf-8") as f:
+                    json.dump(data, f, separators=(",", ":"))
+                os.replace(tmp, self.path)
+            finally:
+                os.close(fd)
+
+    def set_watchlist(self, name, league_key, game_ids):
+        def change(prefs):
+            prefs.setdefault("watchlist", {})[league_key] = list(game_ids)
+        self._update(name, change)
+
+    def add_rule(self, name, rule):
+        self._update(name, lambda prefs: prefs.setdefault("rules", []).append(rule))
+
+    def remove_rule(self, name, rule_id):
+        def change(prefs):
+            prefs["rules"] = [r for r in prefs.get("rules", []) if r["id"] != rule_id]
+        self._update(name, change)
+
+
+# ══════════════════════════════════════════════════════════════════════
+# RULE INDEX — (game, side) -> rules sorted by band low edge
+# ══════════════════════════════════════════════════════════════════════
+
+class RuleIndex:
+
+    def __init__(self, buckets):
+        # buckets: {(game id or ANY_GAME, side): ([lo, ...], [(user, rule), ...])}
+        self.buckets = buckets
+        self.size = sum(len(b[1]) for b in buckets.values())
+
+    def candidates(self, game_id, side, thresh):
+        for key in ((game_id, side), (ANY_GAME, side)):
+            bucket = self.buckets.get(key)
+            if bucket is None:
+                continue
+            los, rules = bucket
+            for user, rule in rules[:bisect_right(los, thresh)]:
+                if thresh <= rule["hi"]:
+                    yield user, rule
+
+    def match(self, tick):
+        # One pass over the scanner rows: [(user, rule, row)].
+        derived = tick.get("derived", {})
+        hits = []
+        for row in tick.get("scanner", []):
+            remaining = derived.get(row["game_id"], {}).get("remaining", 0.0)
+            for user, rule in self.candidates(row["game_id"], row["side"], row["thresh"]):
+                if TIER_RANK[row["tier"]] < TIER_RANK[rule["tier"]]:
+                    continue
+                if rule["shark_only"] and not row["shark"]:
+                    continue
+                if rule["max_remaining"] is not None and remaining > rule["max_remaining"]:
+                    continue
+                hits.append((user, rule, row))
+        return hits
+
+
+def compile_rules(data, league_key):
+    # Watchlist rules fan out to one key per watched game at compile time.
+    entries = {}
+    for user, prefs in data.get("users", {}).items():
+        watched = (prefs.get("watchlist") or {}).get(league_key, [])
+        for rule in prefs.get("rules", []):
+            if rule.get("league") != league_key:
+                continue
+            if rule["games"] == "watchlist":
+                games = watched
+            elif rule["games"] == "any":
+                games = [ANY_GAME]
+            else:
+                games = [rule["games"]]
+            sides = ("OVER", "UNDER") if rule["side"] == "BOTH" else (rule["side"],)
+            for gid in games:
+                for side in sides:
+                    entries.setdefault((gid, side), []).append((user, rule))
+    buckets = {}
+    for key, rules in entries.items():
+        rules.sort(key=lambda ur: ur[1]["lo"])
+        buckets[key] = ([r["lo"] for u, r in rules], rules)
+    return RuleIndex(buckets)
+
+
+# ══════════════════════════════════════════════════════════════════════
+# ALERT ENGINE — run by the poller once per tick
+# ══════════════════════════════════════════════════════════════════════
+
+class AlertEngine:
+
+    def __init__(self, league, store=None):
+        self.league = league
+        self.store = store or WatchStore()
+        self.index = RuleIndex({})
+        self.log_path = os.path.join(STATE_DIR, league.key + ".alerts.jsonl")
+        self.recent = {}
+        self._version = None
+        self._active = set()    # (user, rule id, game id, side, thresh) matching last tick
+
+    def evaluate(self, tick):
+        # Returns {user: [recent alerts]}; an alert fires when a cell starts
+        # matching a rule, not on every tick it keeps matching.
+        v = self.store.version()
+        if v != self._version:
+            self._version = v
+            self.index = compile_rules(self.store.load(), self.league.key)
+        labels = {g["id"]: g["away_abbr"] + " @ " + g["home_abbr"] for g in tick.get("games", [])}
+        derived = tick.get("derived", {})
+        active, fired = set(), []
+        for user, rule, row in self.index.match(tick):
+            key = (user, rule["id"], row["game_id"], row["side"], row["thresh"])
+            active.add(key)
+            if key in self._active:
+                continue
+            alert = {"ts": tick["ts"], "user": user, "rule_id": rule["id"], "game_id": row["game_id"],
+                     "label": labels.get(row["game_id"], row["game_id"]), "side": row["side"],
+                     "thresh": row["thresh"], "tier": row["tier"], "shark": row["shark"],
+                     "cushion": round(row["cushion"], 2),
+                     "remaining": round(derived.get(row["game_id"], {}).get("remaining", 0.0), 1)}
+            self.recent.setdefault(user, deque(maxlen=RECENT_ALERTS)).append(alert)
+            fired.append(alert)
+        self._active = active
+        if fired:
+            try:
+                with open(self.log_path, "a", encoding="utf-8") as f:
+                    f.write("\n".join(json.dumps(a, separators=(",", ":")) for a in fired) + "\n")
+            except OSError:
+                pass
+        return {user: list(alerts) for user, alerts in self.recent.items()}
+
+    def forget(self, game_ids):
+        # Slate eviction hook.
+        gone = set(game_ids)
+        self._active = set(k for k in self._active if k[2] not in gone)
+        for user, alerts in self.recent.items():
+            self.recent[user] = deque((a for a in alerts if a["game_id"] not in gone), maxlen=RECENT_ALERTS)
@@ -0,0 +1,4 @@
+import os, sys, tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault("SHARK_STATE_DIR", tempfile.mkdtemp(prefix="shark-test-"))
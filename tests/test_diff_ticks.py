@@ -0,0 +1,69 @@
+from sharkcore import cell_key, diff_ticks
+
+
+def game(gid, home=50, away=48, state="in"):
+    return {"id": gid, "home_score": home, "away_score": away, "state": state, "period": 2, "clock": "5:00"}
+
+
+def cell(gid, side, thresh, tier, cushion=1.0, shark=False):
+    return {"game_id": gid, "side": side, "thresh": thresh, "tier": tier, "cushion": cushion, "shark": shark}
+
+
+def tick(games, scanner, derived=None):
+    return {"games": games, "scanner": scanner, "derived": derived or {}}
+
+
+def by_type(changes):
+    out = {}
+    for c in changes:
+        out.setdefault(c["type"], []).append(c)
+    return out
+
+
+def test_first_tick_is_all_new():
+    cur = tick([game("1")], [cell("1", "OVER", 210.5, "SAFE"), cell("1", "UNDER", 230.5, "TIGHT")])
+    changes = by_type(diff_ticks(None, cur))
+    assert sorted(c["thresh"] for c in changes["new"]) == [210.5, 230.5]
+    assert [c["game_id"] for c in changes["score"]] == ["1"]
+
+
+def test_identical_ticks_have_no_changes():
+    t = tick([game("1")], [cell("1", "OVER", 210.5, "SAFE")], {"1": {"is_shark": False, "remaining": 20.0}})
+    assert diff_ticks(t, t) == []
+
+
+def test_tier_moves():
+    prev = tick([game("1")], [cell("1", "OVER", 210.5, "TIGHT"), cell("1", "OVER", 220.5, "SAFE")])
+    cur = tick([game("1")], [cell("1", "OVER", 210.5, "FORTRESS"), cell("1", "OVER", 220.5, "RISKY")])
+    changes = by_type(diff_ticks(prev, cur))
+    assert [(c["thresh"], c["was"], c["tier"]) for c in changes["upgrade"]] == [(210.5, "TIGHT", "FORTRESS")]
+    assert [(c["thresh"], c["was"], c["tier"]) for c in changes["downgrade"]] == [(220.5, "SAFE", "RISKY")]
+    assert "new" not in changes and "removed" not in changes
+
+
+def test_cushion_only_change_is_not_reported():
+    prev = tick([game("1")], [cell("1", "OVER", 210.5, "SAFE", cushion=0.6)])
+    cur = tick([game("1")], [cell("1", "OVER", 210.5, "SAFE", cushion=0.9)])
+    assert diff_ticks(prev, cur) == []
+
+
+def test_removed_cell():
+    row = cell("1", "UNDER", 230.5, "SAFE")
+    changes = diff_ticks(tick([game("1")], [row]), tick([game("1")], []))
+    assert changes == [{"type": "removed", "game_id": "1", "side": "UNDER", "thresh": 230.5}]
+    assert cell_key(row) == ("1", "UNDER", 230.5)
+
+
+def test_shark_window_entered_once():
+    prev = tick([game("1")], [], {"1": {"is_shark": False, "remaining": 5.2}})
+    cur = tick([game("1")], [], {"1": {"is_shark": True, "remaining": 4.8}})
+    changes = diff_ticks(prev, cur)
+    assert changes == [{"type": "shark_window", "game_id": "1", "remaining": 4.8}]
+    assert diff_ticks(cur, cur) == []
+
+
+def test_score_and_state_changes():
+    prev = tick([game("1"), game("2")], [])
+    cur = tick([game("1", home=52), game("2", state="post")], [])
+    changes = by_type(diff_ticks(prev, cur))
+    assert [(c["game_id"], c["home_score"], c["state"]) for c in changes["score"]] == [("1", 52, "in"), ("2", 50, "post")]
@@ -0,0 +1,33 @@
+import pytest
+
+from sharkcore import ET, NBA, NCAA, League, ladder
+
+
+def test_lines_are_half_points_for_any_whole_step():
+    g, d = {"over_under": 225.5}, {"proj": 221.3, "total": 120, "remaining": 24.0}
+    for step in (1, 2, 3, 5):
+        lines = ladder(NBA, g, d, step)
+        assert lines and all(x % 1 == 0.5 for x in lines)
+        assert 225.5 in lines
+        assert all(b - a == step for a, b in zip(lines, lines[1:]))
+
+
+def test_lines_clip_to_reachable_range():
+    g, d = {"over_under": 140.5}, {"proj": 138.0, "total": 130, "remaining": 2.0}
+    lines = ladder(NCAA, g, d)
+    assert lines[0] > 130 and lines[-1] <= 130 + 2.0 * NCAA.max_rate
+
+
+def test_never_more_lines_than_the_global_list():
+    for league in (NBA, NCAA):
+        for proj in range(100, 300, 7):
+            d = {"proj": float(proj), "total": 40, "remaining": 30.0}
+            lines = ladder(league, {"over_under": 180.5}, d, 1)
+            assert len(lines) <= len(league.thresholds)
+            if len(lines) == len(league.thresholds) and 180.5 in lines:
+                assert abs(lines.index(180.5) - len(lines) // 2) <= 1
+
+
+def test_fractional_step_is_rejected_at_construction():
+    with pytest.raises(ValueError):
+        League("x", "X", "x", "", 4, 12, 5, 224, [220.5], 6.0, ET, ladder_step=1.5)
@@ -0,0 +1,43 @@
+import pytest
+
+pa = pytest.importorskip("pyarrow")
+import pyarrow.dataset as ds
+
+from sharkcore import NBA
+from sharkexport import Exporter
+
+
+def row(thresh, tier, cushion):
+    return {"game_id": "1", "side": "over", "thresh": thresh, "cushion": cushion, "needed": 1.0,
+            "rate_needed": 1.0, "projected": 1.0, "tier": tier, "shark": False}
+
+
+def tick(ts, scanner):
+    g = {"id": "1", "state": "in", "period": 2, "clock": "5:00", "home_score": 50, "away_score": 48,
+         "over_under": 220.5, "spread": "BOS -3.5"}
+    return {"ts": ts, "games": [g], "scanner": scanner}
+
+
+def read(root, table):
+    return ds.dataset(str(root / table), format="parquet", partitioning="hive").to_table()
+
+
+def test_scanner_rows_only_when_a_cell_changes(tmp_path):
+    e = Exporter(NBA, root=str(tmp_path))
+    e.enabled = True
+    e.record(tick(1000, [row(200.5, "SAFE", 5.0), row(210.5, "RISKY", 1.0)]))
+    e.record(tick(1030, [row(200.5, "SAFE", 6.0), row(210.5, "RISKY", 1.2)]))
+    e.record(tick(1060, [row(200.5, "FORTRESS", 9.0)]))
+    e.flush()
+    assert e.last_error is None
+    rows = [(r["thresh"], r["tier"]) for r in read(tmp_path, "scanner").sort_by("ts").to_pylist()]
+    assert sorted(rows[:2]) == [(200.5, "SAFE"), (210.5, "RISKY")]
+    assert sorted(rows[2:], key=str) == [(200.5, "FORTRESS"), (210.5, None)]
+    assert read(tmp_path, "ticks").num_rows == 1
+
+
+def test_flushes_on_row_count(tmp_path):
+    e = Exporter(NBA, root=str(tmp_path), flush_rows=3)
+    e.enabled = True
+    e.record(tick(1000, [row(200.5 + i, "SAFE", 5.0) for i in range(3)]))
+    assert e.rows_written == 4 and not e._buf
@@ -0,0 +1,91 @@
+import threading, time
+
+import pytest
+
+import sharkfetch
+from sharkfetch import BREAKER_FAILURES, BudgetExceeded, CircuitOpen, Deadline, Fetcher, FetchError
+
+
+class Response:
+    def __init__(self, status=200, payload=None):
+        self.status_code = status
+        self.payload = payload if payload is not None else {"ok": True}
+        self.content = b"{}"
+
+    def json(self):
+        return self.payload
+
+
+def fetcher(get):
+    f = Fetcher("test", workers=4, fanout=2)
+    f._session.get = get
+    return f
+
+
+def test_breaker_trips_after_consecutive_upstream_errors():
+    f = fetcher(lambda url, timeout: Response(503))
+    for _ in range(BREAKER_FAILURES):
+        with pytest.raises(FetchError):
+            f.get_json("http://espn/x")
+    assert f.status()["state"] == "open"
+    with pytest.raises(CircuitOpen):
+        f.get_json("http://espn/x")
+
+
+def test_success_resets_the_failure_count():
+    responses = [Response(503), Response(503), Response(200), Response(503), Response(503)]
+    f = fetcher(lambda url, timeout: responses.pop(0))
+    for _ in range(5):
+        try:
+            f.get_json("http://espn/x")
+        except FetchError:
+            pass
+    assert f.status()["state"] == "closed"
+
+
+def test_plain_4xx_does_not_count_against_upstream():
+    f = fetcher(lambda url, timeout: Response(404))
+    for _ in range(BREAKER_FAILURES + 1):
+        with pytest.raises(FetchError):
+            f.get_json("http://espn/x")
+    assert f.status()["state"] == "closed"
+
+
+def test_deadline_timeout_is_budget_not_failure():
+    release = threading.Event()
+
+    def slow(url, timeout):
+        release.wait(1.0)
+        return Response()
+
+    f = fetcher(slow)
+    for _ in range(BREAKER_FAILURES + 1):
+        with pytest.raises(BudgetExceeded):
+            f.get_json("http://espn/x", Deadline(0.05))
+    release.set()
+    assert f.status()["state"] == "closed"
+    assert f.stats["failures"] == 0
+
+
+def test_slow_request_is_hedged():
+    calls = []
+
+    def get(url, timeout):
+        calls.append(time.monotonic())
+        if len(calls) == 1:
+            time.sleep(0.6)
+        return Response(payload={"n": len(calls)})
+
+    f = fetcher(get)
+    f._latency["r"] = sharkfetch.deque([0.01] * 10, maxlen=sharkfetch.LATENCY_WINDOW)
+    assert f.get_json("http://espn/x", route="r") == {"n": 2}
+    assert f.stats["hedges"] == 1
+
+
+def test_fetch_falls_back_to_last_good():
+    responses = [Response(payload={"v": 1}), Response(503)]
+    f = fetcher(lambda url, timeout: responses.pop(0))
+    assert f.fetch("http://espn/x", lambda d: d["v"]) == (1, None)
+    value, stale_age = f.fetch("http://espn/x", lambda d: d["v"])
+    assert value == 1 and stale_age is not None and stale_age >= 0
+    assert f.stats["fallbacks"] == 1
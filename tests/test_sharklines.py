@@ -0,0 +1,74 @@
+from sharklines import LineHistory, parse_line
+
+
+def game(gid, ou, spread=None):
+    return {"id": gid, "over_under": ou, "spread": spread}
+
+
+def history(tmp_path, **kw):
+    return LineHistory("nba", path=str(tmp_path / "nba.lines.log"), **kw)
+
+
+def test_parse_line():
+    assert parse_line(224.5) == 224.5
+    assert parse_line("BOS -3.5") == -3.5
+    assert parse_line("") is None and parse_line("PK") is None
+
+
+def test_records_changes_only_and_answers_at(tmp_path):
+    h = history(tmp_path)
+    assert h.record([game("1", 224.5, "BOS -3.5")], ts=1000) == 2
+    assert h.record([game("1", 224.5, "BOS -3.5")], ts=1030) == 0
+    assert h.record([game("1", 226.0, "BOS -3.5")], ts=1060) == 1
+    assert h.at("1", "ou", 999) is None
+    assert h.at("1", "ou", 1059) == 224.5
+    assert h.at("1", "ou", 5000) == 226.0
+    assert h.move_since_open("1", "ou") == 1.5
+    assert h.history("1")["ou"] == [(1000, 224.5), (1060, 226.0)]
+    assert h.summary("1") == {"ou_open": 224.5, "ou_move": 1.5, "ou_changes": 1,
+                              "spread_open": -3.5, "spread_move": 0.0, "spread_changes": 0}
+
+
+def test_log_replays_on_restart(tmp_path):
+    h = history(tmp_path)
+    h.record([game("1", 224.5), game("2", 140.5)], ts=1000)
+    h.record([game("1", 223.0), game("2", 140.5)], ts=1100)
+    again = history(tmp_path)
+    again.load()
+    assert again.history("1") == h.history("1")
+    assert again.at("2", "ou", 2000) == 140.5
+
+
+def test_forget_compacts_the_log(tmp_path):
+    h = history(tmp_path)
+    h.record([game("1", 224.5), game("2", 140.5)], ts=1000)
+    h.record([game("1", 223.0), game("2", 141.5)], ts=1100)
+    h.forget(["2", "missing"])
+    assert "2" not in h.series
+    with open(h.path, encoding="utf-8") as f:
+        rows = f.read().splitlines()
+    assert len(rows) == 2 and all('"2"' not in r for r in rows)
+    assert not (tmp_path / "nba.lines.log.tmp").exists()
+    again = history(tmp_path)
+    again.load()
+    assert again.history("1") == h.history("1") and "2" not in again.series
+
+
+def test_readonly_never_writes(tmp_path):
+    writer, reader = history(tmp_path), history(tmp_path, readonly=True)
+    writer.record([game("1", 224.5)], ts=1000)
+    assert reader.record([game("1", 230.5), game("9", 150.5)], ts=1100) == 0
+    assert reader.at("1", "ou", 2000) == 224.5 and "9" not in reader.series
+    before = open(writer.path, encoding="utf-8").read()
+    reader.forget(["1"])
+    assert open(writer.path, encoding="utf-8").read() == before
+
+
+def test_reader_picks_up_appends_and_compaction(tmp_path):
+    writer, reader = history(tmp_path), history(tmp_path, readonly=True)
+    writer.record([game("1", 224.5), game("2", 140.5)], ts=1000)
+    assert set(reader.reload().series) == {"1", "2"}
+    writer.record([game("1", 222.5), game("2", 140.5)], ts=1100)
+    assert reader.reload().move_since_open("1", "ou") == -2.0
+    writer.forget(["1"])
+    assert set(reader.reload().series) == {"2"}
@@ -0,0 +1,64 @@
+import json
+
+import pytest
+
+import sharkparse
+from sharkparse import parse_summary_full, parse_summary_plays, project_summary
+
+
+def summary_bytes():
+    plays = []
+    for i in range(40):
+        plays.append({
+            "id": str(5000 + i), "text": "play " + str(i), "wallclock": "2026-03-14T01:00:00Z",
+            "period": {"number": 1 + i // 20, "displayValue": "1st"},
+            "clock": {"displayValue": str(i % 20) + ":00"},
+            "scoreValue": i % 4, "team": {"id": str(1 + i % 2)},
+            "type": {"id": "1", "text": "Free Throw - 1 of 2" if i % 5 == 0 else "Jump Shot"},
+            "participants": [{"athlete": {"id": "99"}}],
+        })
+    plays[3]["team"] = None
+    del plays[4]["scoreValue"]
+    plays[5]["period"] = {"number": None}
+    doc = {
+        "header": {"id": "401"},
+        "boxscore": {"teams": [
+            {"statistics": [{"name": "points", "displayValue": "50"}, {"displayValue": "12", "name": "fouls"}],
+             "team": {"id": "1"}},
+            {"team": {"id": "2"}, "statistics": [{"name": "teamFouls", "displayValue": "bad"}]},
+            {"team": {"id": "3"}, "statistics": [{"name": "totalFouls", "displayValue": "7.0"},
+                                                 {"name": "fouls", "displayValue": "3"}]},
+        ]},
+        "plays": plays,
+        "news": {"articles": [{"id": 1, "headline": "x" * 200}]},
+    }
+    return json.dumps(doc).encode()
+
+
+@pytest.fixture
+def json_fallback(monkeypatch):
+    monkeypatch.setattr(sharkparse, "ijson", None)
+
+
+@pytest.mark.skipif(sharkparse.ijson is None, reason="ijson not installed")
+@pytest.mark.parametrize("fouls", [False, True])
+def test_ijson_matches_json_fallback(fouls, monkeypatch):
+    raw = summary_bytes()
+    streamed = project_summary(raw, fouls=fouls)
+    monkeypatch.setattr(sharkparse, "ijson", None)
+    assert streamed == project_summary(raw, fouls=fouls)
+
+
+def test_projected_fields(json_fallback):
+    out = parse_summary_full(summary_bytes())
+    assert len(out["plays"]) == 40
+    assert out["plays"][0] == {"id": "5000", "text": "play 0", "period": 1, "clock": "0:00", "score": 0,
+                               "team_id": "1", "type": "Free Throw - 1 of 2"}
+    assert out["plays"][3]["team_id"] == "" and out["plays"][4]["score"] == 0 and out["plays"][5]["period"] == 0
+    assert out["team_fouls"] == {"1": 12, "3": 7}
+
+
+def test_fouls_only_when_asked():
+    raw = summary_bytes()
+    assert project_summary(raw)["team_fouls"] == {}
+    assert parse_summary_plays(raw) == project_summary(raw)["plays"]
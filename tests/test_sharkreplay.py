@@ -0,0 +1,67 @@
+import pytest
+
+from sharkcore import NBA
+from sharkfetch import FetchError
+from sharkreplay import Recording, ReplaySource, TickRecorder, recorded_days
+
+URL = "https://example.invalid/summary?event="
+
+
+def play(i):
+    return {"id": str(i), "period": 1, "clock": "10:00", "team_id": "1", "type": "Jumper", "score": 2, "text": "p" + str(i)}
+
+
+@pytest.fixture
+def recording(tmp_path):
+    rec = TickRecorder(NBA, root=str(tmp_path))
+    rec.enabled = True
+    for n, ts in enumerate((1000.0, 1030.0, 1060.0)):
+        summaries = {"7": {"plays": [play(i) for i in range(3 * (n + 1))], "team_fouls": {"1": n}}}
+        rec.record({"ts": ts, "games": [{"id": "7", "home_score": n}]}, summaries)
+    assert rec.last_error is None
+    return Recording("nba", NBA.slate_day(), root=str(tmp_path))
+
+
+def test_tick_at_bisects_the_index(recording):
+    assert (recording.start(), recording.end()) == (1000.0, 1060.0)
+    assert recording.tick_at(900)["ts"] == 1000.0
+    assert recording.tick_at(1000)["ts"] == 1000.0
+    assert recording.tick_at(1059.9)["ts"] == 1030.0
+    assert recording.tick_at(5000)["games"][0]["home_score"] == 2
+
+
+def test_plays_follow_the_recorded_counts(recording):
+    assert recording.tick_at(1030)["play_counts"] == {"7": 6}
+    assert [p["id"] for p in recording.plays("7", 6)] == [str(i) for i in range(6)]
+    assert len(recording.plays("7", 9)) == 9
+    assert recording.plays("missing", 3) == []
+
+
+def test_recording_picks_up_new_ticks(tmp_path, recording):
+    rec = TickRecorder(NBA, root=str(tmp_path))
+    rec.enabled = True
+    rec.record({"ts": 1090.0, "games": []})
+    recording.refresh()
+    assert recording.end() == 1090.0
+
+
+def test_empty_recording(tmp_path):
+    rec = Recording("nba", "2026-01-01", root=str(tmp_path))
+    assert rec.start() is None and rec.tick_at(1000) is None
+    src = ReplaySource(rec)
+    assert src.position() is None
+    with pytest.raises(FetchError):
+        src.tick()
+    assert src.last_good(URL + "7") == (None, None)
+    assert recorded_days("nba", root=str(tmp_path)) == []
+
+
+def test_source_answers_summaries_at_the_playhead(recording):
+    src = ReplaySource(recording)
+    src.seek(1045)
+    summary, age = src.fetch(URL + "7")
+    assert len(summary["plays"]) == 6 and summary["team_fouls"] == {"1": 1} and age is None
+    summary, age = src.last_good(URL + "7")
+    assert len(summary["plays"]) == 6 and age == pytest.approx(15.0)
+    with pytest.raises(FetchError):
+        src.fetch(URL + "8")
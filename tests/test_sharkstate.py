@@ -0,0 +1,90 @@
+import threading
+
+from sharkstate import SNAP_FORMAT, SNAP_HEADER, SNAP_MAGIC, SNAP_MIN_SIZE, SharedSnapshot
+
+
+def snap_pair(tmp_path):
+    path = str(tmp_path / "nba.snap")
+    return SharedSnapshot("nba", path), SharedSnapshot("nba", path)
+
+
+def test_read_before_publish(tmp_path):
+    writer, reader = snap_pair(tmp_path)
+    assert reader.read() is None
+    assert reader.version() == 0
+
+
+def test_publish_round_trip(tmp_path):
+    writer, reader = snap_pair(tmp_path)
+    tick = {"league": "nba", "ts": 1.0, "games": [{"id": "1"}]}
+    seq = writer.publish(tick)
+    assert seq == 2
+    assert reader.version() == 2
+    assert reader.read() == tick
+    assert writer.publish(dict(tick, ts=2.0)) == 4
+    assert reader.read()["ts"] == 2.0
+
+
+def test_unchanged_version_is_not_decoded_again(tmp_path):
+    writer, reader = snap_pair(tmp_path)
+    writer.publish({"ts": 1.0})
+    first = reader.read()
+    assert reader.read() is first
+    writer.publish({"ts": 2.0})
+    assert reader.read() is not first
+
+
+def test_payload_grows_the_file(tmp_path):
+    writer, reader = snap_pair(tmp_path)
+    writer.publish({"ts": 1.0})
+    big = {"ts": 2.0, "pad": "x" * (SNAP_MIN_SIZE * 3)}
+    writer.publish(big)
+    assert reader.read() == big
+    writer.publish({"ts": 3.0})
+    assert reader.read() == {"ts": 3.0}
+
+
+def test_reader_keeps_last_tick_while_writer_is_mid_update(tmp_path):
+    writer, reader = snap_pair(tmp_path)
+    seq = writer.publish({"ts": 1.0})
+    assert reader.read() == {"ts": 1.0}
+    # An odd seq is a publish in progress: the payload may be half written.
+    SNAP_HEADER.pack_into(writer._map, 0, SNAP_MAGIC, SNAP_FORMAT, seq + 1, 0, 0.0)
+    writer._map[SNAP_HEADER.size:SNAP_HEADER.size + 3] = b"{{{"
+    assert reader.read() == {"ts": 1.0}
+
+
+def test_foreign_file_is_ignored(tmp_path):
+    path = tmp_path / "nba.snap"
+    path.write_bytes(b"\0" * SNAP_MIN_SIZE)
+    assert SharedSnapshot("nba", str(path)).read() is None
+
+
+def test_concurrent_readers_never_see_a_torn_tick(tmp_path):
+    path = str(tmp_path / "nba.snap")
+    writer = SharedSnapshot("nba", path)
+    writer.publish({"n": 0, "check": 0, "pad": ""})
+    done = threading.Event()
+    errors = []
+
+    def publish():
+        for n in range(1, 2000):
+            writer.publish({"n": n, "check": n, "pad": "x" * (n * 37 % 5000)})
+        done.set()
+
+    def read():
+        reader = SharedSnapshot("nba", path)
+        last = -1
+        while not done.is_set():
+            tick = reader.read()
+            if tick["n"] != tick["check"] or tick["n"] < last:
+                errors.append(tick["n"])
+            last = tick["n"]
+
+    readers = [threading.Thread(target=read) for _ in range(3)]
+    for t in readers:
+        t.start()
+    publish()
+    for t in readers:
+        t.join()
+    assert errors == []
@@ -0,0 +1,85 @@
+import random
+
+from sharkcore import NBA, TIER_RANK
+from sharkwatch import AlertEngine, WatchStore, compile_rules, new_rule
+
+TIERS = list(TIER_RANK)
+
+
+def brute_force(data, league_key, tick):
+    # The obvious nested loop the index replaces.
+    derived = tick.get("derived", {})
+    hits = []
+    for row in tick["scanner"]:
+        remaining = derived.get(row["game_id"], {}).get("remaining", 0.0)
+        for user, prefs in data["users"].items():
+            watched = prefs.get("watchlist", {}).get(league_key, [])
+            for rule in prefs["rules"]:
+                if rule["league"] != league_key:
+                    continue
+                if rule["games"] == "watchlist" and row["game_id"] not in watched:
+                    continue
+                if rule["games"] not in ("watchlist", "any") and rule["games"] != row["game_id"]:
+                    continue
+                if rule["side"] != "BOTH" and rule["side"] != row["side"]:
+                    continue
+                if not rule["lo"] <= row["thresh"] <= rule["hi"]:
+                    continue
+                if TIER_RANK[row["tier"]] < TIER_RANK[rule["tier"]]:
+                    continue
+                if rule["shark_only"] and not row["shark"]:
+                    continue
+                if rule["max_remaining"] is not None and remaining > rule["max_remaining"]:
+                    continue
+                hits.append((user, rule["id"], row["game_id"], row["side"], row["thresh"]))
+    return sorted(hits)
+
+
+def test_index_matches_brute_force():
+    rnd = random.Random(7)
+    games = [str(i) for i in range(6)]
+    data = {"users": {}}
+    for u in range(20):
+        rules = []
+        for r in range(8):
+            lo = rnd.randrange(190, 240) + 0.5
+            rule = new_rule(rnd.choice(["nba", "nba", "ncaa"]), rnd.choice(["watchlist", "any"] + games),
+                            rnd.choice(["OVER", "UNDER", "BOTH"]), lo, lo + rnd.choice([0, 2, 10, 30]),
+                            rnd.choice(TIERS), rnd.choice([None, 4.0, 10.0]), rnd.random() < 0.3)
+            rule["id"] = "u" + str(u) + "r" + str(r)
+            rules.append(rule)
+        data["users"]["user" + str(u)] = {"watchlist": {"nba": rnd.sample(games, 2)}, "rules": rules}
+    total = 0
+    for _ in range(20):
+        tick = {"derived": {g: {"remaining": rnd.uniform(0, 20)} for g in games},
+                "scanner": [{"game_id": g, "side": side, "thresh": t + 0.5, "tier": rnd.choice(TIERS),
+                             "shark": rnd.random() < 0.5}
+                            for g in games for side in ("OVER", "UNDER") for t in range(190, 270, 2)]}
+        got = sorted((u, r["id"], row["game_id"], row["side"], row["thresh"])
+                     for u, r, row in compile_rules(data, "nba").match(tick))
+        assert got == brute_force(data, "nba", tick)
+        total += len(got)
+    assert total > 0
+
+
+def test_alert_fires_once_per_new_match(tmp_path):
+    store = WatchStore(str(tmp_path / "watch.json"))
+    store.set_watchlist("amy", "nba", ["1"])
+    store.add_rule("amy", new_rule("nba", "watchlist", "OVER", 210, 220, "SAFE"))
+    engine = AlertEngine(NBA, store)
+    engine.log_path = str(tmp_path / "alerts.jsonl")
+
+    def tick(ts, tier):
+        return {"ts": ts, "games": [{"id": "1", "away_abbr": "BOS", "home_abbr": "NYK"}],
+                "derived": {"1": {"remaining": 5.0}},
+                "scanner": [{"game_id": "1", "side": "OVER", "thresh": 214.5, "tier": tier,
+                             "shark": True, "cushion": 3.0}]}
+
+    assert engine.evaluate(tick(1, "TIGHT")) == {}
+    assert len(engine.evaluate(tick(2, "SAFE"))["amy"]) == 1
+    assert len(engine.evaluate(tick(3, "FORTRESS"))["amy"]) == 1
+    engine.evaluate(tick(4, "RISKY"))
+    alerts = engine.evaluate(tick(5, "SAFE"))["amy"]
+    assert len(alerts) == 2 and alerts[-1]["label"] == "BOS @ NYK"
+    engine.forget(["1"])
+    assert not engine.recent["amy"]